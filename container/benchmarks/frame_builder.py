@@ -0,0 +1,174 @@
+"""Benchmark of building the measurement DataFrame of the VMS and SPE readers.
+
+The readers size one float64 buffer from the block headers and fill it in place (FrameBuilder),
+instead of concatenating one DataFrame per block. This script generates synthetic files
+with 10 to 10,000 blocks and logs the time per block, which stays flat when the cost
+is linear in the number of blocks:
+    read: FileReader.read() (parsing included; for VMS also the XY values of each block)
+    builder: filling a FrameBuilder with the parsed blocks, as read() does
+    concat: the former pd.concat accumulation of the same blocks, which grows with the number of blocks
+
+Usage (in the container directory):
+    python -m benchmarks.frame_builder [--blocks 10 100 1000 10000] [--points 50] [--concat-max 1000]
+
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import tempfile
+import time
+from collections.abc import Callable
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from rdetoolkit.models.rde2types import RdeOutputResourcePath
+
+from modules_xps.inputfile_handler import FrameBuilder
+from modules_xps.scienta_omicron.vms.inputfile_handler import FileReader as VmsFileReader
+from modules_xps.ulvac_phi.spe.inputfile_handler import FileReader as SpeFileReader
+
+logger = logging.getLogger(__name__)
+
+
+def write_vms(path: Path, n_blocks: int, n_points: int, seed: int = 0) -> None:
+    """Write a NORM VAMAS file of XPS blocks with one corresponding variable each."""
+    rng = np.random.default_rng(seed)
+    lines = [
+        "VAMAS Surface Chemical Analysis Standard Data Transfer Format 1988 May 4",
+        "Institution", "Model", "Operator", "Experiment", "1", "benchmark",
+        "NORM", "REGULAR", "1", "1", "Etch time", "s", "0", "0", "0", "0", str(n_blocks),
+    ]
+    for b in range(n_blocks):
+        lines += [f"Block{b}", "Sample", "2024", "5", "17", "10", "11", "12", "9", "0", "XPS", str(b)]
+        lines += ["Al", "1486.6", "100", "1e37", "1E+037", "58", "0", "FAT", "20", "1", "4.5", "0", "1", "1", "0", "0"]
+        lines += [f"C{b}", "1s", "-1", "Kinetic Energy", "eV", "1200.0", "0.1", "1", "Intensity", "d"]
+        lines += ["pulse counting", "0.1", "3", "0", "0", "0", "0", "0", str(n_points), "0", "100000"]
+        lines += [str(value) for value in rng.integers(0, 100000, n_points, endpoint=True)]
+    lines.append("end of experiment")
+    path.write_text("\n".join(lines) + "\n", encoding="ascii")
+
+
+def write_spe_txt(path: Path, n_regions: int, n_points: int, seed: int = 0) -> None:
+    """Write MPExport text output of a .spe file with n_regions regions."""
+    rng = np.random.default_rng(seed)
+    lines = ["SOFH", "FileType: MultiPak", "AcqFileDate: 2024 5 7", "XraySource: Al mono", "EOFH"]
+    defs = [
+        f"SpectralRegDef: {i + 1} {i + 1} R{i} 6 {n_points} -0.1000 295.00 275.00 295.00 275.00 {rng.uniform(0.01, 2):.4f} 23.500 FAT"
+        for i in range(n_regions)
+    ]
+    lines[-1:-1] = defs
+    for i in range(n_regions):
+        lines += ["//Area Comment,AtomicName,XLabel,YLabel,Extra//", "comment", f"R{i}", "Binding Energy(eV),reverse", "Intensity(c/s)", "extra"]
+        lines += [f"{295 - 0.1 * p:.3f},{rng.uniform(0, 1e5):.3f}" for p in range(n_points)]
+        lines.append("")
+    path.write_text("\r\n".join(lines) + "\r\n", encoding="ascii")
+
+
+def resource_paths(rawfile: Path) -> RdeOutputResourcePath:
+    """Output paths in which only rawfiles and struct are used by the readers."""
+    d = rawfile.parent
+    return RdeOutputResourcePath(
+        raw=d, nonshared_raw=d, rawfiles=(rawfile,), struct=d, main_image=d, other_image=d, meta=d,
+        thumbnail=d, logs=d, invoice=d, invoice_schema_json=d, invoice_org=d,
+    )
+
+
+def read_vms(paths: RdeOutputResourcePath) -> tuple[pd.DataFrame, list[np.ndarray]]:
+    """Read a VMS file, returning the measurement data and the XY values of each block."""
+    reader = VmsFileReader({})
+    _, data, data_blocks, _ = reader.read(paths)
+    return data, [reader.block_xy(block) for block in data_blocks]
+
+
+def read_spe(paths: RdeOutputResourcePath) -> tuple[pd.DataFrame, list[np.ndarray]]:
+    """Read a SPE file, returning the measurement data and the values of each region."""
+    _, data, _, data_atoms = SpeFileReader({}).read(paths)
+    return data, [atom.values for atom in data_atoms]
+
+
+def best_of(func: Callable[[], object], repeat: int) -> float:
+    """Best wall time of repeated calls, in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def build_columns(blocks: list[np.ndarray]) -> pd.DataFrame:
+    """Fill a FrameBuilder as the VMS reader does: XY column pairs side by side."""
+    builder = FrameBuilder(max(len(values) for values in blocks), 2 * len(blocks))
+    for i, values in enumerate(blocks):
+        builder.put(values, column=2 * i)
+    return builder.to_frame()
+
+
+def build_rows(blocks: list[np.ndarray]) -> pd.DataFrame:
+    """Fill a FrameBuilder as the SPE reader does: regions stacked vertically."""
+    builder = FrameBuilder(sum(len(values) for values in blocks), blocks[0].shape[1])
+    row = 0
+    for values in blocks:
+        builder.put(values, row=row)
+        row += len(values)
+    return builder.to_frame()
+
+
+def concat_columns(blocks: list[np.ndarray]) -> pd.DataFrame:
+    """Accumulate as the VMS reader did before: one pd.concat along the columns per block."""
+    data = pd.DataFrame()
+    for values in blocks:
+        data = pd.concat([data, pd.DataFrame(values)], axis=1)
+    return data
+
+
+def concat_rows(blocks: list[np.ndarray]) -> pd.DataFrame:
+    """Accumulate as the SPE reader did before: one pd.concat along the rows per region."""
+    data = pd.DataFrame()
+    for values in blocks:
+        data = pd.concat([data, pd.DataFrame(values)])
+    return data
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blocks", type=int, nargs="+", default=[10, 100, 1000, 10000], help="numbers of blocks")
+    parser.add_argument("--points", type=int, default=50, help="points per block")
+    parser.add_argument("--concat-max", type=int, default=1000, help="largest number of blocks for the pd.concat comparison")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement (the best is shown)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    logger.info("%-6s %7s %16s %19s %18s", "reader", "blocks", "read (ms/block)", "builder (ms/block)", "concat (ms/block)")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.blocks:
+            vms = Path(tmp, f"bench_{n}.vms")
+            write_vms(vms, n, args.points, seed=n)
+            spe = Path(tmp, f"bench_{n}.spe")
+            spe.write_bytes(b"")
+            write_spe_txt(spe.with_suffix(".txt"), n, args.points, seed=n)
+
+            for name, rawfile, read, build, concat in (
+                ("vms", vms, read_vms, build_columns, concat_columns),
+                ("spe", spe, read_spe, build_rows, concat_rows),
+            ):
+                paths = resource_paths(rawfile)
+                elapsed = best_of(partial(read, paths), args.repeat)
+                data, blocks = read(paths)
+                if len(blocks) != n or data.notna().to_numpy().sum() != sum(values.size for values in blocks):
+                    err_msg = f"{rawfile.name} was not read as {n} blocks"
+                    raise RuntimeError(err_msg)
+                built = best_of(partial(build, blocks), args.repeat)
+                row = f"{name:6} {n:7d} {elapsed / n * 1e3:16.3f} {built / n * 1e3:19.3f}"
+                if n <= args.concat_max:
+                    concatenated = best_of(partial(concat, blocks), args.repeat)
+                    row += f" {concatenated / n * 1e3:18.3f}"
+                logger.info(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,27 @@
 from __future__ import annotations
 
+import contextlib
+import dataclasses
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import cast
+
 from rdetoolkit.errors import catch_exception_with_message
+from rdetoolkit.exceptions import StructuredError
 from rdetoolkit.models.rde2types import RdeInputDirPaths, RdeOutputResourcePath
 from rdetoolkit.rde2util import Meta
 
+from modules.manifest import Manifest
 from modules_xps.factory import XpsFactory
+from modules_xps.scienta_omicron.vms.graph_handler import GraphPlotter as VmsGraphPlotter
+from modules_xps.scienta_omicron.vms.inputfile_handler import FileReader as VmsFileReader
+from modules_xps.ulvac_phi.mpexport import MPEXPORT_BINPATH, max_workers
+
+PHI_SUFFIXES = [".spe", ".pro", ".ang"]
+
+# Input files, output files and directories of the output files named after the raw file, of each stage
+Stages = dict[str, tuple[list[Path], list[Path], list[Path]]]
 
 
 @catch_exception_with_message()
@@ -30,22 +47,269 @@ def dataset(srcpaths: RdeInputDirPaths, resource_paths: RdeOutputResourcePath) -
     config = XpsFactory.get_config(resource_paths.invoice_org, srcpaths.tasksupport)
     metadata_def, module, suffix = XpsFactory.get_objects(resource_paths.rawfiles[0], srcpaths.tasksupport, config)
 
+    # With "incremental", the stages whose inputs are unchanged since the last run are skipped.
+    manifest = Manifest.from_config(resource_paths.logs, config, resource_paths.rawfiles)
+
+    # Process .vms files block by block
+    if suffix == ".vms" and config["xps"].get("streaming", False):
+        dataset_vms_streaming(resource_paths, metadata_def, module, config, manifest)
+        return
+
+    # Process several ULVAC-PHI files of one session together
+    if suffix in PHI_SUFFIXES and len(resource_paths.rawfiles) > 1:
+        dataset_phi_files(srcpaths, resource_paths, config, manifest)
+        return
+
     # Convert from raw file to txt file by MPExport.exe
-    if suffix in [".spe", ".pro", ".ang"]:
-        module.file_reader.convert_raw2txt_with_wine(resource_paths)
+    if suffix in PHI_SUFFIXES:
+        conversion = _conversion_inputs(manifest, resource_paths)
+        if conversion is not None:
+            module.file_reader.convert_raw2txt_with_wine(resource_paths)
+            _store_conversion(manifest, resource_paths, conversion)
+    structure_file(resource_paths, metadata_def, module, suffix, config, manifest=manifest)
+
+
+def structure_file(
+    resource_paths: RdeOutputResourcePath,
+    metadata_def: Path,
+    module: XpsFactory,
+    suffix: str,
+    config: dict,
+    *,
+    primary: bool = True,
+    manifest: Manifest | None = None,
+) -> None:
+    """Read a raw file and save its metadata, CSV files and graphs.
+
+    With a manifest, only the stages whose inputs or outputs changed since the last run are run,
+    and the raw file is not read if there are none.
+
+    Args:
+        resource_paths (RdeOutputResourcePath): Paths to output resources for saving results.
+        metadata_def (Path): Metadata definition file.
+        module (XpsFactory): Classes for the file.
+        suffix (str): Input file extension.
+        config (dict): Configuration details.
+        primary (bool): Whether metadata.json and the invoice are taken from this file.
+        manifest (Manifest | None): Manifest for incremental reprocessing, or None to run every stage.
+
+    """
+    stale, run = _plan_stages(resource_paths, _stages(resource_paths, metadata_def, suffix, primary=primary), manifest)
+    if not stale:
+        return
+
     # Read input file
-    meta, data, data_blocks, data_atoms = module.file_reader.read(resource_paths)
+    with run("parse"):
+        meta, data, data_blocks, data_atoms = module.file_reader.read(resource_paths)
 
     # Meta parse & save
-    module.meta_parser.parse(meta, data_blocks)
-    module.meta_parser.save_meta(resource_paths.meta.joinpath("metadata.json"), Meta(metadata_def))
+    if primary:
+        module.meta_parser.parse(meta, data_blocks)
+    if "meta" in stale:
+        with run("meta"):
+            module.meta_parser.save_meta(resource_paths.meta.joinpath("metadata.json"), Meta(metadata_def))
 
     # Save csv
-    module.structured_processor.save_file(resource_paths, meta, data, data_blocks, data_atoms)
+    if "csv" in stale:
+        with run("csv"):
+            module.structured_processor.save_file(resource_paths, meta, data, data_blocks, data_atoms)
 
     # Plot
-    module.graph_plotter.plot_main(resource_paths, meta, data, data_blocks, data_atoms, config)
+    if "plots" in stale:
+        with run("plots"):
+            module.graph_plotter.plot_main(resource_paths, meta, data, data_blocks, data_atoms, config)
 
     # Overwrite invoice
-    if suffix in [".spe", ".pro", ".ang"]:
-        module.invoice_writer.overwrite_invoice_measured_date(suffix, resource_paths, meta)
+    if "invoice" in stale:
+        with run("invoice"):
+            module.invoice_writer.overwrite_invoice_measured_date(suffix, resource_paths, meta)
+
+
+def _stages(resource_paths: RdeOutputResourcePath, metadata_def: Path, suffix: str, *, primary: bool = True) -> Stages:
+    """Get the stages of a raw file.
+
+    Args:
+        resource_paths (RdeOutputResourcePath): Paths to output resources for saving results.
+        metadata_def (Path): Metadata definition file.
+        suffix (str): Input file extension.
+        primary (bool): Whether metadata.json and the invoice are taken from this file.
+
+    Returns:
+        Stages: Input files, output files and directories of the output files named after the raw file, of each stage.
+
+    """
+    # ULVAC-PHI files are read from the text converted by MPExport; every stage uses what is read.
+    read = [resource_paths.struct.joinpath(f"{resource_paths.rawfiles[0].stem}.txt")] if suffix in PHI_SUFFIXES else []
+    default_value = metadata_def.with_name("default_value.csv")
+    stages: Stages = {
+        "parse": (read, [], []),
+        "meta": ([*read, metadata_def, default_value], [resource_paths.meta.joinpath("metadata.json")], []),
+        "csv": (read, [], [resource_paths.struct]),
+        "plots": (read, [], [resource_paths.main_image, resource_paths.other_image]),
+        "invoice": ([*read, resource_paths.invoice_org, resource_paths.invoice_schema_json], [resource_paths.invoice.joinpath("invoice.json")], []),
+    }
+    if not primary:
+        del stages["meta"], stages["invoice"]
+    elif suffix not in PHI_SUFFIXES:
+        del stages["invoice"]
+    return stages
+
+
+def _plan_stages(
+    resource_paths: RdeOutputResourcePath, stages: Stages, manifest: Manifest | None,
+) -> tuple[list[str], Callable[[str], contextlib.AbstractContextManager]]:
+    """Find the stages of a raw file that have to run.
+
+    Args:
+        resource_paths (RdeOutputResourcePath): Paths to output resources for saving results.
+        stages (Stages): Stages of the raw file.
+        manifest (Manifest | None): Manifest for incremental reprocessing, or None to run every stage.
+
+    Returns:
+        list[str]: Stages to run after parse, or an empty list if the raw file does not have to be read.
+        Callable[[str], contextlib.AbstractContextManager]: Context in which a stage runs, to record it in the manifest.
+
+    """
+    rawfile = resource_paths.rawfiles[0]
+    inputs = {stage: manifest.inputs(rawfile, *files) for stage, (files, _, _) in stages.items()} if manifest else {}
+    # The raw file is parsed only for the other stages.
+    stale = [stage for stage in stages if stage != "parse" and (manifest is None or not manifest.is_fresh(rawfile, stage, inputs[stage]))]
+
+    def run(stage: str) -> contextlib.AbstractContextManager:
+        _, outputs, output_dirs = stages[stage]
+        return manifest.record(rawfile, stage, inputs[stage], outputs, output_dirs) if manifest else contextlib.nullcontext()
+
+    return stale, run
+
+
+def _conversion_inputs(manifest: Manifest | None, resource_paths: RdeOutputResourcePath) -> dict | None:
+    """Get the inputs of the MPExport conversion of a raw file, if it has to run.
+
+    Args:
+        manifest (Manifest | None): Manifest for incremental reprocessing.
+        resource_paths (RdeOutputResourcePath): Paths to output resources of the file.
+
+    Returns:
+        dict | None: Inputs of the conversion (empty without a manifest), or None if it can be skipped.
+
+    """
+    if manifest is None:
+        return {}
+    rawfile = resource_paths.rawfiles[0]
+    inputs = manifest.inputs(rawfile, MPEXPORT_BINPATH)
+    if manifest.is_fresh(rawfile, "conversion", inputs):
+        return None
+    manifest.invalidate(rawfile, "conversion")
+    return inputs
+
+
+def _store_conversion(manifest: Manifest | None, resource_paths: RdeOutputResourcePath, inputs: dict) -> None:
+    """Record the MPExport conversion of a raw file in the manifest.
+
+    Args:
+        manifest (Manifest | None): Manifest for incremental reprocessing.
+        resource_paths (RdeOutputResourcePath): Paths to output resources of the file.
+        inputs (dict): Inputs of the conversion.
+
+    """
+    if manifest is not None:
+        rawfile = resource_paths.rawfiles[0]
+        manifest.store(rawfile, "conversion", inputs, [resource_paths.struct.joinpath(f"{rawfile.stem}.txt")])
+
+
+def dataset_phi_files(srcpaths: RdeInputDirPaths, resource_paths: RdeOutputResourcePath, config: dict, manifest: Manifest | None = None) -> None:
+    """Execute structured processing of several ULVAC-PHI files, e.g. the .spe and .pro files of one session.
+
+    The MPExport conversions run concurrently in a bounded pool. The files are read, saved and plotted
+    in the order of the raw files, each as soon as its conversion has finished, so the outputs do not depend
+    on which conversion finishes first. Every file gets its own CSV files and graphs, named after the file.
+    metadata.json and the invoice are taken from the first file.
+
+    Args:
+        srcpaths (RdeInputDirPaths): Paths to input resources for processing.
+        resource_paths (RdeOutputResourcePath): Paths to output resources for saving results.
+        config (dict): Configuration details.
+        manifest (Manifest | None): Manifest for incremental reprocessing, or None to run every stage.
+
+    Raises:
+        StructuredError: If two files have the same name apart from the extension.
+
+    """
+    stems = [rawfile.stem for rawfile in resource_paths.rawfiles]
+    if len(set(stems)) != len(stems):
+        err_msg = "Input files must have different names apart from the extension"
+        raise StructuredError(err_msg)
+
+    files = []
+    for rawfile in resource_paths.rawfiles:
+        metadata_def, module, suffix = XpsFactory.get_objects(rawfile, srcpaths.tasksupport, config)
+        files.append((dataclasses.replace(resource_paths, rawfiles=(rawfile,)), metadata_def, module, suffix))
+
+    conversions = [_conversion_inputs(manifest, file_paths) for file_paths, _, _, _ in files]
+
+    # MPExport runs in its own process, so threads are enough to run the conversions in parallel.
+    # Reading, saving and plotting stay in this thread.
+    with ThreadPoolExecutor(max_workers=max_workers(len(files), config)) as executor:
+        futures = {
+            i: executor.submit(module.file_reader.convert_raw2txt_with_wine, file_paths)
+            for i, (file_paths, _, module, _) in enumerate(files)
+            if conversions[i] is not None
+        }
+        for i, (file_paths, metadata_def, module, suffix) in enumerate(files):
+            # A conversion unchanged since the last run is not run again.
+            if i in futures:
+                futures[i].result()
+                _store_conversion(manifest, file_paths, conversions[i] or {})
+            structure_file(file_paths, metadata_def, module, suffix, config, primary=i == 0, manifest=manifest)
+
+
+def dataset_vms_streaming(
+    resource_paths: RdeOutputResourcePath, metadata_def: Path, module: XpsFactory, config: dict, manifest: Manifest | None = None,
+) -> None:
+    """Execute structured processing of a VMS file one block at a time.
+
+    The blocks are indexed first, so metadata and plot options are obtained from the block headers.
+    Each block is then decoded, written to the TXT and CSV files and plotted before the next one is decoded,
+    so memory use is bounded by one block instead of the whole file. The outputs are the same as dataset(),
+    and the stages are recorded in the manifest in the same way.
+
+    Args:
+        resource_paths (RdeOutputResourcePath): Paths to output resources for saving results.
+        metadata_def (Path): Metadata definition file.
+        module (XpsFactory): Classes for VMS files.
+        config (dict): Configuration details.
+        manifest (Manifest | None): Manifest for incremental reprocessing, or None to run every stage.
+
+    """
+    stale, run = _plan_stages(resource_paths, _stages(resource_paths, metadata_def, ".vms"), manifest)
+    if not stale:
+        return
+
+    file_reader = cast(VmsFileReader, module.file_reader)
+    graph_plotter = cast(VmsGraphPlotter, module.graph_plotter)
+
+    with run("parse"):
+        vamas = file_reader.index(resource_paths.rawfiles[0])
+    with vamas:
+        # Meta parse & save (block headers only)
+        module.meta_parser.parse(vamas.meta, vamas.headers)
+        if "meta" in stale:
+            with run("meta"):
+                module.meta_parser.save_meta(resource_paths.meta.joinpath("metadata.json"), Meta(metadata_def))
+
+        # Save txt, csv & plot in one pass over the blocks
+        block_rows = [file_reader.count_block_rows(header) for header in vamas.headers]
+        with contextlib.ExitStack() as stack:
+            writer = plot_stream = None
+            if "csv" in stale:
+                stack.enter_context(run("csv"))
+                writer = stack.enter_context(module.structured_processor.open_vms_stream(resource_paths, vamas.meta, vamas.headers, block_rows))
+            if "plots" in stale:
+                stack.enter_context(run("plots"))
+                plot_stream = stack.enter_context(graph_plotter.open_stream(resource_paths, vamas.headers, max(block_rows, default=0), config))
+            for data_block in vamas.iter_blocks():
+                xy = file_reader.block_xy(data_block)
+                if writer is not None:
+                    writer.write_block(data_block, xy)
+                if plot_stream is not None:
+                    plot_stream.plot_block(xy)
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+from collections.abc import Iterator, Sequence
+from functools import cache
+from pathlib import Path
+
+import matplotlib as mpl
+import numpy as np
+import pandas as pd
+import rdetoolkit
+
+HASH_CHUNK_SIZE = 1 << 20
+
+
+class Manifest:
+    """Fingerprints of the processing stages of each raw file, for incremental reprocessing.
+
+    Each stage of a raw file is recorded with a fingerprint of its inputs and the hashes of the files it wrote:
+        conversion: raw file, MPExport.exe
+        parse: raw file, text converted by MPExport (the parsed data are only kept in memory)
+        meta: parse inputs, metadata-def.json, default_value.csv
+        csv: parse inputs
+        plots: parse inputs
+        invoice: parse inputs, invoice.json and its schema
+    All fingerprints also cover the whole config (rdeconfig.yaml and the settings taken from the invoice),
+    the source code and the versions of the libraries that shape the output.
+    On a rerun, a stage is skipped if its fingerprint is unchanged and the files it wrote are still there
+    unchanged; the raw file is only parsed if a stage after parse has to run.
+
+    The fingerprint of a stage is taken after it runs, since the invoice stage rewrites invoice.json.
+    A stage is dropped from the manifest before it runs, so an interrupted stage runs again.
+
+    The outputs of a stage are the files it names (e.g. metadata.json) and, in the directories it writes to,
+    the files named after the raw file: "<stem>.*", "<stem>_*" and the files under such a directory.
+    A name that also fits a longer raw file stem (e.g. "a_b.csv" of "a_b.spe" next to "a.spe") belongs to that file,
+    and a file recorded by another stage of the raw file (e.g. the "<stem>.txt" of MPExport) stays with that stage.
+    The directories are shared by the raw files, so the files written there by others are never taken.
+
+    Attributes:
+        path (Path): Manifest file.
+        config (dict): config data.
+        stems (list[str]): Stems of the raw files processed together.
+        entries (dict): Stages of each raw file, by file name.
+
+    """
+
+    FILE_NAME = "xps_manifest.json"
+    VERSION = 1
+
+    def __init__(self, path: Path, config: dict, rawfiles: Sequence[Path] = ()):
+        self.path = path
+        self.config = config
+        self.stems = [rawfile.stem for rawfile in rawfiles]
+        self.entries: dict[str, dict] = {}
+        self._hashes: dict[tuple[str, int, int], str] = {}
+        with contextlib.suppress(OSError, ValueError):
+            manifest = json.loads(path.read_text(encoding="utf_8"))
+            if manifest.get("version") == self.VERSION:
+                self.entries = manifest["files"]
+
+    @classmethod
+    def from_config(cls, log_dir: Path, config: dict, rawfiles: Sequence[Path] = ()) -> Manifest | None:
+        """Open the manifest if "incremental" is set in rdeconfig.yaml.
+
+        Args:
+            log_dir (Path): Directory of the manifest file.
+            config (dict): config data.
+            rawfiles (Sequence[Path]): Raw files processed together.
+
+        Returns:
+            Manifest | None: Manifest, or None for a full run.
+
+        """
+        if not config["xps"].get("incremental", False):
+            return None
+        return cls(log_dir.joinpath(cls.FILE_NAME), config, rawfiles)
+
+    def inputs(self, rawfile: Path, *files: Path) -> dict:
+        """Get the inputs of a stage.
+
+        Args:
+            rawfile (Path): Raw file.
+            files (Path): Other input files of the stage.
+
+        Returns:
+            dict: Inputs, for is_fresh() and record().
+
+        """
+        return {
+            "code": code_version(),
+            "raw": rawfile,
+            "config": self.config,
+            "files": list(files),
+        }
+
+    def is_fresh(self, rawfile: Path, stage: str, inputs: dict) -> bool:
+        """Check whether a stage can be skipped.
+
+        Args:
+            rawfile (Path): Raw file.
+            stage (str): Stage name.
+            inputs (dict): Inputs of the stage.
+
+        Returns:
+            bool: Whether the stage ran with the same inputs and its output files are unchanged.
+
+        """
+        entry = self.entries.get(rawfile.name, {}).get(stage)
+        if entry is None or entry["fingerprint"] != self._fingerprint(inputs):
+            return False
+        for name, digest in entry["outputs"].items():
+            path = self.path.parent.joinpath(name)
+            if not path.is_file() or self._file_hash(path) != digest:
+                return False
+        return True
+
+    @contextlib.contextmanager
+    def record(
+        self, rawfile: Path, stage: str, inputs: dict, outputs: Sequence[Path] = (), output_dirs: Sequence[Path] = (),
+    ) -> Iterator[None]:
+        """Record a stage that runs in the with block.
+
+        Args:
+            rawfile (Path): Raw file.
+            stage (str): Stage name.
+            inputs (dict): Inputs of the stage.
+            outputs (Sequence[Path]): Files the stage writes, if it does.
+            output_dirs (Sequence[Path]): Directories in which the stage writes files named after the raw file.
+
+        """
+        self.invalidate(rawfile, stage)
+        yield
+        self.store(rawfile, stage, inputs, [*outputs, *self._named_files(rawfile, output_dirs)])
+
+    def invalidate(self, rawfile: Path, stage: str) -> None:
+        """Drop a stage from the manifest before it runs.
+
+        Args:
+            rawfile (Path): Raw file.
+            stage (str): Stage name.
+
+        """
+        if self.entries.get(rawfile.name, {}).pop(stage, None) is not None:
+            self._save()
+
+    def store(self, rawfile: Path, stage: str, inputs: dict, outputs: Sequence[Path]) -> None:
+        """Record a stage that has run.
+
+        The files already recorded by another stage of the raw file are left out.
+
+        Args:
+            rawfile (Path): Raw file.
+            stage (str): Stage name.
+            inputs (dict): Inputs of the stage.
+            outputs (Sequence[Path]): Files written by the stage.
+
+        """
+        stages = self.entries.setdefault(rawfile.name, {})
+        others = {name for other, entry in stages.items() if other != stage for name in entry["outputs"]}
+        names = {os.path.relpath(path, self.path.parent): path for path in outputs if path.is_file() and path != self.path}
+        stages[stage] = {
+            "fingerprint": self._fingerprint(inputs),
+            "outputs": {name: self._file_hash(path) for name, path in sorted(names.items()) if name not in others},
+        }
+        self._save()
+
+    def _fingerprint(self, inputs: dict) -> str:
+        """Hash the inputs of a stage, with the contents of the input files."""
+        content = {
+            **inputs,
+            "raw": self._file_hash(inputs["raw"]),
+            "files": [self._file_hash(path) if path.is_file() else None for path in inputs["files"]],
+        }
+        return hashlib.blake2b(json.dumps(content, sort_keys=True, default=str).encode(), digest_size=20).hexdigest()
+
+    def _file_hash(self, path: Path) -> str:
+        """Hash a file in chunks, once per file state."""
+        stat = path.stat()
+        key = (str(path), stat.st_mtime_ns, stat.st_size)
+        if key not in self._hashes:
+            digest = hashlib.blake2b(digest_size=20)
+            with open(path, "rb") as f:
+                while chunk := f.read(HASH_CHUNK_SIZE):
+                    digest.update(chunk)
+            self._hashes[key] = digest.hexdigest()
+        return self._hashes[key]
+
+    def _named_files(self, rawfile: Path, dirs: Sequence[Path]) -> list[Path]:
+        """Get the files named after a raw file in the directories, and the files under such a directory."""
+        longer = [stem for stem in self.stems if len(stem) > len(rawfile.stem) and _is_named_after(stem, rawfile.stem)]
+        files = []
+        for directory in dirs:
+            for path in directory.iterdir():
+                if not _is_named_after(path.name, rawfile.stem) or any(_is_named_after(path.name, stem) for stem in longer):
+                    continue
+                files.extend(sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path])
+        return files
+
+    def _save(self) -> None:
+        """Write the manifest file."""
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"version": self.VERSION, "files": self.entries}, indent=2), encoding="utf_8")
+        tmp_path.replace(self.path)
+
+
+def _is_named_after(name: str, stem: str) -> bool:
+    """Check whether a file name is "<stem>", "<stem>.*" or "<stem>_*"."""
+    return name == stem or name.startswith((f"{stem}.", f"{stem}_"))
+
+
+@cache
+def code_version() -> str:
+    """Hash the source code and the versions of the libraries that shape the output.
+
+    Returns:
+        str: Code version.
+
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    for version in (rdetoolkit.__version__, np.__version__, pd.__version__, mpl.__version__):
+        digest.update(f"{version}\n".encode())
+    root = Path(__file__).parents[1]
+    for path in sorted([*root.joinpath("modules").rglob("*.py"), *root.joinpath("modules_xps").rglob("*.py")]):
+        digest.update(path.relative_to(root).as_posix().encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
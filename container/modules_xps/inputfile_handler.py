@@ -1,8 +1,40 @@
+from __future__ import annotations
+
+import codecs
+import io
+import math
+import mmap
+import re
+from collections.abc import Iterator
+from contextlib import contextmanager
+from functools import cache
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
+from chardet import UniversalDetector, detect
 from rdetoolkit.models.rde2types import RdeOutputResourcePath
+from rdetoolkit.rde2util import CharDecEncoding
 
 from modules_xps.interfaces import IInputFileParser
 
+# Encoding detection looks at this many bytes at most.
+ENCODING_SAMPLE_SIZE = 1 << 20
+# Files of this size or larger are mapped instead of read into memory.
+MMAP_THRESHOLD = 1 << 24
+ENCODING_CACHE_SIZE = 256
+# Powers of ten up to 1e15 are exact and keep scaled abscissa values below 2**53.
+MAX_VECTORIZED_DECIMAL_PLACES = 15
+# From 2**52 on, float64 values have no fractional part.
+MAX_EXACT_FRACTION = 2.0**52
+
+# Escape sequences for which chardet does not report plain ASCII (ISO-2022 and HZ).
+_ESCAPES = (b"\x1b", b"~{")
+# "\r" not followed by "\n", a line break in text mode.
+_LONE_CR_PATTERN = re.compile(rb"\r(?!\n)")
+# Detected encodings per file path, size and modification time, kept for the lifetime of the worker process.
+_encoding_cache: dict[tuple[str, int, int], str] = {}
+
 
 class FileReader(IInputFileParser):
     """Reads and processes structured ras files into data and metadata blocks.
@@ -22,3 +54,479 @@ class FileReader(IInputFileParser):
     def convert_raw2txt_with_wine(self, resource_paths: RdeOutputResourcePath) -> str:
         """There is no reality in the parent method."""
         return ""
+
+
+class FrameBuilder:
+    """Builds a float64 DataFrame from blocks without repeated concatenation.
+
+    The buffer is allocated once from sizes known in advance (e.g. block headers),
+    filled in place and wrapped as a DataFrame at the end.
+    Cells that are never filled stay NaN.
+
+    Example:
+        builder = FrameBuilder(max_rows, 2 * len(blocks))
+        for i, block in enumerate(blocks):
+            builder.put(values, column=2 * i)
+        df = builder.to_frame()
+
+    """
+
+    def __init__(self, n_rows: int, n_columns: int, columns: list | None = None):
+        self.buffer = np.full((n_rows, n_columns), np.nan, dtype=np.float64)
+        self.columns = columns
+
+    def put(self, values: np.ndarray, *, row: int = 0, column: int = 0) -> None:
+        """Copy a 2D block of values into the buffer.
+
+        Args:
+            values (np.ndarray): Values (rows x columns).
+            row (int): Row of the upper left cell.
+            column (int): Column of the upper left cell.
+
+        """
+        n_rows, n_columns = values.shape
+        self.buffer[row:row + n_rows, column:column + n_columns] = values
+
+    def to_frame(self) -> pd.DataFrame:
+        """Wrap the buffer as a DataFrame without copying.
+
+        Returns:
+            pd.DataFrame: Filled data.
+
+        """
+        return pd.DataFrame(self.buffer, columns=self.columns, copy=False)
+
+
+def count_decimal_places(num: float) -> int:
+    """Convert floating point numbers to strings.
+
+    Args:
+        num (float): Floating-point number.
+
+    Returns:
+        int: Number of decimal places.
+
+    """
+    num_str = str(num)
+    return len(num_str.split('.')[1]) if '.' in num_str else 0
+
+
+def abscissa_values(start: float, increment: float, positions: np.ndarray) -> np.ndarray:
+    """Calculate abscissa values rounded to the decimal places of the increment.
+
+    The result is bit-identical to round(float(start + n * increment), decimal_point) for each n.
+
+    Args:
+        start (float): Abscissa start.
+        increment (float): Abscissa increment.
+        positions (np.ndarray): Positions of the values (0-based).
+
+    Returns:
+        np.ndarray: Abscissa values.
+
+    """
+    decimal_point = count_decimal_places(increment)
+    values = start + positions.astype(np.float64) * increment
+    if decimal_point > MAX_VECTORIZED_DECIMAL_PLACES:
+        return np.array([round(float(v), decimal_point) for v in values], dtype=np.float64)
+
+    scale = 10.0 ** decimal_point
+    scaled = values * scale
+    rounded = np.rint(scaled) / scale
+    # round() rounds the exact binary value, np.rint the scaled product, which is off by at most half an ulp.
+    # So they agree unless the product is near a half-way point, or too large to hold a fraction.
+    fraction = scaled - np.floor(scaled)
+    inexact = (np.abs(fraction - 0.5) <= 8 * np.spacing(np.abs(scaled))) | ~(np.abs(scaled) < MAX_EXACT_FRACTION)
+    for pos in np.flatnonzero(inexact):
+        rounded[pos] = round(float(values[pos]), decimal_point)
+    return rounded
+
+
+def parse_csv_lines(lines: list[str]) -> np.ndarray:
+    """Parse comma-separated numeric lines in bulk.
+
+    Args:
+        lines (list[str]): Lines of numbers separated by commas.
+
+    Returns:
+        np.ndarray: Values as float64, rows x columns.
+
+    Raises:
+        ValueError: If a value is not a number or the number of columns changes.
+
+    """
+    if not lines:
+        return np.empty((0, 0))
+    return np.loadtxt(lines, delimiter=",", dtype=np.float64, ndmin=2)
+
+
+def format_csv_lines(values: np.ndarray) -> list[str]:
+    """Format values as comma-separated lines, the same way DataFrame.to_csv writes float columns.
+
+    Args:
+        values (np.ndarray): Values, rows x columns.
+
+    Returns:
+        list[str]: Lines.
+
+    """
+    # to_csv writes NaN as an empty field.
+    return [",".join("" if math.isnan(v) else str(v) for v in row) for row in values.tolist()]
+
+
+def read_text_file(path: Path) -> str:
+    """Read a text file of unknown encoding.
+
+    The file is read once. The encoding is detected from the same bytes (see detect_text_file_encoding)
+    and newlines are translated as in text mode.
+
+    Args:
+        path (Path): Text file.
+
+    Returns:
+        str: Contents of the file.
+
+    """
+    with _load_bytes(path) as data:
+        return _decode_text(data, _file_key(path))
+
+
+def iter_text_blocks(path: Path, separator: str) -> Iterator[list[str]]:
+    """Iterate over the blocks of a text file of unknown encoding, each starting at a line beginning with separator.
+
+    The file is scanned once for the separator and only the block being iterated is decoded,
+    so large files are processed in memory bounded by the largest block.
+    Lines are split as in text mode and stripped of trailing whitespace.
+
+    Args:
+        path (Path): Text file.
+        separator (str): Start of the first line of each block.
+
+    Yields:
+        list[str]: Lines of each block. Lines before the first separator form the first block.
+
+    """
+    with _load_bytes(path) as data:
+        key = _file_key(path)
+        enc = _detect_encoding(data, key)
+        try:
+            sep = separator.encode(enc)
+            ascii_compatible = sep == separator.encode("ascii") and "\r\n".encode(enc) == b"\r\n"
+        except (UnicodeEncodeError, LookupError):
+            ascii_compatible = False
+        if not ascii_compatible:
+            # The block boundaries cannot be found in the bytes (e.g. UTF-16).
+            text, _ = _decode(data, enc, key)
+            yield from _split_lines(_translate_newlines(text).split("\n"), separator)
+            return
+
+        starts = [0]
+        pos = data.find(sep, 1)
+        while pos >= 0:
+            if data[pos - 1] in b"\r\n":
+                starts.append(pos)
+            pos = data.find(sep, pos + 1)
+        starts.append(len(data))
+
+        for start, end in zip(starts[:-1], starts[1:], strict=True):
+            if start == end:
+                continue
+            text, enc = _decode(data[start:end], enc, key)
+            lines = _translate_newlines(text).split("\n")
+            # A block ends with the line break before the next separator (or at the end of the file).
+            if lines[-1] == "":
+                lines.pop()
+            yield [line.rstrip() for line in lines]
+
+
+class LineReader:
+    """Reads the lines of a text file of unknown encoding from its bytes.
+
+    The file is loaded once (see read_text_file) and lines are decoded when they are read,
+    with newlines translated as in text mode. tell() and seek() use byte offsets,
+    so positions can be stored and revisited without decoding the text before them.
+
+    Example:
+        with LineReader.open(path) as f:
+            line = f.readline()
+
+    Attributes:
+        data (bytes | mmap.mmap): Text bytes, in which a line feed ends each line.
+        encoding (str): Encoding of the text.
+
+    """
+
+    # Up to this many lines are found one by one; more are found by scanning the bytes with numpy.
+    SCAN_LINES = 64
+    # Bytes per line assumed for the first scan.
+    SCAN_BYTES_PER_LINE = 16
+
+    def __init__(self, data: bytes | mmap.mmap, encoding: str, key: tuple[str, int, int] | None = None):
+        self.data = data
+        self.encoding = encoding
+        self._key = key
+        self._pos = 0
+
+    @classmethod
+    @contextmanager
+    def open(cls, path: Path) -> Iterator[LineReader]:
+        """Load a text file.
+
+        Args:
+            path (Path): Text file.
+
+        Yields:
+            LineReader: Reader positioned at the start of the file.
+
+        """
+        with _load_bytes(path) as data:
+            key = _file_key(path)
+            enc = _detect_encoding(data, key)
+            if not _is_line_compatible(data, enc):
+                # Lines cannot be found in the bytes (e.g. UTF-16 or lone "\r" line breaks).
+                yield cls(_decode_text(data, key).encode("utf_8"), "utf_8")
+                return
+            yield cls(data, enc, key)
+
+    def tell(self) -> int:
+        """Get the byte offset of the next line."""
+        return self._pos
+
+    def seek(self, offset: int) -> None:
+        """Move to a byte offset returned by tell()."""
+        self._pos = offset
+
+    def readline(self) -> str:
+        """Read one line.
+
+        Returns:
+            str: Line with its line break (none at the end of the file), or "" at the end of the file.
+
+        """
+        end = self.data.find(b"\n", self._pos)
+        end = len(self.data) if end < 0 else end + 1
+        return self._read_to(end)
+
+    def read_lines(self, count: int) -> str:
+        """Read several lines at once.
+
+        Args:
+            count (int): Number of lines.
+
+        Returns:
+            str: Text of the lines with their line breaks.
+
+        Raises:
+            EOFError: If the file ends before count lines.
+
+        """
+        return self._read_to(self._line_end(count))
+
+    def skip_lines(self, count: int) -> None:
+        """Move past lines without decoding them.
+
+        Args:
+            count (int): Number of lines.
+
+        Raises:
+            EOFError: If the file ends before count lines.
+
+        """
+        self._pos = self._line_end(count)
+
+    def _line_end(self, count: int) -> int:
+        """Find the byte offset after count lines from the current position."""
+        data, pos = self.data, self._pos
+        size = len(data)
+        if count <= self.SCAN_LINES:
+            m = _lines_pattern(count).match(data, pos)
+            if m is not None:
+                return m.end()
+            # Near the end of the file, where the last line may have no line break.
+            for _ in range(count):
+                if pos >= size:
+                    raise EOFError
+                end = data.find(b"\n", pos)
+                pos = size if end < 0 else end + 1
+            return pos
+
+        length = count * self.SCAN_BYTES_PER_LINE
+        while True:
+            length = min(length, size - pos)
+            newlines = np.flatnonzero(np.frombuffer(data, dtype=np.uint8, count=length, offset=pos) == ord("\n"))
+            if len(newlines) >= count:
+                return pos + int(newlines[count - 1]) + 1
+            if pos + length == size:
+                # The last line may have no line break.
+                last = int(newlines[-1]) + 1 if len(newlines) else 0
+                if len(newlines) == count - 1 and last < length:
+                    return size
+                raise EOFError
+            length *= 2
+
+    def _read_to(self, end: int) -> str:
+        """Decode the bytes from the current position to a byte offset and move there."""
+        chunk = self.data[self._pos:end]
+        self._pos = end
+        text, self.encoding = _decode(chunk, self.encoding, self._key)
+        return text.replace("\r\n", "\n") if b"\r" in chunk else text
+
+
+@cache
+def _lines_pattern(count: int) -> re.Pattern[bytes]:
+    """Pattern matching count lines with their line breaks."""
+    return re.compile(rb"(?:[^\n]*\n){%d}" % count)
+
+
+def _is_line_compatible(data: bytes | mmap.mmap, enc: str) -> bool:
+    """Check that the lines of text bytes end with a line feed and can be decoded one at a time."""
+    try:
+        if "\r\n".encode(enc) != b"\r\n" or codecs.lookup(enc).name.startswith(("iso2022", "hz")):
+            return False
+    except (UnicodeEncodeError, LookupError):
+        return False
+    return _LONE_CR_PATTERN.search(data) is None
+
+
+def _translate_newlines(text: str) -> str:
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def _split_lines(lines: list[str], separator: str) -> Iterator[list[str]]:
+    if lines and lines[-1] == "":
+        lines.pop()
+    block: list[str] = []
+    for line in lines:
+        if line.startswith(separator) and block:
+            yield block
+            block = []
+        block.append(line.rstrip())
+    if block:
+        yield block
+
+
+def decode_text(data: bytes | mmap.mmap) -> str:
+    """Decode text of unknown encoding.
+
+    The encoding is detected from a sample (see detect_text_file_encoding) and the data are decoded in one pass.
+
+    Args:
+        data (bytes | mmap.mmap): Text bytes.
+
+    Returns:
+        str: Text with newlines translated as in text mode.
+
+    """
+    return _decode_text(data, None)
+
+
+def detect_text_file_encoding(path: Path) -> str:
+    """Detect the encoding of a text file.
+
+    The encoding is detected from the first ENCODING_SAMPLE_SIZE bytes: ASCII, the usual case, when they have
+    no non-ASCII bytes or escape sequences, otherwise with the same steps as CharDecEncoding.
+    When the text is decoded and a byte does not decode with the result, the encoding is detected
+    again from the ENCODING_SAMPLE_SIZE bytes from the line of that byte.
+    Results are cached per file path, size and modification time, so a file processed again
+    in the same worker is not detected again.
+
+    Args:
+        path (Path): Text file.
+
+    Returns:
+        str: Encoding for open().
+
+    """
+    with _load_bytes(path) as data:
+        return _detect_encoding(data, _file_key(path))
+
+
+@contextmanager
+def _load_bytes(path: Path) -> Iterator[bytes | mmap.mmap]:
+    with open(path, "rb") as f:
+        size = path.stat().st_size
+        if size < MMAP_THRESHOLD:
+            yield f.read()
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
+
+
+def _file_key(path: Path) -> tuple[str, int, int]:
+    """Get the key of a file in the encoding cache: path, size and modification time."""
+    st = path.stat()
+    return str(path.resolve()), st.st_size, st.st_mtime_ns
+
+
+def _detect_encoding(data: bytes | mmap.mmap, key: tuple[str, int, int] | None) -> str:
+    """Detect the encoding of text bytes from a sample, cached under key unless it is None."""
+    if key is not None and (enc := _encoding_cache.get(key)) is not None:
+        return enc
+
+    sample = data[:ENCODING_SAMPLE_SIZE]
+    if _is_ascii(sample):
+        enc = "ascii"
+    else:
+        # The sample ends at a line break so that no character is cut.
+        if len(data) > ENCODING_SAMPLE_SIZE and (end := sample.rfind(b"\n")) >= 0:
+            sample = sample[:end + 1]
+        enc = _detect_bytes_encoding(sample)
+    if key is not None:
+        _cache_encoding(key, enc)
+    return enc
+
+
+def _decode_text(data: bytes | mmap.mmap, key: tuple[str, int, int] | None) -> str:
+    text, _ = _decode(data, _detect_encoding(data, key), key)
+    return _translate_newlines(text)
+
+
+def _decode(data: bytes | mmap.mmap, enc: str, key: tuple[str, int, int] | None) -> tuple[str, str]:
+    """Decode text bytes, detecting the encoding again from the first line that does not decode.
+
+    Returns:
+        tuple[str, str]: Text and the encoding used.
+
+    Raises:
+        UnicodeDecodeError: If the bytes do not decode with the encoding detected again either.
+
+    """
+    try:
+        return str(data, enc), enc
+    except UnicodeDecodeError as e:
+        start = data.rfind(b"\n", 0, e.start) + 1
+        enc = _detect_bytes_encoding(data[start:start + ENCODING_SAMPLE_SIZE])
+        if key is not None:
+            _cache_encoding(key, enc)
+        return str(data, enc), enc
+
+
+def _cache_encoding(key: tuple[str, int, int], enc: str) -> None:
+    _encoding_cache.pop(key, None)
+    if len(_encoding_cache) >= ENCODING_CACHE_SIZE:
+        del _encoding_cache[next(iter(_encoding_cache))]
+    _encoding_cache[key] = enc
+
+
+def _is_ascii(sample: bytes) -> bool:
+    return sample.isascii() and not any(escape in sample for escape in _ESCAPES)
+
+
+def _detect_bytes_encoding(sample: bytes) -> str:
+    # Same steps as CharDecEncoding.detect_text_file_encoding, on bytes instead of a file.
+    ret = detect(sample)["encoding"]
+    enc = ret.replace("-", "_").lower() if ret is not None else ""
+    if enc not in CharDecEncoding.USUAL_ENCs:
+        detector = UniversalDetector()
+        for line in io.BytesIO(sample):
+            detector.feed(line)
+            if detector.done:
+                break
+        detector.close()
+        ret = detector.result["encoding"]
+        enc = ret.replace("-", "_").lower() if ret else ""
+    if enc == "shift_jis":
+        enc = "cp932"
+    return enc
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from collections.abc import Sequence
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Generic, TypeVar
 
+import numpy as np
 import pandas as pd
 from rdetoolkit.models.rde2types import MetaType, RdeOutputResourcePath, RepeatedMetaType
 from rdetoolkit.rde2util import Meta
@@ -14,6 +17,94 @@ T = TypeVar("T")
 ExtendMetaType = MetaType | MeasurementConditions
 
 
+@dataclass(kw_only=True)
+class SpectrumSet:
+    """Spectra of one region on a common energy axis, as passed from the reader to the writer and the plotter.
+
+    All values are in one float64 buffer. energy, cps and counts are views of it,
+    and frame() wraps it as a DataFrame without copying.
+
+    Attributes:
+        name (str): Region name, e.g. "C1s".
+        values (np.ndarray): Energy, cps of each spectrum and counts of each spectrum (points x (1 + 2 * spectra)).
+        columns (list[str]): Column names of values.
+        file (Path): CSV file.
+        lines (list[str] | None): Energy and cps of each point as they are in the input text.
+
+    """
+
+    name: str
+    values: np.ndarray
+    columns: list[str]
+    file: Path
+    lines: list[str] | None = None
+
+    @property
+    def number_of_spectra(self) -> int:
+        """Number of spectra."""
+        return int(self.values.shape[1] - 1) // 2
+
+    @property
+    def energy(self) -> np.ndarray:
+        """Energy axis (points)."""
+        return self.values[:, 0]
+
+    @property
+    def cps(self) -> np.ndarray:
+        """Intensity in cps (points x spectra)."""
+        return self.values[:, 1:1 + self.number_of_spectra]
+
+    @property
+    def counts(self) -> np.ndarray:
+        """Intensity in counts (points x spectra)."""
+        return self.values[:, 1 + self.number_of_spectra:]
+
+    def frame(self) -> pd.DataFrame:
+        """Wrap all values as a DataFrame without copying.
+
+        Returns:
+            pd.DataFrame: Energy, cps and counts.
+
+        """
+        return pd.DataFrame(self.values, columns=self.columns, copy=False)
+
+    def cps_frame(self) -> pd.DataFrame:
+        """Wrap the energy and cps as a DataFrame without copying.
+
+        Returns:
+            pd.DataFrame: Energy and cps.
+
+        """
+        n = 1 + self.number_of_spectra
+        return pd.DataFrame(self.values[:, :n], columns=self.columns[:n], copy=False)
+
+
+@dataclass(kw_only=True)
+class ProfileCube(SpectrumSet):
+    """Spectra of one region at each step of a depth or angle profile.
+
+    The counts are saved in their own CSV file.
+
+    Attributes:
+        z (np.ndarray): Sputter time or angle of each spectrum.
+        counts_file (Path): CSV file of the counts.
+
+    """
+
+    z: np.ndarray
+    counts_file: Path
+
+    def counts_frame(self) -> pd.DataFrame:
+        """Make a DataFrame of the energy and counts (copied, since they are not adjacent).
+
+        Returns:
+            pd.DataFrame: Energy and counts.
+
+        """
+        n = 1 + self.number_of_spectra
+        return pd.DataFrame(np.column_stack((self.energy, self.counts)), columns=self.columns[:1] + self.columns[n:])
+
+
 class IInputFileParser(ABC):
     """Abstract base class (interface) for input file parsers.
 
@@ -34,7 +125,7 @@ class IInputFileParser(ABC):
     def read(
         self,
         resource_paths: RdeOutputResourcePath,
-    ) -> tuple[MetaType, pd.DataFrame, list[dict], list[dict] | None]:
+    ) -> tuple[MetaType, pd.DataFrame, list[dict], Sequence[SpectrumSet] | None]:
         """Read."""
         raise NotImplementedError
 
@@ -61,7 +152,7 @@ class IStructuredDataProcessor(ABC):
         meta: MetaType,
         data: pd.DataFrame,
         data_blocks: list | None,
-        data_atoms: list | None,
+        data_atoms: Sequence[SpectrumSet] | None,
     ) -> None:
         """Save file."""
         raise NotImplementedError
@@ -120,7 +211,7 @@ class IGraphPlotter(Generic[T], ABC):
         meta: MetaType,
         data: pd.DataFrame,
         data_blocks: list[dict],
-        data_atoms: list[dict] | None,
+        data_atoms: Sequence[SpectrumSet] | None,
         config: dict,
     ) -> None:
         """Plot main."""
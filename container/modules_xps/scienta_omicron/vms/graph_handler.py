@@ -1,13 +1,20 @@
 from __future__ import annotations
 
 import os.path
+from collections.abc import Sequence
+from types import TracebackType
+from typing import Self
 
+import numpy as np
 import pandas as pd
 from matplotlib import pyplot as plt
+from matplotlib.axes import Axes
+from matplotlib.figure import Figure
 from rdetoolkit.exceptions import StructuredError
 from rdetoolkit.models.rde2types import MetaType, RdeOutputResourcePath
 
 from modules_xps.graph_handler import GraphPlotter as XpsGraphPlotter
+from modules_xps.interfaces import SpectrumSet
 
 
 class GraphPlotter(XpsGraphPlotter):
@@ -30,7 +37,7 @@ class GraphPlotter(XpsGraphPlotter):
         _meta: MetaType,
         data: pd.DataFrame,
         data_blocks: list[dict],
-        _data_atoms: list[dict] | None,
+        _data_atoms: Sequence[SpectrumSet] | None,
         config: dict,
     ) -> None:
         """Visualization from VMS files.
@@ -40,7 +47,7 @@ class GraphPlotter(XpsGraphPlotter):
             _meta (MetaType): unused.
             data (pd.DataFrame): All measurement data.
             data_blocks (list[dict]): Block-by-Block additional data.
-            _data_atoms (list[dict] | None): unused.
+            _data_atoms (Sequence[SpectrumSet] | None): unused.
             config (dict): Configuration details.
 
         """
@@ -54,6 +61,77 @@ class GraphPlotter(XpsGraphPlotter):
         if make_other_images:
             self._plot_image(data, resource_paths, file_base_name, opt_org, is_main_image=False)
 
+    def open_stream(self, resource_paths: RdeOutputResourcePath, data_blocks: list[dict], n_rows: int, config: dict) -> VmsPlotStream:
+        """Start plotting a VMS file one block at a time.
+
+        Args:
+            resource_paths (RdeOutputResourcePath): List of RDE output paths.
+            data_blocks (list[dict]): Block-by-Block additional data (ordinate values are not needed).
+            n_rows (int): Number of rows of the longest block.
+            config (dict): Configuration details.
+
+        Returns:
+            VmsPlotStream: Plotter to which the blocks are passed in file order.
+
+        """
+        plot_options, make_other_images = self._read_plot_options(resource_paths, data_blocks, config)
+        file_base_name, ____ = os.path.splitext(os.path.basename(resource_paths.struct.joinpath(f"{resource_paths.rawfiles[0].stem}.csv")))
+        return VmsPlotStream(
+            self,
+            resource_paths,
+            file_base_name=file_base_name,
+            plot_options=plot_options,
+            make_other_images=make_other_images,
+            n_rows=n_rows,
+        )
+
+    def plot_block(self, ax: Axes, df: pd.DataFrame, plot_options: dict) -> None:
+        """Plot the XY column pair of one block on the main image.
+
+        Args:
+            ax (Axes): Axes object of the main image.
+            df (pd.DataFrame): XY column pair of the block.
+            plot_options (dict): Information necessary for graph image.
+
+        """
+        self._add_graph_lines(ax, df, plot_options)
+
+    def create_main_image(self, plot_options: dict) -> tuple[Figure, Axes]:
+        """Create the empty main image.
+
+        Args:
+            plot_options (dict): Information necessary for graph image.
+
+        Returns:
+            tuple[Figure, Axes]: Figure and axes object.
+
+        """
+        return self._create_graph_img(plot_options, plot_options["title"])
+
+    def save_main_image(self, fig: Figure, ax: Axes, plot_options: dict, png_file_path: str) -> None:
+        """Finish and save the main image.
+
+        Args:
+            fig (Figure): Figure object.
+            ax (Axes): Axes object.
+            plot_options (dict): Information necessary for graph image.
+            png_file_path (str): Output image file path.
+
+        """
+        self._save_graph_img(fig, ax, plot_options, len(plot_options["legend"]) * len(plot_options["dimension"]), png_file_path)
+
+    def write_other_image(self, df: pd.DataFrame, plot_options: dict, graph_title: str, png_file_path: str) -> None:
+        """Write the image of one block.
+
+        Args:
+            df (pd.DataFrame): XY column pair of the block.
+            plot_options (dict): Information necessary for graph image.
+            graph_title (str): Graph title.
+            png_file_path (str): Output image file path.
+
+        """
+        self._write_graph_img_file(df, plot_options, graph_title, png_file_path, is_parent=False)
+
     def _read_plot_options(self, resource_paths: RdeOutputResourcePath, data_blocks: list[dict], config: dict) -> tuple[dict, bool]:
         """Obtain the information necessary for graph image drawing from the block data.
 
@@ -146,26 +224,43 @@ class GraphPlotter(XpsGraphPlotter):
             png_file_path (Path): Output image file path.
             is_parent (bool): True(main image) / False(other image).
 
+        """
+        fig, ax = self._create_graph_img(plot_options, graph_title_org)
+        self._add_graph_lines(ax, df, plot_options)
+        self._save_graph_img(fig, ax, plot_options, len(df.columns), png_file_path)
+
+    def _create_graph_img(self, plot_options: dict, graph_title_org: str) -> tuple[Figure, Axes]:
+        """Create an empty graph image.
+
+        Args:
+            plot_options (dict): Information necessary for graph image.
+            graph_title_org (str): Graph title.
+
+        Returns:
+            tuple[Figure, Axes]: Figure and axes object.
+
         """
         # Titles should be abbreviated to no more than 35 characters.
         graph_title_short = graph_title_org[:self.MAX_TITLE_LENGTH] + "..." \
             if len(graph_title_org) > self.MAX_TITLE_LENGTH \
             else graph_title_org
 
-        if "show_legend" in plot_options:
-            show_legend = plot_options["show_legend"]
-        elif len(df.columns) <= self.COLUMNS_CPS_DATA:
-            # In the case of .vms, two columns of XY represent one series.
-            # If two columns, there is only one series, so the legend is not displayed.
-            show_legend = False
-        else:
-            show_legend = True
-
         fig = plt.figure(figsize=(6.4, 4.8))
         ax = fig.add_subplot(1, 1, 1)
         fig.subplots_adjust(left=0.17, bottom=0.155, right=0.95, top=0.9, wspace=None, hspace=None)
 
         ax = self._set_ax_option(ax, plot_options, graph_title_short, is_counts=False)
+        return fig, ax
+
+    def _add_graph_lines(self, ax: Axes, df: pd.DataFrame, plot_options: dict) -> None:
+        """Plot the XY column pairs of the data.
+
+        Args:
+            ax (Axes): Axes object.
+            df (pd.DataFrame): Measurement data (an XY column pair per series).
+            plot_options (dict): Information necessary for graph image.
+
+        """
         x_factor = plot_options.get("scale_factor_x", 1.0)
         y_factor = plot_options.get("scale_factor_y", 1.0)
 
@@ -176,6 +271,27 @@ class GraphPlotter(XpsGraphPlotter):
                 lw=1,
                 label=df.columns[i_legend + 1],
             )
+
+    def _save_graph_img(self, fig: Figure, ax: Axes, plot_options: dict, number_of_columns: int, png_file_path: str) -> None:
+        """Finish and save a graph image.
+
+        Args:
+            fig (Figure): Figure object.
+            ax (Axes): Axes object.
+            plot_options (dict): Information necessary for graph image.
+            number_of_columns (int): Number of plotted columns (an XY pair per series).
+            png_file_path (str): Output image file path.
+
+        """
+        if "show_legend" in plot_options:
+            show_legend = plot_options["show_legend"]
+        elif number_of_columns <= self.COLUMNS_CPS_DATA:
+            # In the case of .vms, two columns of XY represent one series.
+            # If two columns, there is only one series, so the legend is not displayed.
+            show_legend = False
+        else:
+            show_legend = True
+
         if show_legend:
             ax.legend()
 
@@ -190,3 +306,77 @@ class GraphPlotter(XpsGraphPlotter):
 
         fig.savefig(png_file_path)
         plt.close(fig)
+
+
+class VmsPlotStream:
+    """Plots a VMS file one block at a time.
+
+    Each block is added to the main image and, if there are several blocks, written as its own image
+    as soon as it arrives. The main image is saved on close. The images are the same as GraphPlotter.plot_main.
+
+    Example:
+        with plotter.open_stream(resource_paths, headers, n_rows, config) as plot_stream:
+            for data_block in vamas.iter_blocks():
+                plot_stream.plot_block(reader.block_xy(data_block))
+
+    """
+
+    def __init__(
+        self,
+        plotter: GraphPlotter,
+        resource_paths: RdeOutputResourcePath,
+        *,
+        file_base_name: str,
+        plot_options: dict,
+        make_other_images: bool,
+        n_rows: int,
+    ):
+        self.plotter = plotter
+        self.resource_paths = resource_paths
+        self.file_base_name = file_base_name
+        self.plot_options = plot_options
+        self.make_other_images = make_other_images
+        self.n_rows = n_rows
+        self.number_of_plotted_blocks = 0
+        self.fig, self.ax = plotter.create_main_image(plot_options)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None, exc: BaseException | None, tb: TracebackType | None) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            plt.close(self.fig)
+
+    def plot_block(self, xy: np.ndarray) -> None:
+        """Plot one block.
+
+        Args:
+            xy (np.ndarray): XY values of the block (rows x 2).
+
+        Raises:
+            StructuredError: Error (more blocks than legends).
+
+        """
+        if self.number_of_plotted_blocks >= len(self.plot_options["legend"]):
+            err_msg = "ERROR in graph_handler: csv columns are invalid"
+            raise StructuredError(err_msg)
+        legend = self.plot_options["legend"][self.number_of_plotted_blocks]
+        self.number_of_plotted_blocks += 1
+
+        # Padded like the columns of the combined data frame.
+        padded = np.full((self.n_rows, 2), np.nan)
+        padded[:len(xy)] = xy
+        df_single = pd.DataFrame(padded, columns=[f"{legend}_0", legend])
+
+        self.plotter.plot_block(self.ax, df_single, self.plot_options)
+        if self.make_other_images:
+            graph_title_other_image = f'{self.plot_options["title"]}_{legend}'
+            file_path_other_image = os.path.join(self.resource_paths.other_image, f"{self.file_base_name}_{legend}.png")
+            self.plotter.write_other_image(df_single, self.plot_options, graph_title_other_image, file_path_other_image)
+
+    def close(self) -> None:
+        """Save the main image."""
+        file_path_main_image = os.path.join(self.resource_paths.main_image, f"{self.file_base_name}.png")
+        self.plotter.save_main_image(self.fig, self.ax, self.plot_options, file_path_main_image)
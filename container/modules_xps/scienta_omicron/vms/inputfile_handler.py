@@ -1,15 +1,20 @@
 from __future__ import annotations
 
+import contextlib
 import re
-from io import TextIOWrapper
+from collections.abc import Iterator, Mapping, MutableMapping
+from dataclasses import dataclass
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Self
 
 import numpy as np
 import pandas as pd
 from rdetoolkit.exceptions import StructuredError
 from rdetoolkit.models.rde2types import MetaType, RdeOutputResourcePath
-from rdetoolkit.rde2util import CharDecEncoding
 
 from modules_xps.inputfile_handler import FileReader as XpsFileReader
+from modules_xps.inputfile_handler import FrameBuilder, LineReader, abscissa_values
 
 
 class FileReader(XpsFileReader):
@@ -20,12 +25,19 @@ class FileReader(XpsFileReader):
 
     """
 
+    OUTLIER_VALUE = 1e37
+    TRAILING_WHITESPACE_PATTERN = re.compile(r"[^\S\n]+$", re.MULTILINE)
+    # Lines of one number each, without blank lines or whitespace inside a line.
+    PLAIN_VALUES_PATTERN = re.compile(r"(?:[^\s]+\n)+")
+
     def __init__(self, config: dict):
         super().__init__(config)
         self.meta: MetaType = {}
         self.rawfile_name: str = ""
+        self._header_programs: dict[str | None, list[HeaderInstruction]] = {}
+        self._strings: dict[str, str] = {}
 
-    def read(self, resource_paths: RdeOutputResourcePath) -> tuple[MetaType, pd.DataFrame, list[dict], None]:
+    def read(self, resource_paths: RdeOutputResourcePath) -> tuple[MetaType, pd.DataFrame, list, None]:
         """Read the structured file and returns separated data and metadata.
 
         Args:
@@ -34,7 +46,7 @@ class FileReader(XpsFileReader):
         Returns:
             dict[str, ExtendMetaType]: Meta data.
             pd.DataFrame: All measurement data.
-            list[dict]: Block-by-Block additional data.
+            list[VamasBlock]: Block-by-Block additional data.
             None: (Not used in vms files.)
 
         Raises:
@@ -42,53 +54,123 @@ class FileReader(XpsFileReader):
 
         """
         self.rawfile_name = resource_paths.rawfiles[0].stem
-        enc = CharDecEncoding.detect_text_file_encoding(resource_paths.rawfiles[0])
-        data = pd.DataFrame()
-        with open(resource_paths.rawfiles[0], encoding=enc) as f:
+        with LineReader.open(resource_paths.rawfiles[0]) as f:
 
             self._get_experiment_info(f)
             data_blocks = self._get_block_info(f)
 
-            # Get nemiric columns
-            x_label = ""
-            y_label = ""
-            if len(data_blocks) > 0:
-                # Read from the first block (RDE1.0 compliant)
-                x_label = data_blocks[0].get("abscissa_label", [""]).strip() + \
-                    "(" + data_blocks[0].get("abscissa_units", [""]).strip() + ")"
-                y_label = ",".join(data_blocks[0].get("corresponding_variable_labels", [""])).strip() + \
-                    "(" + ",".join(data_blocks[0].get("corresponding_variable_units", [""])).strip() + ")"
-
-            # Read numeric values
-            for _, data_block in enumerate(data_blocks):
-                abscissa_start = float(data_block["abscissa_start"])
-                abscissa_increment = float(data_block["abscissa_increment"])
-                decimal_point = self._count_decimal_places(abscissa_increment)
-                data_y = []
-                for data_ar in data_block.get("ordinate_values", []):
-                    data_y += data_ar
-                data_x = [round(float(abscissa_start + n * abscissa_increment), decimal_point) for n in range(len(data_y))]
-                df = pd.DataFrame(np.vstack((data_x, data_y)).T, columns=[x_label, y_label]).astype('float')
-                data = pd.concat([data, df], ignore_index=True, axis=1)
+        # Read numeric values
+        # Each block is an XY column pair; the buffer is sized by the longest block.
+        lengths = [self.count_block_rows(data_block) for data_block in data_blocks]
+        builder = FrameBuilder(max(lengths, default=0), 2 * len(data_blocks))
+        for i, data_block in enumerate(data_blocks):
+            builder.put(self.block_xy(data_block), column=2 * i)
+        data = builder.to_frame()
 
         return self.meta, data, data_blocks, None
 
-    def _get_experiment_info(self, f: TextIOWrapper) -> None:
+    def block_xy(self, data_block: VamasBlock) -> np.ndarray:
+        """Obtain the XY values of a block.
+
+        The ordinate values of all corresponding variables are joined in one Y column.
+
+        Args:
+            data_block (VamasBlock): Block data with ordinate values.
+
+        Returns:
+            np.ndarray: XY values (rows x 2).
+
+        """
+        ordinate_values = data_block.get("ordinate_values", [])
+        data_y = np.concatenate(ordinate_values) if ordinate_values else np.empty(0)
+        data_x = abscissa_values(
+            float(data_block["abscissa_start"]),
+            float(data_block["abscissa_increment"]),
+            np.arange(len(data_y)),
+        )
+        return np.column_stack((data_x, data_y))
+
+    def count_block_rows(self, data_block: VamasBlock) -> int:
+        """Count the rows of XY values of a block from its header.
+
+        Args:
+            data_block (VamasBlock): Block data (ordinate values are not needed).
+
+        Returns:
+            int: Number of rows.
+
+        """
+        return self._count_ordinate_lines(data_block["number_of_ordinate_values"], data_block["number_of_corresponding_variables"])
+
+    def index(self, rawfile: Path) -> VamasFile:
+        """Index the blocks of a VAMAS file without decoding the ordinate values.
+
+        The file is loaded once and scanned. For each block, the byte offset of the block, the header field values
+        and the byte offset of the ordinate values are recorded. The ordinate values are decoded only
+        when a block is requested from the returned VamasFile.
+
+        Args:
+            rawfile (Path): Measurement file.
+
+        Returns:
+            VamasFile: Indexed measurement file. It must be closed by the caller.
+
+        Raises:
+            StructuredError: If the file is formatted incorrectly.
+
+        """
+        self.rawfile_name = rawfile.stem
+        with contextlib.ExitStack() as stack:
+            f = stack.enter_context(LineReader.open(rawfile))
+            self._get_experiment_info(f)
+            block_index = []
+            for _ in range(self.meta["number_of_blocks"] if isinstance(self.meta["number_of_blocks"], int) else 0):
+                offset = f.tell()
+                header = self._get_block_header(f)
+                ordinate_offset = f.tell()
+                self._skip_ordinate_values(f, header)
+                block_index.append(VamasBlockIndex(offset, ordinate_offset, header))
+            # The file stays loaded until the VamasFile is closed.
+            return VamasFile(self, f, self.meta, block_index, stack.pop_all())
+
+    def read_ordinate_values(self, f: LineReader, block: VamasBlock) -> VamasBlock:
+        """Obtain the ordinate values of the block.
+
+        Args:
+            f (LineReader): Lines of the measurement file, positioned at the ordinate values.
+            block (VamasBlock): Block data without ordinate values.
+
+        Returns:
+            VamasBlock: Block data after item addition.
+
+        """
+        # 76 ordinate_values
+        block["ordinate_values"], block["ordinate_text"] = self._read_ordinate_values(
+            f,
+            block["number_of_ordinate_values"],
+            block["number_of_corresponding_variables"],
+        )
+
+        return block
+
+    def _get_experiment_info(self, f: LineReader) -> None:
         """Obtain metadata.
 
         Args:
-            f (TextIOWrapper): Buffered text of the measurement file interface.
+            f (LineReader): Lines of the measurement file.
 
         """
         self._get_experiment_info_1(f)
         self._get_experiment_info_2(f)
         self._get_experiment_info_3(f)
+        self._header_programs = {None: compile_block_header(self.meta, None)}
+        self._strings = {}
 
-    def _get_experiment_info_1(self, f: TextIOWrapper) -> None:
+    def _get_experiment_info_1(self, f: LineReader) -> None:
         """Obtain metadata part 1.
 
         Args:
-            f (TextIOWrapper): Buffered text of the measurement file interface.
+            f (LineReader): Lines of the measurement file.
 
         """
         # Experiment
@@ -143,11 +225,11 @@ class FileReader(XpsFileReader):
         # 14 number_of_experimental_variables
         self.meta["number_of_experimental_variables"] = int(self._read_line(f))
 
-    def _get_experiment_info_2(self, f: TextIOWrapper) -> None:
+    def _get_experiment_info_2(self, f: LineReader) -> None:
         """Obtain metadata part 2.
 
         Args:
-            f (TextIOWrapper): Buffered text of the measurement file interface.
+            f (LineReader): Lines of the measurement file.
 
         """
         # 15 experimental_variable_labels
@@ -183,11 +265,11 @@ class FileReader(XpsFileReader):
         # 19 number_of_manually_entered_items_in_block
         self.meta["number_of_manually_entered_items_in_block"] = int(self._read_line(f))
 
-    def _get_experiment_info_3(self, f: TextIOWrapper) -> None:
+    def _get_experiment_info_3(self, f: LineReader) -> None:
         """Obtain metadata part 3.
 
         Args:
-            f (TextIOWrapper): Buffered text of the measurement file interface.
+            f (LineReader): Lines of the measurement file.
 
         """
         # 20 prefix_numbers_of_manually_entered_items
@@ -218,336 +300,192 @@ class FileReader(XpsFileReader):
         # 24 number_of_blocks
         self.meta["number_of_blocks"] = int(self._read_line(f))
 
-    def _get_block_info(self, f: TextIOWrapper) -> list[dict]:
+    def _get_block_info(self, f: LineReader) -> list[VamasBlock]:
         """Obtain data for each block from the measurement file.
 
         Args:
-            f (TextIOWrapper): Buffered text of the measurement file interface.
+            f (LineReader): Lines of the measurement file.
 
         Returns:
-            list[dict]: Block-by-Block additional data.
+            list[VamasBlock]: Block-by-Block additional data.
 
         """
         data_blocks = []
         for _ in range(self.meta["number_of_blocks"] if isinstance(self.meta["number_of_blocks"], int) else 0):
-            data_block: dict = {}
-            data_block = self._get_block_info_01_16(f, data_block)
-            data_block = self._get_block_info_17_46(f, data_block)
-            data_block = self._get_block_info_47_57(f, data_block)
-            data_block = self._get_block_info_58_71(f, data_block)
-            data_block = self._get_block_info_72_76(f, data_block)
+            data_block = self._get_block_header(f)
+            data_block = self.read_ordinate_values(f, data_block)
             data_blocks.append(data_block)
 
         return data_blocks
 
-    def _get_block_info_01_16(self, f: TextIOWrapper, block: dict) -> dict:
-        """Obtain additional information in the block.
+    def _get_block_header(self, f: LineReader) -> VamasBlock:
+        """Obtain the items of a block that precede the ordinate values.
+
+        The items are read by running the programs compiled from VAMAS_BLOCK_HEADER_FIELDS.
+        The items up to the technique depend only on the experiment information;
+        the remaining items also depend on the technique of the block.
 
         Args:
-            f (TextIOWrapper): Buffered text of the measurement file interface.
-            block (dict): Block data before item addition.
+            f (LineReader): Lines of the measurement file.
 
         Returns:
-            dict: Block data after item addition.
+            VamasBlock: Block data without ordinate values.
 
         """
-        # 1 block_identifier
-        block["block_identifier"] = self._read_line(f)
-        # 2 sample_identifier
-        block["sample_identifier"] = self._read_line(f)
-        # 3 year_in_full
-        block["year_in_full"] = self._read_line(f)
-        # 4 month
-        block["month"] = self._read_line(f)
-        # 5 day_of_month
-        block["day_of_month"] = self._read_line(f)
-        # 6 hours
-        block["hours"] = self._read_line(f)
-        # 7 minutes
-        block["minutes"] = self._read_line(f)
-        # 8 seconds
-        block["seconds"] = self._read_line(f)
-        # 9 number_of_hours_in_advance_of_greenwich_mean_time
-        block["number_of_hours_in_advance_of_greenwich_mean_time"] = int(self._read_line(f))
-        # 10 number_of_lines_in_block_comment
-        block["number_of_lines_in_block_comment"] = int(self._read_line(f))
-        # 11 block_comment
-        block_comments = []
-        for _ in range(block["number_of_lines_in_block_comment"]):
-            block_comments.append(self._read_line(f))
-        if len(block_comments) > 0:
-            block["block_comment"] = "\n".join(block_comments)
-
-        # 12 technique
-        block["technique"] = self._read_line(f)
-
-        if (isinstance(self.meta["experiment_mode"], str)) and (self.meta["experiment_mode"].upper() in ["MAP", "MAPDP"]):
-            # 13 x_coordinate
-            block["x_coordinate"] = self._read_line(f)
-            # 14 y_coordinate
-            block["y_coordinate"] = self._read_line(f)
-
-        # 15 values_of_experimental_variables
-        block["values_of_experimental_variables"] = []
-        for _ in range(self.meta["number_of_experimental_variables"] if isinstance(self.meta["number_of_experimental_variables"], int) else 0):
-            block["values_of_experimental_variables"].append(self._read_line(f))
-
-        # 16 analysis_source_label
-        block["analysis_source_label"] = self._read_line(f)
+        data_block = VamasBlock()
+        self._run_header_program(f, data_block, self._header_programs[None])
+        technique = data_block["technique"].upper()
+        program = self._header_programs.get(technique)
+        if program is None:
+            program = compile_block_header(self.meta, technique)
+            self._header_programs[technique] = program
+        self._run_header_program(f, data_block, program)
+        return data_block
+
+    def _run_header_program(self, f: LineReader, block: VamasBlock, program: list[HeaderInstruction]) -> None:
+        """Read block items as instructed by a compiled header program.
+
+        Categorical values are shared between blocks through a string pool,
+        so a file with many blocks holds one copy of each label, unit, technique, etc.
 
-        return block
+        Args:
+            f (LineReader): Lines of the measurement file.
+            block (VamasBlock): Block data. The items read are added to it.
+            program (list[HeaderInstruction]): Compiled header program.
 
-    def _get_block_info_17_46(self, f: TextIOWrapper, block: dict) -> dict:
-        """Obtain additional information in the block.
+        """
+        read_lines = self._read_lines
+        strings = self._strings
+        for kind, names, count, keep_empty, categorical in program:
+            if kind == "int":
+                setattr(block, names[0], int(read_lines(f, 1)[0]))
+                continue
+            if kind == "str":
+                n = 1
+            else:
+                n = getattr(block, count) if isinstance(count, str) else count or 0
+                if n == 0 and not keep_empty:
+                    continue
+            values = read_lines(f, n * len(names))
+            if categorical:
+                values = [strings.setdefault(value, value) for value in values]
+            if kind == "str":
+                for name, value in zip(names, values, strict=True):
+                    setattr(block, name, value)
+            elif kind == "text":
+                setattr(block, names[0], "\n".join(values))
+            else:
+                for j, name in enumerate(names):
+                    setattr(block, name, values[j::len(names)])
+
+    def _skip_ordinate_values(self, f: LineReader, block: VamasBlock) -> None:
+        """Move past the ordinate values of the block without decoding them.
 
         Args:
-            f (TextIOWrapper): Buffered text of the measurement file interface.
-            block (dict): Block data before item addition.
-
-        Returns:
-            dict: Block data after item addition.
+            f (LineReader): Lines of the measurement file, positioned at the ordinate values.
+            block (VamasBlock): Block data without ordinate values.
 
         """
-        # 17,18,19
-        experiment_mode_list = ["MAPDP", "MAPSVDP", "SDP", "SDPSV"]
-        technique_list = ["FABMS",
-                          "FABMS energy spec",
-                          "ISS",
-                          "SIMS",
-                          "SIMS energy spec",
-                          "SNMS",
-                          "SNMS energy spec"]
-        technique_list = [s.upper() for s in technique_list]
-        if ((isinstance(self.meta["experiment_mode"], str)) and (self.meta["experiment_mode"].upper() in experiment_mode_list)
-                or (block["technique"].upper() in technique_list)):
-            # 17 sputtering_ion_or_atomic_number
-            block["sputtering_ion_or_atomic_number"] = self._read_line(f)
-            # 18 number_of_atoms_in_sputtering_ion_or_atom_particle
-            block["number_of_atoms_in_sputtering_ion_or_atom_particle"] = self._read_line(f)
-            # 19 sputtering_ion_of_atom_charge_sign_and_number
-            block["sputtering_ion_of_atom_charge_sign_and_number"] = self._read_line(f)
-
-        # 20 analysis_source_characteristic_energy
-        block["analysis_source_characteristic_energy"] = self._read_line(f)
-        # 21 analysis_source_strength
-        block["analysis_source_strength"] = self._read_line(f)
-        # 22 analysis_source_beam_width_x
-        block["analysis_source_beam_width_x"] = self._read_line(f)
-        # 23 analysis_source_beam_width_y
-        block["analysis_source_beam_width_y"] = self._read_line(f)
-
-        modes = ["MAP", "MAPDP", "MAPSV", "MAPSVDP", "SEM"]
-        if (isinstance(self.meta["experiment_mode"], str)) and (self.meta["experiment_mode"].upper() in modes):
-            # 24 field_of_view_x
-            block["field_of_view_x"] = self._read_line(f)
-            # 25 field_of_view_y
-            block["field_of_view_y"] = self._read_line(f)
-
-        modes = ["MAPSV", "MAPSVDP", "SEM"]
-        if (isinstance(self.meta["experiment_mode"], str)) and (self.meta["experiment_mode"].upper() in modes):
-            # 26 first_linescan_start_x_coordinate
-            block["first_linescan_start_x_coordinate"] = self._read_line(f)
-            # 27 first_linescan_start_y_coordinate
-            block["first_linescan_start_y_coordinate"] = self._read_line(f)
-            # 28 first_linescan_finish_x_coordinate
-            block["first_linescan_finish_x_coordinate"] = self._read_line(f)
-            # 29 first_linescan_finish_y_coordinate
-            block["first_linescan_finish_y_coordinate"] = self._read_line(f)
-            # 30 last_linescan_finish_x_coordinate
-            block["last_linescan_finish_x_coordinate"] = self._read_line(f)
-            # 31 last_linescan_finish_y_coordinate
-            block["last_linescan_finish_y_coordinate"] = self._read_line(f)
-
-        # 32 analysis_source_polar_angle_of_incidence
-        block["analysis_source_polar_angle_of_incidence"] = self._read_line(f)
-        # 33 analysis_source_azimuth
-        block["analysis_source_azimuth"] = self._read_line(f)
-        # 34 analyser_mode
-        block["analyser_mode"] = self._read_line(f)
-        # 35 analyser_pass_energy_or_retard_ratio_or_mass_resolution
-        block["analyser_pass_energy_or_retard_ratio_or_mass_resolution"] = self._read_line(f)
-        # 36 differential_width
-        if (block["technique"].upper() == "AES DIFF"):
-            block["differential_width"] = self._read_line(f)
-        # 37 magnification_of_analyser_transfer_lens
-        block["magnification_of_analyser_transfer_lens"] = self._read_line(f)
-        # 38 analyser_work_function_or_acceptance_energy_of_atom_or_ion
-        block["analyser_work_function_or_acceptance_energy_of_atom_or_ion"] = self._read_line(f)
-        # 39 target_bias
-        block["target_bias"] = self._read_line(f)
-        # 40 analysis_width_x
-        block["analysis_width_x"] = self._read_line(f)
-        # 41 analysis_width_y
-        block["analysis_width_y"] = self._read_line(f)
-        # 42 analyser_axis_take_off_polar_angle
-        block["analyser_axis_take_off_polar_angle"] = self._read_line(f)
-        # 43 analyser_axis_take_off_azimuth
-        block["analyser_axis_take_off_azimuth"] = self._read_line(f)
-        # 44 species_label
-        block["species_label"] = self._read_line(f)
-        # 45 transition_or_charge_state_label
-        block["transition_or_charge_state_label"] = self._read_line(f)
-        # 46 charge_of_detected_particle
-        block["charge_of_detected_particle"] = self._read_line(f)
-
-        return block
+        count = self._count_ordinate_lines(block["number_of_ordinate_values"], block["number_of_corresponding_variables"])
+        try:
+            f.skip_lines(count)
+        except EOFError:
+            err_msg = f"end of file: {self.rawfile_name}"
+            raise StructuredError(err_msg) from None
 
-    def _get_block_info_47_57(self, f: TextIOWrapper, block: dict) -> dict:
-        """Obtain additional information in the block.
+    def _count_ordinate_lines(self, number_of_ordinate_values: int, number_of_variables: int) -> int:
+        """Count the lines of ordinate values that are read from the block.
 
         Args:
-            f (TextIOWrapper): Buffered text of the measurement file interface.
-            block (dict): Block data before item addition.
+            number_of_ordinate_values (int): Number of ordinate values in the block.
+            number_of_variables (int): Number of corresponding variables.
 
         Returns:
-            dict: Block data after item addition.
+            int: Number of lines (only complete sets of corresponding variables are read).
 
         """
-        if (isinstance(self.meta["scan_mode"], str)) and (self.meta["scan_mode"].upper() == "REGULAR"):
-            # 47 abscissa_label
-            block["abscissa_label"] = self._read_line(f)
-            # 48 abscissa_units
-            block["abscissa_units"] = self._read_line(f)
-            # 49 abscissa_start
-            block["abscissa_start"] = self._read_line(f)
-            # 50 abscissa_increment
-            block["abscissa_increment"] = self._read_line(f)
-
-        # 51 number_of_corresponding_variables
-        block["number_of_corresponding_variables"] = int(self._read_line(f))
-
-        corresponding_variable_labels = []
-        corresponding_variable_units = []
-        for _ in range(block["number_of_corresponding_variables"]):
-            corresponding_variable_labels.append(self._read_line(f))
-            corresponding_variable_units.append(self._read_line(f))
-        # 52 corresponding_variable_labels
-        if corresponding_variable_labels:
-            block["corresponding_variable_labels"] = corresponding_variable_labels
-        # 53 corresponding_variable_units
-        if corresponding_variable_units:
-            block["corresponding_variable_units"] = corresponding_variable_units
-
-        # 54 signal_mode
-        block["signal_mode"] = self._read_line(f)
-        # 55 signal_collection_time
-        block["signal_collection_time"] = self._read_line(f)
-
-        # 56 number_of_scans_to_compile_this_block
-        block["number_of_scans_to_compile_this_block"] = self._read_line(f)
-        # 57 signal_time_correction
-        block["signal_time_correction"] = self._read_line(f)
+        return int(number_of_ordinate_values / number_of_variables) * number_of_variables
 
-        return block
+    def _read_ordinate_values(self, f: LineReader, number_of_ordinate_values: int, number_of_variables: int) -> tuple[list[np.ndarray], list[str]]:
+        """Read all ordinate values of a block at once.
 
-    def _get_block_info_58_71(self, f: TextIOWrapper, block: dict) -> dict:
-        """Obtain additional information in the block.
+        The lines of the block are read as one text, which is converted to float64 in one call
+        and then de-interleaved per corresponding variable.
+        Outliers (1e37) and blank values become NaN.
 
         Args:
-            f (TextIOWrapper): Buffered text of the measurement file interface.
-            block (dict): Block data before item addition.
+            f (LineReader): Lines of the measurement file.
+            number_of_ordinate_values (int): Number of ordinate values in the block.
+            number_of_variables (int): Number of corresponding variables.
 
         Returns:
-            dict: Block data after item addition.
+            list[np.ndarray]: Ordinate values per corresponding variable.
+            list[str]: Ordinate values per corresponding variable as text (one value per line).
 
         """
-        technique_list = ["AES diff", "AES dir", "EDX", "ELS", "UPS", "XPS", "XRF"]
-        experiment_list = ["MAPDP", "MAPSVDP", "SDP", "SDPCV"]
-        technique_list = [s.upper() for s in technique_list]
-        experiment_list = [s.upper() for s in experiment_list]
-        if (block["technique"].upper() in technique_list) and \
-                isinstance(self.meta["experiment_mode"], str) and \
-                (self.meta["experiment_mode"].upper() in experiment_list):
-            # 58 sputtering_source_energy
-            block["sputtering_source_energy"] = self._read_line(f)
-            # 59 sputtering_source_beam_current
-            block["sputtering_source_beam_current"] = self._read_line(f)
-            # 60 sputtering_source_width_x
-            block["sputtering_source_width_x"] = self._read_line(f)
-            # 61 sputtering_source_width_y
-            block["sputtering_source_width_y"] = self._read_line(f)
-            # 62 sputtering_source_polar_angle_of_incidence
-            block["sputtering_source_polar_angle_of_incidence"] = self._read_line(f)
-            # 63 sputtering_source_azimuth
-            block["sputtering_source_azimuth"] = self._read_line(f)
-            # 64 sputtering_mode
-            block["sputtering_mode"] = self._read_line(f)
-
-        # 65 sample_normal_polar_angle_of_tilt
-        block["sample_normal_polar_angle_of_tilt"] = self._read_line(f)
-        # 66 sample_normal_tilt_azimuth
-        block["sample_normal_tilt_azimuth"] = self._read_line(f)
-        # 67 sample_rotation_angle
-        block["sample_rotation_angle"] = self._read_line(f)
-
-        # 68 number_of_additional_numerical_parameters
-        block["number_of_additional_numerical_parameters"] = int(self._read_line(f))
-
-        additional_numerical_parameter_labels = []
-        additional_numerical_parameter_units = []
-        additional_numerical_parameter_values = []
-        for _ in range(block["number_of_additional_numerical_parameters"]):
-            additional_numerical_parameter_labels.append(self._read_line(f))
-            additional_numerical_parameter_units.append(self._read_line(f))
-            additional_numerical_parameter_values.append(self._read_line(f))
-        if block["number_of_additional_numerical_parameters"] > 0:
-            # 69 additional_numerical_parameter_labels
-            block["additional_numerical_parameter_labels"] = additional_numerical_parameter_labels
-            # 70 additional_numerical_parameter_units
-            block["additional_numerical_parameter_units"] = additional_numerical_parameter_units
-            # 71 additional_numerical_parameter_values
-            block["additional_numerical_parameter_values"] = additional_numerical_parameter_values
-
-        return block
-
-    def _get_block_info_72_76(self, f: TextIOWrapper, block: dict) -> dict:
-        """Obtain additional information in the block.
+        count = self._count_ordinate_lines(number_of_ordinate_values, number_of_variables)
+        try:
+            text = f.read_lines(count)
+        except EOFError:
+            err_msg = f"end of file: {self.rawfile_name}"
+            raise StructuredError(err_msg) from None
+        if count == 0:
+            return [np.empty(0) for _ in range(number_of_variables)], ["" for _ in range(number_of_variables)]
+
+        # The same tokens as _read_line: trailing whitespace and NUL characters removed.
+        text = self.TRAILING_WHITESPACE_PATTERN.sub("", text)
+        if "\x00" in text:
+            text = text.replace("\x00", "")
+        if not text.endswith("\n"):
+            text += "\n"
+
+        values, tokens = self._parse_ordinate_text(text, count)
+        variables = list(values.reshape(-1, number_of_variables).T.copy())
+        if tokens is None and number_of_variables == 1:
+            return variables, [text]
+        tokens = tokens or text.split("\n", count)[:count]
+        texts = ["\n".join(tokens[j::number_of_variables]) + "\n" for j in range(number_of_variables)]
+        return variables, texts
+
+    def _parse_ordinate_text(self, text: str, count: int) -> tuple[np.ndarray, list[str] | None]:
+        """Convert the ordinate lines of a block to float64.
 
         Args:
-            f (TextIOWrapper): Buffered text of the measurement file interface.
-            block (dict): Block data before item addition.
+            text (str): Lines of ordinate values, each ending with a line break.
+            count (int): Number of lines.
 
         Returns:
-            dict: Block data after item addition.
+            np.ndarray: Values, with outliers (1e37) and blank values as NaN.
+            list[str] | None: Values as text with outliers blanked, or None if the text needs no change.
 
         """
-        # 72 future_upgrade_block_entries
-        future_upgrade_block_entries = []
-        future_upgrade_block_entries_org = self.meta["number_of_future_upgrade_block_entries"] \
-            if isinstance(self.meta["number_of_future_upgrade_block_entries"], int) \
-            else 0
-        for _ in range(future_upgrade_block_entries_org):
-            future_upgrade_block_entries.append(self._read_line(f))
-        if future_upgrade_block_entries:
-            block["future_upgrade_block_entries"] = future_upgrade_block_entries
-
-        # 73 number_of_ordinate_values
-        block["number_of_ordinate_values"] = int(self._read_line(f))
-
-        variables: list = []
-        block["minimum_ordinate_values"] = []
-        block["maximum_ordinate_values"] = []
-        for _ in range(block["number_of_corresponding_variables"]):
-            # 74 minimum_ordinate_values
-            block["minimum_ordinate_values"].append(self._read_line(f))
-            # 75 maximum_ordinate_values
-            block["maximum_ordinate_values"].append(self._read_line(f))
-            variables.append([])
-
-        for _ in range(int(block["number_of_ordinate_values"] / block["number_of_corresponding_variables"])):
-            for j in range(block["number_of_corresponding_variables"]):
-                variables[j].append(self._read_line(f))
-
-        # 76 ordinate_values
-        block["ordinate_values"] = variables
-
-        return block
-
-    def _read_line(self, f: TextIOWrapper) -> str:
+        values = None
+        if self.PLAIN_VALUES_PATTERN.fullmatch(text):
+            # One number per line: converted without splitting the text.
+            # A text that is not all numbers is read short, and converted below to report the error.
+            values = np.fromstring(text, sep="\n")
+            if len(values) != count:
+                values = None
+        tokens = None
+        if values is None:
+            tokens = text.split("\n", count)[:count]
+            values = np.array([token or "nan" for token in tokens], dtype=np.float64)
+
+        # Only values equal to 1e37 can be outliers, so the regex check is limited to them.
+        candidates = np.flatnonzero(values == self.OUTLIER_VALUE)
+        if len(candidates):
+            tokens = tokens or text.split("\n", count)[:count]
+            for pos in candidates:
+                if self._check_outlier(tokens[pos]) == "":
+                    values[pos] = np.nan
+                    tokens[pos] = ""
+        return values, tokens
+
+    def _read_line(self, f: LineReader) -> str:
         """One line reads.
 
         Args:
-            f (TextIOWrapper): Buffered text of the measurement file interface.
+            f (LineReader): Lines of the measurement file.
 
         Returns:
             str: One line string.
@@ -561,6 +499,27 @@ class FileReader(XpsFileReader):
         ret = ret.rstrip().replace("\x00", "")
         return self._check_outlier(ret)
 
+    def _read_lines(self, f: LineReader, n: int) -> list[str]:
+        """Read several lines, as _read_line does for one line.
+
+        Args:
+            f (LineReader): Lines of the measurement file.
+            n (int): Number of lines.
+
+        Returns:
+            list[str]: Line strings.
+
+        """
+        try:
+            lines = f.read_lines(n).split("\n", n)[:n]
+        except EOFError:
+            err_msg = f"end of file: {self.rawfile_name}"
+            raise StructuredError(err_msg) from None
+
+        values = [line.rstrip().replace("\x00", "") for line in lines]
+        # Only values ending in "37" can be outliers
+        return [self._check_outlier(value) if value.endswith("37") else value for value in values]
+
     def _check_outlier(self, _val: str) -> str:
         """Outlier Check.
 
@@ -577,15 +536,418 @@ class FileReader(XpsFileReader):
             _val = ""
         return _val
 
-    def _count_decimal_places(self, num: float) -> int:
-        """Convert floating point numbers to strings.
+
+@dataclass(frozen=True)
+class VamasBlockIndex:
+    """Position of a block in a VAMAS file.
+
+    Attributes:
+        offset (int): Byte offset of the first line of the block.
+        ordinate_offset (int): Byte offset of the first ordinate value of the block.
+        header (VamasBlock): Block data without ordinate values.
+
+    """
+
+    offset: int
+    ordinate_offset: int
+    header: VamasBlock
+
+    @property
+    def number_of_ordinate_values(self) -> int:
+        """Number of ordinate values in the block."""
+        return int(self.header["number_of_ordinate_values"])
+
+
+class VamasFile:
+    """VAMAS file whose blocks are decoded on demand.
+
+    Created by FileReader.index. Header information is available without decoding any
+    ordinate values, and blocks can be read one at a time in any order.
+
+    Attributes:
+        meta (MetaType): Experiment header information.
+        block_index (list[VamasBlockIndex]): Position and header information of each block.
+
+    Example:
+        with FileReader(config).index(rawfile) as vamas:
+            for data_block in vamas.iter_blocks():
+                ...
+
+    """
+
+    def __init__(self, reader: FileReader, f: LineReader, meta: MetaType, block_index: list[VamasBlockIndex], resources: contextlib.ExitStack):
+        self.meta = meta
+        self.block_index = block_index
+        self._reader = reader
+        self._file = f
+        self._resources = resources
+
+    def __len__(self) -> int:
+        return len(self.block_index)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None, exc: BaseException | None, tb: TracebackType | None) -> None:
+        self.close()
+
+    @property
+    def headers(self) -> list:
+        """Block data (list[VamasBlock]) without ordinate values, enough for metadata and plot options."""
+        return [entry.header for entry in self.block_index]
+
+    def read_block(self, i: int) -> VamasBlock:
+        """Decode one block.
 
         Args:
-            num (float): Floating-point number.
+            i (int): Block number (0-based).
 
         Returns:
-            int: Number of decimal places.
+            VamasBlock: Block data with ordinate values.
 
         """
-        num_str = str(num)
-        return len(num_str.split('.')[1]) if '.' in num_str else 0
+        entry = self.block_index[i]
+        self._file.seek(entry.ordinate_offset)
+        return self._reader.read_ordinate_values(self._file, entry.header.copy())
+
+    def iter_blocks(self) -> Iterator[VamasBlock]:
+        """Decode the blocks one at a time in file order.
+
+        Yields:
+            VamasBlock: Block data with ordinate values.
+
+        """
+        for i in range(len(self.block_index)):
+            yield self.read_block(i)
+
+    def close(self) -> None:
+        """Release the loaded measurement file."""
+        self._resources.close()
+
+
+@dataclass(frozen=True)
+class VamasField:
+    """Item of a VAMAS block header (ISO 14976).
+
+    Attributes:
+        names (tuple[str, ...]): Keys of the item in the block data.
+            Several keys are read interleaved, one line each, per repetition.
+        kind (str): "str" (one line), "int" (one line as integer),
+            "list" (one line per repetition) or "text" (lines joined by newlines).
+        count (str | None): Key giving the number of repetitions of a "list" or "text" item.
+            Looked up in the block data, or in the experiment information if count_in_meta is set.
+        count_in_meta (bool): Whether count is a key of the experiment information.
+        keep_empty (bool): Whether the item is stored when there are no repetitions.
+        experiment_modes (frozenset[str] | None): Experiment modes in which the item is present (None: any).
+        techniques (frozenset[str] | None): Techniques in which the item is present (None: any).
+        scan_modes (frozenset[str] | None): Scan modes in which the item is present (None: any).
+        match_any (bool): Whether the item is present if any condition holds (otherwise all must hold).
+        categorical (bool): Whether the values repeat between blocks (labels, units, etc.) and are shared.
+
+    """
+
+    names: tuple[str, ...]
+    kind: str = "str"
+    count: str | None = None
+    count_in_meta: bool = False
+    keep_empty: bool = False
+    experiment_modes: frozenset[str] | None = None
+    techniques: frozenset[str] | None = None
+    scan_modes: frozenset[str] | None = None
+    match_any: bool = False
+    categorical: bool = True
+
+    def is_present(self, experiment_mode: str | None, technique: str, scan_mode: str | None) -> bool:
+        """Whether the item is present in a block.
+
+        Args:
+            experiment_mode (str | None): Experiment mode in upper case.
+            technique (str): Technique of the block in upper case.
+            scan_mode (str | None): Scan mode in upper case.
+
+        Returns:
+            bool: True if the item is present.
+
+        """
+        conditions = [
+            value in modes
+            for value, modes in (
+                (experiment_mode, self.experiment_modes),
+                (technique, self.techniques),
+                (scan_mode, self.scan_modes),
+            )
+            if modes is not None
+        ]
+        if not conditions:
+            return True
+        return any(conditions) if self.match_any else all(conditions)
+
+
+# (kind, names, number of repetitions or key of the block data, keep_empty, categorical)
+HeaderInstruction = tuple[str, tuple[str, ...], int | str | None, bool, bool]
+
+_MAP_MODES = frozenset({"MAP", "MAPDP"})
+_SPUTTER_ION_MODES = frozenset({"MAPDP", "MAPSVDP", "SDP", "SDPSV"})
+_SPUTTER_ION_TECHNIQUES = frozenset({"FABMS", "FABMS ENERGY SPEC", "ISS", "SIMS", "SIMS ENERGY SPEC", "SNMS", "SNMS ENERGY SPEC"})
+_FIELD_OF_VIEW_MODES = frozenset({"MAP", "MAPDP", "MAPSV", "MAPSVDP", "SEM"})
+_LINESCAN_MODES = frozenset({"MAPSV", "MAPSVDP", "SEM"})
+_SPUTTER_SOURCE_MODES = frozenset({"MAPDP", "MAPSVDP", "SDP", "SDPCV"})
+_SPUTTER_SOURCE_TECHNIQUES = frozenset({"AES DIFF", "AES DIR", "EDX", "ELS", "UPS", "XPS", "XRF"})
+
+VAMAS_BLOCK_HEADER_FIELDS: tuple[VamasField, ...] = (
+    # 1-8
+    VamasField(("block_identifier",), categorical=False),
+    VamasField(("sample_identifier",)),
+    VamasField(("year_in_full",)),
+    VamasField(("month",)),
+    VamasField(("day_of_month",)),
+    VamasField(("hours",)),
+    VamasField(("minutes",)),
+    VamasField(("seconds",)),
+    # 9-11
+    VamasField(("number_of_hours_in_advance_of_greenwich_mean_time",), "int"),
+    VamasField(("number_of_lines_in_block_comment",), "int"),
+    VamasField(("block_comment",), "text", "number_of_lines_in_block_comment", categorical=False),
+    # 12 (the items below may depend on the technique)
+    VamasField(("technique",)),
+    # 13-16
+    VamasField(("x_coordinate",), experiment_modes=_MAP_MODES, categorical=False),
+    VamasField(("y_coordinate",), experiment_modes=_MAP_MODES, categorical=False),
+    VamasField(("values_of_experimental_variables",), "list", "number_of_experimental_variables", count_in_meta=True, keep_empty=True),
+    VamasField(("analysis_source_label",)),
+    # 17-19
+    VamasField(("sputtering_ion_or_atomic_number",),
+               experiment_modes=_SPUTTER_ION_MODES, techniques=_SPUTTER_ION_TECHNIQUES, match_any=True),
+    VamasField(("number_of_atoms_in_sputtering_ion_or_atom_particle",),
+               experiment_modes=_SPUTTER_ION_MODES, techniques=_SPUTTER_ION_TECHNIQUES, match_any=True),
+    VamasField(("sputtering_ion_of_atom_charge_sign_and_number",),
+               experiment_modes=_SPUTTER_ION_MODES, techniques=_SPUTTER_ION_TECHNIQUES, match_any=True),
+    # 20-23
+    VamasField(("analysis_source_characteristic_energy",)),
+    VamasField(("analysis_source_strength",)),
+    VamasField(("analysis_source_beam_width_x",)),
+    VamasField(("analysis_source_beam_width_y",)),
+    # 24-25
+    VamasField(("field_of_view_x",), experiment_modes=_FIELD_OF_VIEW_MODES),
+    VamasField(("field_of_view_y",), experiment_modes=_FIELD_OF_VIEW_MODES),
+    # 26-31
+    VamasField(("first_linescan_start_x_coordinate",), experiment_modes=_LINESCAN_MODES),
+    VamasField(("first_linescan_start_y_coordinate",), experiment_modes=_LINESCAN_MODES),
+    VamasField(("first_linescan_finish_x_coordinate",), experiment_modes=_LINESCAN_MODES),
+    VamasField(("first_linescan_finish_y_coordinate",), experiment_modes=_LINESCAN_MODES),
+    VamasField(("last_linescan_finish_x_coordinate",), experiment_modes=_LINESCAN_MODES),
+    VamasField(("last_linescan_finish_y_coordinate",), experiment_modes=_LINESCAN_MODES),
+    # 32-46
+    VamasField(("analysis_source_polar_angle_of_incidence",)),
+    VamasField(("analysis_source_azimuth",)),
+    VamasField(("analyser_mode",)),
+    VamasField(("analyser_pass_energy_or_retard_ratio_or_mass_resolution",)),
+    VamasField(("differential_width",), techniques=frozenset({"AES DIFF"})),
+    VamasField(("magnification_of_analyser_transfer_lens",)),
+    VamasField(("analyser_work_function_or_acceptance_energy_of_atom_or_ion",)),
+    VamasField(("target_bias",)),
+    VamasField(("analysis_width_x",)),
+    VamasField(("analysis_width_y",)),
+    VamasField(("analyser_axis_take_off_polar_angle",)),
+    VamasField(("analyser_axis_take_off_azimuth",)),
+    VamasField(("species_label",)),
+    VamasField(("transition_or_charge_state_label",)),
+    VamasField(("charge_of_detected_particle",)),
+    # 47-50
+    VamasField(("abscissa_label",), scan_modes=frozenset({"REGULAR"})),
+    VamasField(("abscissa_units",), scan_modes=frozenset({"REGULAR"})),
+    VamasField(("abscissa_start",), scan_modes=frozenset({"REGULAR"})),
+    VamasField(("abscissa_increment",), scan_modes=frozenset({"REGULAR"})),
+    # 51-53
+    VamasField(("number_of_corresponding_variables",), "int"),
+    VamasField(("corresponding_variable_labels", "corresponding_variable_units"), "list", "number_of_corresponding_variables"),
+    # 54-57
+    VamasField(("signal_mode",)),
+    VamasField(("signal_collection_time",)),
+    VamasField(("number_of_scans_to_compile_this_block",)),
+    VamasField(("signal_time_correction",)),
+    # 58-64
+    VamasField(("sputtering_source_energy",),
+               experiment_modes=_SPUTTER_SOURCE_MODES, techniques=_SPUTTER_SOURCE_TECHNIQUES),
+    VamasField(("sputtering_source_beam_current",),
+               experiment_modes=_SPUTTER_SOURCE_MODES, techniques=_SPUTTER_SOURCE_TECHNIQUES),
+    VamasField(("sputtering_source_width_x",),
+               experiment_modes=_SPUTTER_SOURCE_MODES, techniques=_SPUTTER_SOURCE_TECHNIQUES),
+    VamasField(("sputtering_source_width_y",),
+               experiment_modes=_SPUTTER_SOURCE_MODES, techniques=_SPUTTER_SOURCE_TECHNIQUES),
+    VamasField(("sputtering_source_polar_angle_of_incidence",),
+               experiment_modes=_SPUTTER_SOURCE_MODES, techniques=_SPUTTER_SOURCE_TECHNIQUES),
+    VamasField(("sputtering_source_azimuth",),
+               experiment_modes=_SPUTTER_SOURCE_MODES, techniques=_SPUTTER_SOURCE_TECHNIQUES),
+    VamasField(("sputtering_mode",),
+               experiment_modes=_SPUTTER_SOURCE_MODES, techniques=_SPUTTER_SOURCE_TECHNIQUES),
+    # 65-67
+    VamasField(("sample_normal_polar_angle_of_tilt",)),
+    VamasField(("sample_normal_tilt_azimuth",)),
+    VamasField(("sample_rotation_angle",)),
+    # 68-71
+    VamasField(("number_of_additional_numerical_parameters",), "int"),
+    VamasField(
+        ("additional_numerical_parameter_labels", "additional_numerical_parameter_units", "additional_numerical_parameter_values"),
+        "list",
+        "number_of_additional_numerical_parameters",
+    ),
+    # 72
+    VamasField(("future_upgrade_block_entries",), "list", "number_of_future_upgrade_block_entries", count_in_meta=True),
+    # 73-75
+    VamasField(("number_of_ordinate_values",), "int"),
+    VamasField(
+        ("minimum_ordinate_values", "maximum_ordinate_values"),
+        "list",
+        "number_of_corresponding_variables",
+        keep_empty=True,
+        categorical=False,
+    ),
+)
+
+_TECHNIQUE_FIELD_POSITION = next(i for i, field in enumerate(VAMAS_BLOCK_HEADER_FIELDS) if field.names == ("technique",)) + 1
+
+
+def block_header_fields(meta: MetaType, technique: str) -> list[VamasField]:
+    """Select the block header items present in a block of a VAMAS file.
+
+    Args:
+        meta (MetaType): Experiment header information.
+        technique (str): Technique of the block.
+
+    Returns:
+        list[VamasField]: Block header items in file order.
+
+    """
+    return [field for _, field in _select_block_header_fields(meta, technique)]
+
+
+def format_block_header(meta: MetaType, data_block: Mapping) -> list[str]:
+    """Format the items of a block that precede the ordinate values as lines of a VAMAS file.
+
+    The lines follow VAMAS_BLOCK_HEADER_FIELDS, so reading them back gives the same items.
+
+    Args:
+        meta (MetaType): Experiment header information.
+        data_block (Mapping): Block data.
+
+    Returns:
+        list[str]: Lines without line breaks.
+
+    """
+    lines: list[str] = []
+    for field in block_header_fields(meta, data_block["technique"]):
+        if field.names[0] not in data_block:
+            # A list item without repetitions
+            continue
+        if field.kind == "text":
+            lines.extend(data_block[field.names[0]].split("\n"))
+        elif field.kind == "list":
+            columns = [data_block[name] for name in field.names]
+            lines.extend(str(value) for row in zip(*columns, strict=True) for value in row)
+        else:
+            lines.extend(str(data_block[name]) for name in field.names)
+    return lines
+
+
+def compile_block_header(meta: MetaType, technique: str | None) -> list[HeaderInstruction]:
+    """Compile the block header items of a VAMAS file into a header program.
+
+    Conditions on the experiment information and the technique are evaluated here,
+    so reading a block only follows the instructions.
+
+    Args:
+        meta (MetaType): Experiment header information.
+        technique (str | None): Technique of the block.
+            If None, the program reads the items up to the technique.
+            Otherwise, it reads the items after the technique.
+
+    Returns:
+        list[HeaderInstruction]: Header program.
+
+    """
+    program: list[HeaderInstruction] = []
+    for position, field in _select_block_header_fields(meta, technique or ""):
+        if (position < _TECHNIQUE_FIELD_POSITION) != (technique is None):
+            continue
+        count: int | str | None = field.count
+        if field.count_in_meta:
+            value = meta.get(str(field.count))
+            count = value if isinstance(value, int) else 0
+        if field.kind == "str" and program and program[-1][0] == "str" and program[-1][4] == field.categorical:
+            # Consecutive single-line items are read in one instruction
+            program[-1] = ("str", program[-1][1] + field.names, None, False, field.categorical)
+        else:
+            program.append((field.kind, field.names, count, field.keep_empty, field.categorical))
+    return program
+
+
+def _select_block_header_fields(meta: MetaType, technique: str) -> list[tuple[int, VamasField]]:
+    experiment_mode = meta.get("experiment_mode")
+    scan_mode = meta.get("scan_mode")
+    conditions = (
+        experiment_mode.upper() if isinstance(experiment_mode, str) else None,
+        technique.upper(),
+        scan_mode.upper() if isinstance(scan_mode, str) else None,
+    )
+    return [(position, field) for position, field in enumerate(VAMAS_BLOCK_HEADER_FIELDS) if field.is_present(*conditions)]
+
+
+VAMAS_BLOCK_KEYS: tuple[str, ...] = (
+    *(name for field in VAMAS_BLOCK_HEADER_FIELDS for name in field.names),
+    "ordinate_values",
+    "ordinate_text",
+)
+_VAMAS_BLOCK_KEY_SET = frozenset(VAMAS_BLOCK_KEYS)
+_MISSING = object()
+
+
+class VamasBlock(MutableMapping):
+    """Block data of a VAMAS file.
+
+    The items are held in slots instead of a per-block dict, which matters for files with
+    tens of thousands of blocks. Items are also accessible as attributes.
+    As a mapping it behaves like the dict used before: only the items present in the block
+    are keys, in file order (VAMAS_BLOCK_KEYS), and other keys raise KeyError.
+
+    """
+
+    __slots__ = VAMAS_BLOCK_KEYS
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _VAMAS_BLOCK_KEY_SET:
+            value = getattr(self, key, _MISSING)
+            if value is not _MISSING:
+                return value
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in _VAMAS_BLOCK_KEY_SET:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        delattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key in VAMAS_BLOCK_KEYS if getattr(self, key, _MISSING) is not _MISSING)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)!r})"
+
+    def copy(self) -> VamasBlock:
+        """Shallow copy of the block data.
+
+        Returns:
+            VamasBlock: New block data with the same items.
+
+        """
+        block = VamasBlock()
+        for key in self:
+            setattr(block, key, getattr(self, key))
+        return block
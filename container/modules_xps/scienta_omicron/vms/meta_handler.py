@@ -5,8 +5,10 @@ import zoneinfo
 from collections import defaultdict
 from pathlib import Path
 
+import numpy as np
 from rdetoolkit.models.rde2types import MetaType, RepeatedMetaType
 
+from modules_xps.inputfile_handler import abscissa_values
 from modules_xps.meta_handler import MetaParser as XrdMetaParser
 
 
@@ -58,12 +60,12 @@ class MetaParser(XrdMetaParser):
         abscissa_labels = []
         corresponding_variables_labels = []
         for data_block in data_blocks:
-            abscissa_start = float(data_block["abscissa_start"])
-            abscissa_increment = float(data_block["abscissa_increment"])
-            decimal_point = self._count_decimal_places(abscissa_increment)
-            number_of_ordinate_values = float(data_block["number_of_ordinate_values"])
-            abscissa_end = round(float(abscissa_start + abscissa_increment * (number_of_ordinate_values - 1)), decimal_point)
-            abscissa_ends.append(abscissa_end)
+            abscissa_end = abscissa_values(
+                float(data_block["abscissa_start"]),
+                float(data_block["abscissa_increment"]),
+                np.array([int(data_block["number_of_ordinate_values"]) - 1]),
+            )[0]
+            abscissa_ends.append(float(abscissa_end))
 
             label1 = data_block["abscissa_label"]
             unit1 = data_block["abscissa_units"]
@@ -103,7 +105,7 @@ class MetaParser(XrdMetaParser):
         for data_block0 in data_blocks_with_numeric_data:
             data_block2 = {}
             for k in data_block0:
-                if k in ["ordinate_values"]:
+                if k in ["ordinate_values", "ordinate_text"]:
                     continue
                 v = data_block0[k]
                 if isinstance(v, list):
@@ -112,16 +114,3 @@ class MetaParser(XrdMetaParser):
             data_blocks.append(data_block2)
 
         return data_blocks
-
-    def _count_decimal_places(self, num: float) -> int:
-        """Convert floating point numbers to strings.
-
-        Args:
-            num (float): Floating-point number.
-
-        Returns:
-            int: Number of decimal places.
-
-        """
-        num_str = str(num)
-        return len(num_str.split('.')[1]) if '.' in num_str else 0
@@ -1,14 +1,38 @@
 from __future__ import annotations
 
+import contextlib
+import csv
 import io
+import json
+import os
 import re
+import tempfile
+import time
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from types import TracebackType
+from typing import Self
 
+import numpy as np
 import pandas as pd
 from rdetoolkit.exceptions import StructuredError
 from rdetoolkit.models.rde2types import MetaType, RdeOutputResourcePath
 
-from modules_xps.interfaces import IStructuredDataProcessor
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    # Parquet and Feather companions fall back to NPZ without pyarrow.
+    HAS_PYARROW = False
+else:
+    HAS_PYARROW = True
+
+from modules_xps.interfaces import IStructuredDataProcessor, ProfileCube, SpectrumSet
+from modules_xps.ulvac_phi import cube_store
+
+# Arguments of StructuredDataProcessor._write_phi_csv: file, data, lines and text columns.
+PhiCsvFile = tuple[Path, pd.DataFrame, list[str] | None, int | None]
 
 
 class StructuredDataProcessor(IStructuredDataProcessor):
@@ -31,12 +55,21 @@ class StructuredDataProcessor(IStructuredDataProcessor):
     """
 
     DELIMITER = "="
-    EXCLUSIONS = ("blocks", "experiment_terminator", "file", "ordinate_values")
+    # Counts are written to 4 decimal places.
+    COUNTS_FORMAT = "%.4f"
+    EXCLUSIONS = ("blocks", "experiment_terminator", "file", "ordinate_values", "ordinate_text")
+    OUTLIER_PATTERN = re.compile(r"1[eE][\+]*0*37")
+    TRAILING_NEWLINES_PATTERN = re.compile(r"[\r\n]+$")
+    # The TXT file is written in large chunks.
+    TXT_BUFFER_SIZE = 1 << 20
+    CSV_METRICS_FILE_NAME = "csv_metrics.jsonl"
 
     def __init__(self, config: dict[str, str | None]) -> None:
         self.df_series_1 = pd.DataFrame()
         self.df_series_2 = pd.DataFrame()
         self.config: dict = config
+        self.binary_output = BinaryCompanionWriter.format_from_config(config)
+        self.cube_store = cube_store.format_from_config(config)
 
     def save_file(
             self,
@@ -44,7 +77,7 @@ class StructuredDataProcessor(IStructuredDataProcessor):
             meta: MetaType,
             data: pd.DataFrame,
             data_blocks: list | None,
-            data_atoms: list | None,
+            data_atoms: Sequence[SpectrumSet] | None,
     ) -> None:
         """Save the given DataFrame to a csv file.
 
@@ -53,7 +86,7 @@ class StructuredDataProcessor(IStructuredDataProcessor):
             meta (dict[str, ExtendMetaType]): Metadata.
             data (pd.DataFrame): All measurement data.
             data_blocks (list | None): Block-by-Block additional data.
-            data_atoms (list | None): Data by atomic.
+            data_atoms (Sequence[SpectrumSet] | None): Spectra by atomic.
 
         """
         match resource_paths.rawfiles[0].suffix.lower():
@@ -65,24 +98,184 @@ class StructuredDataProcessor(IStructuredDataProcessor):
                     err_msg = "Error: No data is output."
                     raise StructuredError(err_msg)
 
+                start = time.perf_counter()
                 pretreated_data = self._pretreatment_saving_csv_file(data, data_blocks)
 
                 csv_file = resource_paths.struct.joinpath(f"{resource_paths.rawfiles[0].stem}.csv")
                 pretreated_data.to_csv(csv_file, index=False)
+                self._write_binary_companion(csv_file, pretreated_data)
+                self.record_csv_metrics(resource_paths, [
+                    {"file": csv_file.name, "rows": len(pretreated_data), "seconds": round(time.perf_counter() - start, 3)},
+                ])
 
             case ".spe":
-                if isinstance(data_atoms, list):
-                    for atomic_data in data_atoms:
-                        atomic_data.get('df').to_csv(atomic_data.get('file'), index=False, lineterminator="\r\n")
+                if data_atoms is not None:
+                    # The counts follow the XY values.
+                    self._write_phi_csv_files(
+                        resource_paths,
+                        [(spectrum.file, spectrum.frame(), spectrum.lines, 2) for spectrum in data_atoms],
+                    )
 
             case ".pro" | ".ang":
-                if isinstance(data_atoms, list):
-                    for atomic_data in data_atoms:
-                        atomic_data['df_cps'].to_csv(atomic_data['file_cps'], index=False, lineterminator="\r\n")
-                        atomic_data['df_counts'].to_csv(atomic_data['file_counts'], index=False, lineterminator="\r\n")
+                cubes: list[ProfileCube] = []
+                csv_files: list[PhiCsvFile] = []
+                for cube in data_atoms or []:
+                    if not isinstance(cube, ProfileCube):
+                        err_msg = "Error: No profile spectra are output."
+                        raise StructuredError(err_msg)
+                    cubes.append(cube)
+                    csv_files.append((cube.file, cube.cps_frame(), cube.lines, None))
+                    # The counts of each cycle follow the x values.
+                    csv_files.append((cube.counts_file, cube.counts_frame(), cube.lines, 1))
 
                 csv_file = resource_paths.struct.joinpath(f"{resource_paths.rawfiles[0].stem}.csv")
-                data.to_csv(csv_file, index=False, lineterminator="\r\n")
+                csv_files.append((csv_file, data, data.attrs.get("lines"), None))
+                self._write_phi_csv_files(resource_paths, csv_files)
+
+                if self.cube_store is not None and cubes:
+                    # The profile axis is the first column of the merged data.
+                    cube_store.write_cube_store(
+                        resource_paths.struct.joinpath(f"{resource_paths.rawfiles[0].stem}_cube"),
+                        cubes,
+                        str(data.columns[0]) if len(data.columns) else "",
+                        self.cube_store,
+                    )
+
+    def _write_phi_csv_files(self, resource_paths: RdeOutputResourcePath, csv_files: list[PhiCsvFile]) -> None:
+        """Save the csv files of PHI data concurrently.
+
+        The files are written by a pool of "csv_workers" threads (see _csv_workers), and the rows
+        and seconds of each write are appended to CSV_METRICS_FILE_NAME in the log directory,
+        in the order of csv_files. The first failed write is recorded there with its error and cancels the writes that have not started yet.
+
+        Args:
+            resource_paths (RdeOutputResourcePath): Standard output of execution results.
+            csv_files (list[PhiCsvFile]): Arguments of _write_phi_csv for each file.
+
+        Raises:
+            StructuredError: If a file cannot be written.
+
+        """
+        if not csv_files:
+            return
+        with ThreadPoolExecutor(max_workers=self._csv_workers(len(csv_files))) as executor:
+            futures = {executor.submit(self._timed_write_phi_csv, *csv_file): csv_file[0] for csv_file in csv_files}
+            for future in as_completed(futures):
+                error = future.exception()
+                if error is not None:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    metrics = [f.result() for f in futures if f.done() and not f.cancelled() and f.exception() is None]
+                    metrics.append({"file": futures[future].name, "error": str(error)})
+                    self.record_csv_metrics(resource_paths, metrics)
+                    err_msg = f"Error: Failed to write {futures[future].name}: {error}"
+                    raise StructuredError(err_msg) from error
+        self.record_csv_metrics(resource_paths, [future.result() for future in futures])
+
+    def _csv_workers(self, n_files: int) -> int:
+        """Get the number of csv files written at once.
+
+        "csv_workers" in rdeconfig.yaml sets it; otherwise it is the number of usable CPU cores.
+
+        Args:
+            n_files (int): Number of files to write.
+
+        Returns:
+            int: Number of workers, at least 1.
+
+        """
+        workers = self.config.get("xps", {}).get("csv_workers")
+        if not workers:
+            workers = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+        return max(1, min(int(workers), n_files))
+
+    def _timed_write_phi_csv(self, csv_file: Path, df: pd.DataFrame, lines: list[str] | None, text_columns: int | None) -> dict:
+        """Run _write_phi_csv, write the binary companion and measure them.
+
+        Args:
+            csv_file (Path): Output file.
+            df (pd.DataFrame): Data.
+            lines (list[str] | None): Values of each row as they were in the input text.
+            text_columns (int | None): Number of leading columns written from lines.
+
+        Returns:
+            dict: File name, number of rows and seconds taken.
+
+        """
+        start = time.perf_counter()
+        self._write_phi_csv(csv_file, df, lines, text_columns)
+        self._write_binary_companion(csv_file, df, text_columns)
+        return {"file": csv_file.name, "rows": len(df), "seconds": round(time.perf_counter() - start, 3)}
+
+    def record_csv_metrics(self, resource_paths: RdeOutputResourcePath, metrics: list[dict]) -> None:
+        """Append the metrics of the written csv files to CSV_METRICS_FILE_NAME.
+
+        Args:
+            resource_paths (RdeOutputResourcePath): Standard output of execution results.
+            metrics (list[dict]): Metrics of each file.
+
+        """
+        with open(resource_paths.logs.joinpath(self.CSV_METRICS_FILE_NAME), "a", encoding="utf_8") as f:
+            f.writelines(json.dumps(m) + "\n" for m in metrics)
+
+    def _write_binary_companion(self, csv_file: Path, df: pd.DataFrame, text_columns: int | None = None) -> None:
+        """Write the binary companion of a csv file, if "binary_output" is set.
+
+        Args:
+            csv_file (Path): Csv file.
+            df (pd.DataFrame): Data of the csv file.
+            text_columns (int | None): Number of leading columns before the counts, if the file has counts.
+                The counts are rounded to COUNTS_FORMAT, as they are in the csv file.
+
+        """
+        if self.binary_output is None:
+            return
+        values = df.to_numpy(dtype=np.float64, copy=True)
+        if text_columns is not None:
+            values[:, text_columns:] = np.char.mod(self.COUNTS_FORMAT, values[:, text_columns:]).astype(np.float64)
+        with BinaryCompanionWriter(csv_file, [str(column) for column in df.columns], self.binary_output) as writer:
+            writer.write(values)
+
+    def _write_phi_csv(self, csv_file: Path, df: pd.DataFrame, lines: list[str] | None, text_columns: int | None = None) -> None:
+        """Save a DataFrame of PHI data to a csv file.
+
+        Args:
+            csv_file (Path): Output file.
+            df (pd.DataFrame): Data.
+            lines (list[str] | None): Values of each row as they were in the input text.
+                If None, df is written with to_csv.
+            text_columns (int | None): Number of leading columns written from lines (all if None).
+                The other columns are counts, written from df with COUNTS_FORMAT.
+
+        """
+        if lines is None:
+            df.to_csv(csv_file, index=False, lineterminator="\r\n")
+            return
+        if text_columns is not None:
+            lines = self._append_counts(lines, df.iloc[:, text_columns:].to_numpy(), text_columns)
+        with open(csv_file, "w", encoding="utf_8", newline="") as f:
+            # Quoted in the same way as to_csv
+            csv.writer(f, lineterminator="\r\n").writerow(df.columns)
+            for line in lines:
+                f.write(line + "\r\n")
+
+    def _append_counts(self, lines: list[str], counts: np.ndarray, text_columns: int) -> list[str]:
+        """Join the leading text columns of each line with the counts formatted to fixed precision.
+
+        Args:
+            lines (list[str]): Values of each row as they were in the input text.
+            counts (np.ndarray): Counts (rows x columns).
+            text_columns (int): Number of leading columns taken from lines.
+
+        Returns:
+            list[str]: Lines of the CSV file after the header.
+
+        """
+        # One format string per row is much faster than formatting cell by cell.
+        row_format = ",".join([self.COUNTS_FORMAT] * counts.shape[1])
+        return [
+            ",".join([*line.split(",", text_columns)[:text_columns], row_format % tuple(row)]) if row_format else line
+            for line, row in zip(lines, counts.tolist(), strict=True)
+        ]
 
     def _pretreatment_saving_csv_file(self, data: pd.DataFrame, data_blocks: list | None) -> pd.DataFrame:
         """Pretreatment saving csv file from vms file.
@@ -97,25 +290,62 @@ class StructuredDataProcessor(IStructuredDataProcessor):
         """
         if isinstance(data_blocks, list):
             data_copy = data.copy()
-            axis_name_x = data_blocks[0].get("abscissa_label", [""]).strip()
-            axis_name_y = ",".join(data_blocks[0].get("corresponding_variable_labels", [""])).strip()
-            axis_unit_x = data_blocks[0].get("abscissa_units", [""]).strip()
-            axis_unit_y = ",".join(data_blocks[0].get("corresponding_variable_units", [""])).strip()
-
-            for index_legend in range(len(data_blocks)):
-                if len(data_blocks) == 1:
-                    data_copy.rename(columns={
-                        index_legend * 2: axis_name_x + "(" + axis_unit_x + ")",
-                        index_legend * 2 + 1: axis_name_y + "(" + axis_unit_y + ")",
-                    }, inplace=True)
-                else:
-                    data_copy.rename(columns={
-                        index_legend * 2: "(data" + str(index_legend + 1) + ")" + axis_name_x + "(" + axis_unit_x + ")",
-                        index_legend * 2 + 1: "(data" + str(index_legend + 1) + ")" + axis_name_y + "(" + axis_unit_y + ")",
-                    }, inplace=True)
+            column_names = self._vms_csv_column_names(data_blocks)
+            data_copy.rename(columns=dict(enumerate(column_names)), inplace=True)
 
         return data_copy
 
+    def _vms_csv_column_names(self, data_blocks: list) -> list[str]:
+        """Create the CSV column names of a vms file (an XY pair per block).
+
+        Args:
+            data_blocks (list): Block-by-Block additional data.
+
+        Returns:
+            list[str]: Column names.
+
+        """
+        axis_name_x = data_blocks[0].get("abscissa_label", [""]).strip()
+        axis_name_y = ",".join(data_blocks[0].get("corresponding_variable_labels", [""])).strip()
+        axis_unit_x = data_blocks[0].get("abscissa_units", [""]).strip()
+        axis_unit_y = ",".join(data_blocks[0].get("corresponding_variable_units", [""])).strip()
+
+        column_names = []
+        for index_legend in range(len(data_blocks)):
+            if len(data_blocks) == 1:
+                column_names += [
+                    axis_name_x + "(" + axis_unit_x + ")",
+                    axis_name_y + "(" + axis_unit_y + ")",
+                ]
+            else:
+                column_names += [
+                    "(data" + str(index_legend + 1) + ")" + axis_name_x + "(" + axis_unit_x + ")",
+                    "(data" + str(index_legend + 1) + ")" + axis_name_y + "(" + axis_unit_y + ")",
+                ]
+
+        return column_names
+
+    def open_vms_stream(
+            self,
+            resource_paths: RdeOutputResourcePath,
+            meta: MetaType,
+            data_blocks: list[dict],
+            block_rows: list[int],
+    ) -> VmsStreamWriter:
+        """Start writing the TXT and CSV files of a vms file one block at a time.
+
+        Args:
+            resource_paths (RdeOutputResourcePath): Standard output of execution results.
+            meta (dict[str, ExtendMetaType]): Metadata.
+            data_blocks (list[dict]): Block-by-Block additional data (ordinate values are not needed).
+            block_rows (list[int]): Number of XY rows of each block.
+
+        Returns:
+            VmsStreamWriter: Writer to which the blocks are passed in file order.
+
+        """
+        return VmsStreamWriter(self, resource_paths, meta, self._vms_csv_column_names(data_blocks), block_rows)
+
     def _write_txt_file(self, txt_file_path: Path, meta: MetaType, data_blocks: list) -> None:
         """Write metadata and numeric data to TXT files.
 
@@ -125,73 +355,60 @@ class StructuredDataProcessor(IStructuredDataProcessor):
             data_blocks (list): Numeric data.
 
         """
-        with open(txt_file_path, "w") as f:
-            i = 0
-            self._write_header_infomation(f, meta)
+        with open(txt_file_path, "w", buffering=self.TXT_BUFFER_SIZE) as f:
+            self.write_txt_header(f, meta)
             for i, data_block in enumerate(data_blocks):
-                self._write_nemeric_data_infomation(f, i + 1, data_block)
-                self._write_nemeric_data(f, i + 1, data_block)
+                self.write_txt_block(f, i + 1, data_block)
 
-    def _write_header_infomation(self, f: io.TextIOWrapper, meta: MetaType) -> None:
-        """Write metadata.
+    def write_txt_header(self, f: io.TextIOWrapper, meta: MetaType) -> None:
+        """Write the header part of the TXT file.
 
         Args:
             f (io.TextIOWrapper): Buffered text of the txt file interface.
             meta (dict[str, ExtendMetaType]): Meta data.
 
         """
-        print("//HEADER INFORMATION", file=f)
-        for key, value in meta.items():
-            if key not in self.EXCLUSIONS:
-                if key == "comment" and \
-                        isinstance(value, str) and \
-                        isinstance(meta["number_of_lines_in_comment"], int) and \
-                        meta["number_of_lines_in_comment"] > 1:
-                    value_str = '"' + value + '"'
-                if type(value) is list:
-                    v = [str(i) for i in value]
-                    value_str = ",".join(v)
-                else:
-                    value_str = str(value)
-                value_str = self._check_outlier(value_str)
-                print(key, self.DELIMITER, value_str, sep="", file=f)
+        lines = ["//HEADER INFORMATION"]
+        lines.extend(self._item_lines(meta))
+        f.write("\n".join(lines) + "\n")
+
+    def write_txt_block(self, f: io.TextIOWrapper, i: int, data_block: Mapping) -> None:
+        """Write one block of the TXT file.
 
-    def _write_nemeric_data_infomation(self, f: io.TextIOWrapper, i: int, block_info: dict) -> None:
-        """Output additional information data.
+        The additional information and the numeric data are written at once.
 
         Args:
             f (io.TextIOWrapper): Buffered text of the txt file interface.
             i (int): Block number.
-            block_info (dict): Additional information in block data
+            data_block (Mapping): Block data with ordinate values.
 
         """
-        print("//Numeric Data Info", i, file=f)
-        for key, value in block_info.items():
-            if key not in self.EXCLUSIONS:
-                if key == "block_comment" and block_info["number_of_lines_in_block_comment"] > 1:
-                    value_str = '"' + value + '"'
-                if type(value) is list:
-                    v = [str(i) for i in value]
-                    value_str = ",".join(v)
-                else:
-                    value_str = str(value)
-                value_str = re.sub("[\r\n]+$", "", value_str)
-                value_str = self._check_outlier(value_str)
-                print(key, self.DELIMITER, value_str, sep="", file=f)
+        lines = [f"//Numeric Data Info {i}"]
+        lines.extend(self._item_lines(data_block, strip_newlines=True))
+        lines.append(f"//Numeric Data {i}")
+        # The text keeps the notation of the measurement file (one value per line).
+        f.write("\n".join(lines) + "\n" + "".join(data_block["ordinate_text"]))
 
-    def _write_nemeric_data(self, f: io.TextIOWrapper, i: int, block_info: dict) -> None:
-        """Output neweric data.
+    def _item_lines(self, items: Mapping, *, strip_newlines: bool = False) -> list[str]:
+        """Format metadata or additional block information as "key=value" lines.
 
         Args:
-            f (io.TextIOWrapper): Buffered text of the txt file interface.
-            i (int): Block number.
-            block_info (dict):Numeric information in block data.
+            items (Mapping): Metadata or block data.
+            strip_newlines (bool): Whether newlines at the end of the values are removed.
+
+        Returns:
+            list[str]: Lines without line breaks.
 
         """
-        print("//Numeric Data", i, file=f)
-        for data1 in block_info["ordinate_values"]:
-            for val in data1:
-                print(str(val), file=f)
+        lines = []
+        for key, value in items.items():
+            if key in self.EXCLUSIONS:
+                continue
+            value_str = ",".join([str(v) for v in value]) if type(value) is list else str(value)
+            if strip_newlines and value_str.endswith(("\r", "\n")):
+                value_str = self.TRAILING_NEWLINES_PATTERN.sub("", value_str)
+            lines.append(f"{key}{self.DELIMITER}{self._check_outlier(value_str)}")
+        return lines
 
     def _check_outlier(self, _val: str) -> str:
         """Outlier Check.
@@ -204,7 +421,203 @@ class StructuredDataProcessor(IStructuredDataProcessor):
 
         """
         # Leave blank for ex. "1e+37", "1E37", and "1e+37".
-        m = re.fullmatch(r"1[eE][\+]*0*37", _val)
-        if m is not None:
+        if _val.endswith("37") and self.OUTLIER_PATTERN.fullmatch(_val) is not None:
             _val = ""
         return _val
+
+
+class VmsStreamWriter:
+    """Writes the TXT and CSV files of a vms file one block at a time.
+
+    The TXT file is written as the blocks arrive. The CSV file has an XY column pair per block,
+    so the XY values are spilled to a temporary file and the CSV is assembled from it
+    in row chunks on close. Only one block is held in memory at a time.
+    The output and the CSV metrics are the same as StructuredDataProcessor.save_file.
+
+    Example:
+        with processor.open_vms_stream(resource_paths, meta, headers, block_rows) as writer:
+            for data_block in vamas.iter_blocks():
+                writer.write_block(data_block, reader.block_xy(data_block))
+
+    """
+
+    CSV_CHUNK_ROWS = 10000
+
+    def __init__(
+            self,
+            processor: StructuredDataProcessor,
+            resource_paths: RdeOutputResourcePath,
+            meta: MetaType,
+            column_names: list[str],
+            block_rows: list[int],
+    ):
+        self.processor = processor
+        self.resource_paths = resource_paths
+        self.csv_file = resource_paths.struct.joinpath(f"{resource_paths.rawfiles[0].stem}.csv")
+        self.column_names = column_names
+        self.block_rows = block_rows
+        self.number_of_written_blocks = 0
+        self._txt = open(  # noqa: SIM115
+            resource_paths.struct.joinpath(f"{resource_paths.rawfiles[0].stem}.txt"), "w", buffering=processor.TXT_BUFFER_SIZE,
+        )
+        self._spill = tempfile.TemporaryFile(dir=resource_paths.temp)  # noqa: SIM115
+        processor.write_txt_header(self._txt, meta)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None, exc: BaseException | None, tb: TracebackType | None) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._txt.close()
+            self._spill.close()
+
+    def write_block(self, data_block: Mapping, xy: np.ndarray) -> None:
+        """Write one block.
+
+        Args:
+            data_block (Mapping): Block data with ordinate values.
+            xy (np.ndarray): XY values of the block (rows x 2).
+
+        """
+        self.number_of_written_blocks += 1
+        self.processor.write_txt_block(self._txt, self.number_of_written_blocks, data_block)
+        # Spilled column by column: all X values, then all Y values.
+        self._spill.write(np.ascontiguousarray(xy.T, dtype=np.float64).tobytes())
+
+    def close(self) -> None:
+        """Finish the TXT file and write the CSV file."""
+        self._txt.close()
+        try:
+            if self.number_of_written_blocks != len(self.block_rows):
+                err_msg = "Error: No data is output."
+                raise StructuredError(err_msg)
+            start = time.perf_counter()
+            self._write_csv_file()
+            self.processor.record_csv_metrics(self.resource_paths, [
+                {"file": self.csv_file.name, "rows": max(self.block_rows, default=0), "seconds": round(time.perf_counter() - start, 3)},
+            ])
+        finally:
+            self._spill.close()
+
+    def _write_csv_file(self) -> None:
+        """Assemble the CSV file from the spilled XY values in row chunks."""
+        self._spill.flush()
+        spilled = np.memmap(self._spill, dtype=np.float64, mode="r") if self._spill.tell() > 0 else np.empty(0)
+        offsets = np.concatenate(([0], np.cumsum([2 * rows for rows in self.block_rows])))
+        n_rows = max(self.block_rows, default=0)
+
+        binary_output = self.processor.binary_output
+        with open(self.csv_file, "w", newline="") as f, \
+                BinaryCompanionWriter(self.csv_file, self.column_names, binary_output) if binary_output else contextlib.nullcontext() as companion:
+            pd.DataFrame(columns=self.column_names).to_csv(f, index=False)
+            for start in range(0, n_rows, self.CSV_CHUNK_ROWS):
+                stop = min(start + self.CSV_CHUNK_ROWS, n_rows)
+                chunk = np.full((stop - start, len(self.column_names)), np.nan)
+                for i, rows in enumerate(self.block_rows):
+                    if rows > start:
+                        xy = spilled[offsets[i]:offsets[i + 1]].reshape(2, rows)
+                        chunk[:min(stop, rows) - start, 2 * i:2 * i + 2] = xy[:, start:stop].T
+                pd.DataFrame(chunk).to_csv(f, index=False, header=False)
+                if companion is not None:
+                    companion.write(chunk)
+
+
+class BinaryCompanionWriter:
+    """Writes a columnar binary companion of a CSV file, for loading the values without parsing text.
+
+    "binary_output" in rdeconfig.yaml selects the format:
+        parquet: Parquet file (.parquet), with pyarrow
+        feather: Feather (Arrow IPC) file (.feather), with pyarrow
+        npz: NumPy archive (.npz) with the arrays "values" (rows x columns), "columns", "labels" and "units"
+    Without pyarrow, parquet and feather fall back to npz.
+
+    The companion has the columns of the CSV file as float64. The label and unit of each column,
+    split from a name like "Binding Energy (eV)", are stored in the field metadata for Arrow formats,
+    and the CSV file name in the schema metadata. The CSV file stays the canonical output.
+    The rows can be written in chunks; the npz format keeps them until close.
+
+    Example:
+        with BinaryCompanionWriter(csv_file, columns, "parquet") as writer:
+            writer.write(values)
+
+    """
+
+    FORMATS = {"parquet": ".parquet", "feather": ".feather", "npz": ".npz"}
+    UNIT_PATTERN = re.compile(r"(.*?)\s*\(([^()]*)\)")
+
+    def __init__(self, csv_file: Path, columns: list[str], fmt: str):
+        self.columns = columns
+        self.format = fmt
+        self.path = csv_file.with_suffix(self.FORMATS[fmt])
+        labels_units = [self.UNIT_PATTERN.fullmatch(column) for column in columns]
+        self.labels = [m.group(1) if m else column for m, column in zip(labels_units, columns, strict=True)]
+        self.units = [m.group(2) if m else "" for m in labels_units]
+        self._chunks: list[np.ndarray] = []
+        self._writer = None
+        if fmt != "npz":
+            self._schema = pa.schema(
+                [
+                    pa.field(column, pa.float64(), metadata={"label": label, "unit": unit})
+                    for column, label, unit in zip(columns, self.labels, self.units, strict=True)
+                ],
+                metadata={"source": csv_file.name},
+            )
+            self._writer = pq.ParquetWriter(self.path, self._schema) if fmt == "parquet" else pa.ipc.new_file(self.path, self._schema)
+
+    @classmethod
+    def format_from_config(cls, config: dict) -> str | None:
+        """Get the format set in rdeconfig.yaml.
+
+        Args:
+            config (dict): config data.
+
+        Returns:
+            str | None: Format, or None if no companion is written.
+
+        Raises:
+            StructuredError: If the format is not supported.
+
+        """
+        fmt = config.get("xps", {}).get("binary_output")
+        if not fmt:
+            return None
+        fmt = str(fmt).lower()
+        if fmt not in cls.FORMATS:
+            err_msg = f"Error: Unsupported binary_output: {fmt}"
+            raise StructuredError(err_msg)
+        if fmt != "npz" and not HAS_PYARROW:
+            return "npz"
+        return fmt
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None, exc: BaseException | None, tb: TracebackType | None) -> None:
+        self.close()
+
+    def write(self, values: np.ndarray) -> None:
+        """Write rows.
+
+        Args:
+            values (np.ndarray): Values (rows x columns).
+
+        """
+        if self._writer is None:
+            self._chunks.append(np.array(values, dtype=np.float64))
+            return
+
+        table = pa.Table.from_arrays([pa.array(values[:, j], type=pa.float64()) for j in range(len(self.columns))], schema=self._schema)
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        """Finish the file."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            return
+
+        values = np.concatenate(self._chunks) if self._chunks else np.empty((0, len(self.columns)))
+        self._chunks = []
+        np.savez(self.path, values=values, columns=np.array(self.columns, dtype=str), labels=np.array(self.labels, dtype=str), units=np.array(self.units, dtype=str))
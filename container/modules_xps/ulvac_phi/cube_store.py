@@ -0,0 +1,302 @@
+"""Chunked store of the spectra of a depth or angle profile.
+
+A profile is a cube of region x cycle x energy. The CSV files flatten it to a column per cycle;
+the store keeps it as one cycle x energy array per region and quantity ("cps", "counts"),
+split into compressed chunks of CHUNK_SHAPE, so that a cycle or an energy window is read
+without reading the whole profile.
+
+Two layouts hold the same index:
+    npy: "<raw file stem>_cube" directory with index.json and, per region,
+        "<key>/energy.npy", "<key>/z.npy" and "<key>/<quantity>/<cycle chunk>_<energy chunk>.npz"
+    hdf5: "<raw file stem>_cube.h5" with the index in the "index" attribute of the root and,
+        per region, a "<key>" group with the "energy", "z" and gzip-chunked quantity datasets (needs h5py)
+
+Example:
+    store = CubeStore.open(resource_paths.struct.joinpath("sample_cube"))
+    window = store.energy_window("C1s", 280.0, 295.0)
+    cps = store.read("C1s", "cps", cycles=0, points=window)
+
+"""
+from __future__ import annotations
+
+import json
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from rdetoolkit.exceptions import StructuredError
+
+from modules_xps.interfaces import ProfileCube
+
+try:
+    import h5py
+except ImportError:
+    # The hdf5 layout falls back to npy without h5py.
+    HAS_H5PY = False
+else:
+    HAS_H5PY = True
+
+FORMATS = ("npy", "hdf5")
+INDEX_FILE_NAME = "index.json"
+INDEX_VERSION = 1
+# Cycles x energy points of a chunk.
+CHUNK_SHAPE = (16, 256)
+QUANTITIES = ("cps", "counts")
+
+
+def format_from_config(config: dict) -> str | None:
+    """Get the layout set by "cube_store" in rdeconfig.yaml.
+
+    Args:
+        config (dict): config data.
+
+    Returns:
+        str | None: Layout, or None if no store is written.
+
+    Raises:
+        StructuredError: If the layout is not supported.
+
+    """
+    fmt = config.get("xps", {}).get("cube_store")
+    if not fmt:
+        return None
+    fmt = str(fmt).lower()
+    if fmt not in FORMATS:
+        err_msg = f"Error: Unsupported cube_store: {fmt}"
+        raise StructuredError(err_msg)
+    if fmt == "hdf5" and not HAS_H5PY:
+        return "npy"
+    return fmt
+
+
+def write_cube_store(path: Path, cubes: list[ProfileCube], z_label: str, fmt: str) -> Path:
+    """Write the spectra of a profile to a store.
+
+    Args:
+        path (Path): Store path without extension, e.g. "<struct>/<raw file stem>_cube".
+        cubes (list[ProfileCube]): Spectra of each region.
+        z_label (str): Label of the profile axis, e.g. "Sputter Time (min)".
+        fmt (str): Layout, "npy" or "hdf5".
+
+    Returns:
+        Path: Written directory or file.
+
+    """
+    regions: list[dict] = [
+        {"name": cube.name, "key": f"r{i}", "x_label": cube.columns[0], "cycles": cube.number_of_spectra, "points": len(cube.energy)}
+        for i, cube in enumerate(cubes)
+    ]
+    index = {
+        "version": INDEX_VERSION,
+        "z_label": z_label,
+        "chunk_shape": list(CHUNK_SHAPE),
+        "quantities": list(QUANTITIES),
+        "regions": regions,
+    }
+    if fmt == "hdf5":
+        path = path.with_name(f"{path.name}.h5")
+        with h5py.File(path, "w") as f:
+            f.attrs["index"] = json.dumps(index)
+            for region, cube in zip(regions, cubes, strict=True):
+                group = f.create_group(region["key"])
+                group.create_dataset("energy", data=cube.energy)
+                group.create_dataset("z", data=cube.z)
+                for quantity, values in zip(QUANTITIES, (cube.cps, cube.counts), strict=True):
+                    chunks = (min(CHUNK_SHAPE[0], values.shape[1]) or 1, min(CHUNK_SHAPE[1], values.shape[0]) or 1)
+                    group.create_dataset(quantity, data=values.T, chunks=chunks, compression="gzip")
+        return path
+
+    if path.exists():
+        shutil.rmtree(path)
+    for region, cube in zip(regions, cubes, strict=True):
+        region_dir = path.joinpath(region["key"])
+        region_dir.mkdir(parents=True)
+        np.save(region_dir.joinpath("energy.npy"), cube.energy)
+        np.save(region_dir.joinpath("z.npy"), cube.z)
+        for quantity, values in zip(QUANTITIES, (cube.cps, cube.counts), strict=True):
+            quantity_dir = region_dir.joinpath(quantity)
+            quantity_dir.mkdir()
+            # values are energy points x cycles; the chunks are cycles x energy points.
+            for ci, cycle in enumerate(range(0, values.shape[1], CHUNK_SHAPE[0])):
+                for pi, point in enumerate(range(0, values.shape[0], CHUNK_SHAPE[1])):
+                    chunk = values[point:point + CHUNK_SHAPE[1], cycle:cycle + CHUNK_SHAPE[0]].T
+                    np.savez_compressed(quantity_dir.joinpath(f"{ci}_{pi}.npz"), values=chunk)
+    path.joinpath(INDEX_FILE_NAME).write_text(json.dumps(index, ensure_ascii=False, indent=2), encoding="utf_8")
+    return path
+
+
+@dataclass
+class CubeStore:
+    """Reads a store written by write_cube_store.
+
+    Only the chunks that overlap the requested cycles and energy points are read.
+
+    Attributes:
+        path (Path): Store directory (npy) or file (hdf5).
+        index (dict): Index of the store.
+
+    """
+
+    path: Path
+    index: dict
+
+    @classmethod
+    def open(cls, path: Path) -> CubeStore:
+        """Open a store.
+
+        Args:
+            path (Path): Store directory, .h5 file, or either without extension.
+
+        Returns:
+            CubeStore: Store.
+
+        Raises:
+            StructuredError: If no store is found.
+
+        """
+        if path.is_dir() and path.joinpath(INDEX_FILE_NAME).exists():
+            return cls(path, json.loads(path.joinpath(INDEX_FILE_NAME).read_text(encoding="utf_8")))
+        h5_path = path if path.suffix == ".h5" else path.with_name(f"{path.name}.h5")
+        if h5_path.exists() and HAS_H5PY:
+            with h5py.File(h5_path, "r") as f:
+                return cls(h5_path, json.loads(f.attrs["index"]))
+        err_msg = f"Cube store not found: {path}"
+        raise StructuredError(err_msg)
+
+    @property
+    def regions(self) -> list[str]:
+        """Region names."""
+        return [region["name"] for region in self.index["regions"]]
+
+    def energy(self, region: str) -> np.ndarray:
+        """Energy axis of a region.
+
+        Args:
+            region (str): Region name.
+
+        Returns:
+            np.ndarray: Energy of each point.
+
+        """
+        return self._axis(region, "energy")
+
+    def z(self, region: str) -> np.ndarray:
+        """Profile axis of a region.
+
+        Args:
+            region (str): Region name.
+
+        Returns:
+            np.ndarray: Sputter time or angle of each cycle.
+
+        """
+        return self._axis(region, "z")
+
+    def energy_window(self, region: str, low: float, high: float) -> slice:
+        """Get the energy points of a region between two energies.
+
+        Args:
+            region (str): Region name.
+            low (float): Lower energy.
+            high (float): Upper energy.
+
+        Returns:
+            slice: Points whose energy is in [low, high], for read().
+
+        """
+        energy = self.energy(region)
+        inside = np.flatnonzero((energy >= low) & (energy <= high))
+        return slice(int(inside[0]), int(inside[-1]) + 1) if len(inside) else slice(0, 0)
+
+    def read(self, region: str, quantity: str = "cps", cycles: int | slice = slice(None), points: int | slice = slice(None)) -> np.ndarray:
+        """Read spectra of a region.
+
+        Args:
+            region (str): Region name.
+            quantity (str): "cps" or "counts".
+            cycles (int | slice): Cycles to read.
+            points (int | slice): Energy points to read.
+
+        Returns:
+            np.ndarray: Values (cycles x points). An int for cycles or points drops that axis.
+
+        Raises:
+            StructuredError: If the region or the quantity is not in the store.
+
+        """
+        info = self._region(region)
+        if quantity not in self.index["quantities"]:
+            err_msg = f"Quantity not found in the cube store: {quantity}"
+            raise StructuredError(err_msg)
+
+        rows = range(info["cycles"])[cycles]
+        cols = range(info["points"])[points]
+        row_range = rows if isinstance(rows, range) else range(rows, rows + 1)
+        col_range = cols if isinstance(cols, range) else range(cols, cols + 1)
+        if len(row_range) == 0 or len(col_range) == 0:
+            values = np.empty((len(row_range), len(col_range)))
+        elif self.path.suffix == ".h5":
+            row_lo, col_lo = min(row_range), min(col_range)
+            with h5py.File(self.path, "r") as f:
+                block = f[info["key"]][quantity][row_lo:max(row_range) + 1, col_lo:max(col_range) + 1]
+            values = block[np.subtract(row_range, row_lo)][:, np.subtract(col_range, col_lo)]
+        else:
+            values = self._read_chunks(info["key"], quantity, row_range, col_range)
+
+        if not isinstance(rows, range):
+            values = values[0]
+        if not isinstance(cols, range):
+            values = values[..., 0]
+        return values
+
+    def _read_chunks(self, key: str, quantity: str, rows: range, cols: range) -> np.ndarray:
+        """Read the npy chunks that overlap the cycles and the points.
+
+        Args:
+            key (str): Key of the region.
+            quantity (str): "cps" or "counts".
+            rows (range): Cycles (not empty).
+            cols (range): Energy points (not empty).
+
+        Returns:
+            np.ndarray: Values (cycles x points).
+
+        """
+        chunk_rows, chunk_cols = self.index["chunk_shape"]
+        row_lo, row_hi = min(rows), max(rows) + 1
+        col_lo, col_hi = min(cols), max(cols) + 1
+        block = np.empty((row_hi - row_lo, col_hi - col_lo))
+        quantity_dir = self.path.joinpath(key, quantity)
+        for ci in range(row_lo // chunk_rows, (row_hi - 1) // chunk_rows + 1):
+            for pi in range(col_lo // chunk_cols, (col_hi - 1) // chunk_cols + 1):
+                with np.load(quantity_dir.joinpath(f"{ci}_{pi}.npz")) as npz:
+                    chunk = npz["values"]
+                r0, c0 = ci * chunk_rows, pi * chunk_cols
+                r1, c1 = max(r0, row_lo), max(c0, col_lo)
+                r2, c2 = min(r0 + chunk.shape[0], row_hi), min(c0 + chunk.shape[1], col_hi)
+                block[r1 - row_lo:r2 - row_lo, c1 - col_lo:c2 - col_lo] = chunk[r1 - r0:r2 - r0, c1 - c0:c2 - c0]
+        values: np.ndarray = block[np.subtract(rows, row_lo)][:, np.subtract(cols, col_lo)]
+        return values
+
+    def _axis(self, region: str, name: str) -> np.ndarray:
+        """Read the energy or the profile axis of a region."""
+        key = self._region(region)["key"]
+        if self.path.suffix == ".h5":
+            with h5py.File(self.path, "r") as f:
+                return np.asarray(f[key][name][()])
+        return np.asarray(np.load(self.path.joinpath(key, f"{name}.npy")))
+
+    def _region(self, region: str) -> dict:
+        """Get the index entry of a region.
+
+        Raises:
+            StructuredError: If the region is not in the store.
+
+        """
+        regions: list[dict] = self.index["regions"]
+        for info in regions:
+            if info["name"] == region:
+                return info
+        err_msg = f"Region not found in the cube store: {region}"
+        raise StructuredError(err_msg)
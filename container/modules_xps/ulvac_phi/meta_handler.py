@@ -9,6 +9,7 @@ from pathlib import Path
 from rdetoolkit.models.rde2types import MetaType, RepeatedMetaType
 
 from modules_xps.meta_handler import MetaParser as XrdMetaParser
+from modules_xps.ulvac_phi.spectral_region import SpectralRegionTable
 
 
 class MetaParser(XrdMetaParser):
@@ -24,16 +25,6 @@ class MetaParser(XrdMetaParser):
     """
 
     # List of positions in array
-    # SpectralRegDef
-    POS_PEAK_NAME_TRANSITIONS = 2
-    POS_ABSCISSA_INCREMENT = 5
-    POS_ABSCISSA_START = 6
-    POS_ABSCISSA_END = 7
-    POS_COLLECTION_TIME = 10
-    POS_PASS_ENERGY = 11
-    # SpectralRegDef2
-    POS_TOTAL_ACQUISITION_NUMBER = 2
-    POS_PEAK_SWEEP_NUMBER = 2
     # DepthCalDef
     POS_SPUTTERING_LAYER_PRESET_INTERVAL_TIME = 7
     POS_SPUTTERING_LAYER_PRESET_CYCLE_NUMBER = 8
@@ -43,6 +34,7 @@ class MetaParser(XrdMetaParser):
         "SpectralRegDef",  # original
         "SpectralRegDef2",  # original
         "DepthCalDef",  # original
+        "SpectralRegions",  # table of SpectralRegDef and SpectralRegDef2
         "XraySource",
         "XrayPower",
         "XrayBeamDiameter",
@@ -122,9 +114,7 @@ class MetaParser(XrdMetaParser):
 
         # Items that should be stored in 'variable' type.
         spectral_meta_var: dict = {}
-        spectral_meta_var = self._set_metadata_using_spectral_reg_def_1(meta, spectral_meta_var)
-        spectral_meta_var = self._set_metadata_using_spectral_reg_def_2(meta, spectral_meta_var)
-        spectral_meta_var = self._set_metadata_using_spectral_reg_def_3(meta, spectral_meta_var)
+        spectral_meta_var = self._set_metadata_using_spectral_regions(meta, spectral_meta_var)
 
         # Create a dictionary that looks like a multiplication of 'spectral_meta_var' and 'depth_meta_var'.
         self._make_cross_dict(spectral_meta_var, depth_meta_var)
@@ -209,8 +199,8 @@ class MetaParser(XrdMetaParser):
 
         return depth_meta_var
 
-    def _set_metadata_using_spectral_reg_def_1(self, meta: MetaType, spectral_meta_var: dict) -> dict:
-        """Set spectral variable-length metadata part 1.
+    def _set_metadata_using_spectral_regions(self, meta: MetaType, spectral_meta_var: dict) -> dict:
+        """Set spectral variable-length metadata from the table of SpectralRegDef and SpectralRegDef2.
 
         Args:
             meta (MetaType): Meta data.
@@ -220,86 +210,52 @@ class MetaParser(XrdMetaParser):
             dict: Spectral variables meta.
 
         """
-        if "SpectralRegDef" in meta and isinstance(meta["SpectralRegDef"], list):
-            spectral_meta_var["peak_name"] = []
-            spectral_meta_var["transitions"] = []
-            spectral_meta_var = self._set_metadata_using_spectral_reg_def_tok(meta, spectral_meta_var)
-            spectral_meta_var["abscissa_increment"] = [tokens[5] for tokens in meta["SpectralRegDef"] if len(tokens) > self.POS_ABSCISSA_INCREMENT]
-            spectral_meta_var["abscissa_start"] = [tokens[6] for tokens in meta["SpectralRegDef"] if len(tokens) > self.POS_ABSCISSA_START]
-
-        return spectral_meta_var
-
-    def _set_metadata_using_spectral_reg_def_2(self, meta: MetaType, spectral_meta_var: dict) -> dict:
-        """Set spectral variable-length metadata part 2.
-
-        Args:
-            meta (MetaType): Meta data.
-            spectral_meta_var (dict): Spectral variables meta.
-
-        Returns:
-            dict: Spectral variables meta.
-
-        """
-        if "SpectralRegDef" in meta and isinstance(meta["SpectralRegDef"], list):
-            spectral_meta_var["abscissa_end"] = [tokens[7] for tokens in meta["SpectralRegDef"] if len(tokens) > self.POS_ABSCISSA_END]
-            spectral_meta_var["collection_time"] = [tokens[10] for tokens in meta["SpectralRegDef"] if len(tokens) > self.POS_COLLECTION_TIME]
-            spectral_meta_var["pass_energy"] = [tokens[11] for tokens in meta["SpectralRegDef"] if len(tokens) > self.POS_PASS_ENERGY]
-
-        return spectral_meta_var
-
-    def _set_metadata_using_spectral_reg_def_3(self, meta: MetaType, spectral_meta_var: dict) -> dict:
-        """Set spectral variable-length metadata part 3.
-
-        Args:
-            meta (MetaType): Meta data.
-            spectral_meta_var (dict): Spectral variables meta.
-
-        Returns:
-            dict: Spectral variables meta.
-
-        """
-        if "SpectralRegDef2" in meta and isinstance(meta["SpectralRegDef2"], list):
+        regions = meta.get("SpectralRegions")
+        if not isinstance(regions, SpectralRegionTable):
+            return spectral_meta_var
+
+        if "SpectralRegDef" in meta:
+            for key in ["peak_name", "transitions", "abscissa_increment", "abscissa_start", "abscissa_end", "collection_time", "pass_energy"]:
+                spectral_meta_var[key] = []
+            for region in regions:
+                peak_name, transitions = self._split_peak_name(region.name)
+                spectral_meta_var["peak_name"].append(peak_name)
+                spectral_meta_var["transitions"].append(transitions)
+                spectral_meta_var["abscissa_increment"].append(region.increment)
+                spectral_meta_var["abscissa_start"].append(region.start)
+                spectral_meta_var["abscissa_end"].append(region.end)
+                spectral_meta_var["collection_time"].append(region.collection_time)
+                spectral_meta_var["pass_energy"].append(region.pass_energy)
+
+        # The sweeps of the "SpectralRegDef2" lines, in their order, with or without "SpectralRegDef".
+        if "SpectralRegDef2" in meta:
             surv_num_cycles_str = meta.get("SurvNumCycles", "1")
             if isinstance(surv_num_cycles_str, str):
                 surv_num_cycles = int(surv_num_cycles_str)
-            spectral_meta_var["total_acquisition_number"] = \
-                [surv_num_cycles * int(tokens[2]) for tokens in meta["SpectralRegDef2"] if len(tokens) > self.POS_TOTAL_ACQUISITION_NUMBER]
-            spectral_meta_var["peak_sweep_number"] = \
-                [tokens[2] for tokens in meta["SpectralRegDef2"] if len(tokens) > self.POS_PEAK_SWEEP_NUMBER]
+            spectral_meta_var["total_acquisition_number"] = [surv_num_cycles * int(sweeps) for sweeps in regions.sweeps]
+            spectral_meta_var["peak_sweep_number"] = list(regions.sweeps)
 
         return spectral_meta_var
 
-    def _set_metadata_using_spectral_reg_def_tok(self, meta: MetaType, spectral_meta_var: dict) -> dict:
-        """Set spectral variable-length metadata (for peak_name, transitions).
+    def _split_peak_name(self, name: str) -> tuple[str, str]:
+        """Split a region name into peak name and transitions.
 
         Args:
-            meta (MetaType): Meta data.
-            spectral_meta_var (dict): Spectral variables meta.
+            name (str): Region name.
 
         Returns:
-            dict: Spectral variables meta.
+            tuple[str, str]: Peak name and transitions.
 
         """
-        if "SpectralRegDef" in meta and isinstance(meta["SpectralRegDef"], list):
-            for str_src in [tok[2] for tok in meta["SpectralRegDef"] if len(tok) > self.POS_PEAK_NAME_TRANSITIONS]:
-                p_tokens1 = re.findall(r"(\d+|\D+)", str_src)
-                if p_tokens1[0] == "Su":
-                    val1 = "Survey"
-                    val2 = ""
-                elif p_tokens1[0] == "Va":  # Does not appear in CSV but only in metadata (RDE 1.0 compliant).
-                    val1 = "Valence"
-                    val2 = ""
-                elif "_" in p_tokens1[0]:
-                    p_tokens2 = p_tokens1[0].split("_", 1)
-                    val1 = p_tokens2[0]
-                    val2 = p_tokens2[1]
-                else:
-                    val1 = p_tokens1[0]
-                    val2 = "".join(p_tokens1[1:])
-                spectral_meta_var["peak_name"].append(val1)
-                spectral_meta_var["transitions"].append(val2)
-
-        return spectral_meta_var
+        p_tokens1 = re.findall(r"(\d+|\D+)", name)
+        if p_tokens1[0] == "Su":
+            return "Survey", ""
+        if p_tokens1[0] == "Va":  # Does not appear in CSV but only in metadata (RDE 1.0 compliant).
+            return "Valence", ""
+        if "_" in p_tokens1[0]:
+            p_tokens2 = p_tokens1[0].split("_", 1)
+            return p_tokens2[0], p_tokens2[1]
+        return p_tokens1[0], "".join(p_tokens1[1:])
 
     def _make_cross_dict(self, spectral_meta_var: dict, depth_meta_var: dict) -> None:
         """Create a cross dictionary by repeating the arrays in Spectral metadata and Depth metadata.
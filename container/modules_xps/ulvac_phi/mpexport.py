@@ -0,0 +1,609 @@
+"""Run MPExport.exe, the ULVAC-PHI raw data export tool.
+
+On Linux MPExport.exe runs under wine. Starting wine cold for every file pays for the wineserver startup
+and the prefix initialisation each time. A long-lived conversion server keeps a persistent wineserver
+and accepts conversion requests over a Unix socket:
+
+    python -m modules_xps.ulvac_phi.mpexport [--socket PATH]
+
+MPExportRunner uses the server when it is running, and otherwise runs wine itself.
+The socket is created in a directory only the user can access, and the runner only connects to
+a socket owned by the user, so that other local users can neither send requests nor answer them.
+Each conversion has a timeout and is retried if it times out or is killed by a signal,
+and its output is written to the log directory.
+
+The text MPExport.exe writes only depends on the raw file, MPExport.exe and the export flags.
+With "mpexport_cache_dir" in rdeconfig.yaml, convert_raw2txt() keeps it in MPExportCache
+and restores it on re-runs without running MPExport.exe.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import signal
+import socket
+import socketserver
+import stat
+import subprocess
+import tempfile
+import time
+from pathlib import Path, PurePath, PureWindowsPath
+from typing import IO, TextIO
+
+from rdetoolkit.models.rde2types import RdeOutputResourcePath
+
+MPEXPORT_BINPATH = Path(__file__).parent.joinpath("MPExport.exe")
+SOCKET_NAME = "rde_xps_mpexport.sock"
+DEFAULT_CACHE_SIZE_MB = 1024
+# Memory assumed for one wine + MPExport.exe process when sizing the conversion pool.
+MEMORY_PER_CONVERSION = 512 << 20
+HASH_CHUNK_SIZE = 1 << 20
+DEFAULT_TIMEOUT = 600.0
+DEFAULT_RETRIES = 2
+DEFAULT_RETRY_BACKOFF = 2.0
+# Seconds the runner waits for the server's answer beyond the conversion timeout.
+SERVER_RESPONSE_GRACE = 10.0
+METRICS_FILE_NAME = "mpexport_metrics.jsonl"
+
+
+def convert_raw2txt(resource_paths: RdeOutputResourcePath, config: dict) -> str:
+    """Convert XPS raw data of PHI to txt in resource_paths.struct.
+
+    Args:
+        resource_paths (RdeOutputResourcePath): Paths to output resources for saving results.
+        config (dict): config data.
+
+    Returns:
+        str: Standard output of execution results. Empty if the text was restored from the cache.
+
+    """
+    rawfile = resource_paths.rawfiles[0]
+    file_path_input: PurePath = rawfile
+    log_dir: PurePath = resource_paths.logs
+    out_dir: PurePath = resource_paths.struct
+    if os.name != "nt":
+        # It seems that even via wine, the delimiter character must be a backslash for windows to be accepted.
+        file_path_input = PureWindowsPath(rawfile)
+        log_dir = PureWindowsPath(resource_paths.logs)
+        out_dir = PureWindowsPath(resource_paths.struct)
+
+    # .ang and .pro needs "-ExportProfile"
+    flags = ["-ExportProfile"] if rawfile.suffix.lower() in [".ang", ".pro"] else []
+    args = [
+        f"-LogFolder:{log_dir}",
+        f"-Filename:{file_path_input}",
+        f"-OutputFolder:{out_dir}",
+        *flags,
+    ]
+    txt_file = resource_paths.struct.joinpath(f"{rawfile.stem}.txt")
+
+    runner = MPExportRunner.from_config(config, resource_paths.logs)
+    cache = MPExportCache.from_config(config)
+    key = cache.key(rawfile, flags) if cache else ""
+    if cache and cache.get(key, txt_file):
+        runner.record(rawfile.name, {"result": "cached"})
+        return ""
+
+    stdout = runner.run(args, rawfile.name)
+    if cache and txt_file.exists():
+        cache.put(key, txt_file)
+    return stdout
+
+
+def max_workers(n_files: int, config: dict) -> int:
+    """Get the number of conversions to run at once.
+
+    "mpexport_workers" in rdeconfig.yaml sets it; otherwise it is bounded by the usable CPU cores
+    and by the available memory.
+
+    Args:
+        n_files (int): Number of files to convert.
+        config (dict): config data.
+
+    Returns:
+        int: Number of workers, at least 1.
+
+    """
+    workers = config["xps"].get("mpexport_workers")
+    if not workers:
+        cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+        workers = min(cores, _available_memory() // MEMORY_PER_CONVERSION or 1)
+    return max(1, min(int(workers), n_files))
+
+
+def _available_memory() -> int:
+    """Get the available physical memory in bytes, or a large value if it is unknown."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 1 << 62
+
+
+class MPExportRunner:
+    """Runs MPExport.exe with a timeout and retries.
+
+    An attempt that does not finish within the timeout is killed together with the processes it started.
+    Attempts that time out or are killed by a signal are retried after backoff, 2 x backoff, ... seconds;
+    other failures are not, since MPExport.exe would fail the same way again.
+    If the conversion server does not answer within the timeout, the attempt times out
+    and the next attempts run wine here.
+    The output of MPExport.exe is written to "<raw file name>_mpexport.log" in the log directory while it runs,
+    and the wall time, attempts and result of each conversion are appended to METRICS_FILE_NAME there.
+
+    Attributes:
+        log_dir (Path): Directory for the output logs and the metrics.
+        socket_path (Path): Socket of the conversion server. Defaults to default_socket_path().
+        timeout (float | None): Seconds allowed for one attempt. None for no limit.
+        retries (int): Number of retries after a failed attempt.
+        backoff (float): Seconds to wait before the first retry.
+
+    """
+
+    def __init__(
+        self,
+        log_dir: Path,
+        socket_path: Path | None = None,
+        timeout: float | None = DEFAULT_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_RETRY_BACKOFF,
+    ):
+        self.log_dir = log_dir
+        self.socket_path = socket_path or default_socket_path()
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._server_failed = False
+
+    @classmethod
+    def from_config(cls, config: dict, log_dir: Path) -> MPExportRunner:
+        """Create the runner set in rdeconfig.yaml.
+
+        Args:
+            config (dict): config data.
+            log_dir (Path): Directory for the output logs and the metrics.
+
+        Returns:
+            MPExportRunner: The runner.
+
+        """
+        xps = config["xps"]
+        timeout = xps.get("mpexport_timeout", DEFAULT_TIMEOUT)
+        return cls(
+            log_dir,
+            Path(xps["mpexport_server"]) if xps.get("mpexport_server") else None,
+            float(timeout) if timeout else None,
+            int(xps.get("mpexport_retries", DEFAULT_RETRIES)),
+            float(xps.get("mpexport_retry_backoff", DEFAULT_RETRY_BACKOFF)),
+        )
+
+    def run(self, args: list[str], name: str) -> str:
+        """Run MPExport.exe with the arguments.
+
+        Args:
+            args (list[str]): Arguments of MPExport.exe.
+            name (str): Name of the converted file, for the logs.
+
+        Returns:
+            str: Output of the successful attempt.
+
+        Raises:
+            subprocess.CalledProcessError: If MPExport.exe fails, or if the last attempt is killed by a signal.
+            subprocess.TimeoutExpired: If the last attempt times out.
+
+        """
+        log_file = self.log_dir.joinpath(f"{name}_mpexport.log")
+        start = time.perf_counter()
+        error: subprocess.SubprocessError | None = None
+        attempts = 0
+        output = ""
+        for attempts in range(1, self.retries + 2):
+            if attempts > 1:
+                time.sleep(self.backoff * 2 ** (attempts - 2))
+            try:
+                output = self._attempt(args, log_file)
+            except subprocess.TimeoutExpired as e:
+                error = e
+            except subprocess.CalledProcessError as e:
+                error = e
+                # Only a process killed by a signal (e.g. by the OOM killer) may succeed on a retry.
+                if e.returncode >= 0:
+                    break
+            else:
+                error = None
+                break
+
+        result = "ok" if error is None else "timeout" if isinstance(error, subprocess.TimeoutExpired) else "failed"
+        self.record(name, {"result": result, "attempts": attempts, "seconds": round(time.perf_counter() - start, 3)})
+        if error is not None:
+            raise error
+        return output
+
+    def record(self, name: str, metrics: dict) -> None:
+        """Append the metrics of a conversion to METRICS_FILE_NAME.
+
+        Args:
+            name (str): Name of the converted file.
+            metrics (dict): Metrics.
+
+        """
+        with open(self.log_dir.joinpath(METRICS_FILE_NAME), "a", encoding="utf_8") as f:
+            f.write(json.dumps({"file": name, **metrics}) + "\n")
+
+    def _attempt(self, args: list[str], log_file: Path) -> str:
+        """Run MPExport.exe once, through the conversion server if it is running.
+
+        Args:
+            args (list[str]): Arguments of MPExport.exe.
+            log_file (Path): The output is appended to this file.
+
+        Returns:
+            str: Output of MPExport.exe.
+
+        Raises:
+            subprocess.CalledProcessError: If MPExport.exe fails.
+            subprocess.TimeoutExpired: If MPExport.exe does not finish within the timeout.
+
+        """
+        cmds = _mpexport_cmds(args)
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        with open(log_file, "a+", encoding="utf_8") as log:
+            log.write(f"$ {' '.join(cmds)}\n")
+            log.flush()
+            offset = log.tell()
+            returncode = self._request(args, log, deadline) if self._server_running() else _run_to_file(cmds, log, self.timeout)
+            log.seek(offset)
+            output = log.read()
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, cmds, output)
+        return output
+
+    def _server_running(self) -> bool:
+        return os.name != "nt" and not self._server_failed and _is_private_socket(self.socket_path)
+
+    def _request(self, args: list[str], log: TextIO, deadline: float | None) -> int:
+        """Send a conversion request to the server and wait for the result.
+
+        If the server cannot be reached or does not answer properly, MPExport.exe is run here instead
+        within the rest of the timeout.
+
+        Args:
+            args (list[str]): Arguments of MPExport.exe.
+            log (TextIO): The output is written to this file.
+            deadline (float | None): time.monotonic() by which the attempt must finish. None for no limit.
+
+        Returns:
+            int: Return code of MPExport.exe.
+
+        Raises:
+            subprocess.TimeoutExpired: If the server killed MPExport.exe at the timeout,
+                or did not answer within the timeout and SERVER_RESPONSE_GRACE.
+
+        """
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout + SERVER_RESPONSE_GRACE if self.timeout else None)
+                sock.connect(str(self.socket_path))
+                with sock.makefile("rw", encoding="utf_8") as f:
+                    f.write(json.dumps({"args": args, "timeout": self.timeout}) + "\n")
+                    f.flush()
+                    response = json.loads(f.readline())
+            output = str(response["output"])
+            returncode = None if response["returncode"] is None else int(response["returncode"])
+        except TimeoutError:
+            # A server that hangs: the attempt has used up its time, and the next ones do not use the server.
+            self._server_failed = True
+            raise subprocess.TimeoutExpired(_mpexport_cmds(args), self.timeout or 0) from None
+        except (OSError, ValueError, KeyError, TypeError):
+            # A socket left by a server that is no longer running, a server that stopped
+            # during the request, or a broken response.
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise subprocess.TimeoutExpired(_mpexport_cmds(args), self.timeout or 0) from None
+            return _run_to_file(_mpexport_cmds(args), log, remaining)
+
+        log.write(output)
+        log.flush()
+        if returncode is None:
+            raise subprocess.TimeoutExpired(_mpexport_cmds(args), self.timeout or 0)
+        return returncode
+
+
+def default_socket_path() -> Path:
+    """Get the default socket of the conversion server.
+
+    It is in XDG_RUNTIME_DIR if set, which only the user can access,
+    and otherwise in a "rde_xps_mpexport-<uid>" directory of the temporary directory.
+
+    Returns:
+        Path: Socket path.
+
+    """
+    if os.name == "nt":
+        # The server only runs under wine.
+        return Path(tempfile.gettempdir()).joinpath(SOCKET_NAME)
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return Path(runtime_dir).joinpath(SOCKET_NAME)
+    return Path(tempfile.gettempdir()).joinpath(f"rde_xps_mpexport-{os.getuid()}", SOCKET_NAME)
+
+
+def _is_private_socket(path: Path) -> bool:
+    """Check that a path is a socket owned by the user, in a directory only the user can write to."""
+    try:
+        socket_stat = path.lstat()
+        dir_stat = path.parent.lstat()
+    except OSError:
+        return False
+    return stat.S_ISSOCK(socket_stat.st_mode) and socket_stat.st_uid == os.getuid() and _is_private_dir(dir_stat)
+
+
+def _is_private_dir(dir_stat: os.stat_result) -> bool:
+    """Check that a directory is owned by the user and only the user can write to it."""
+    return stat.S_ISDIR(dir_stat.st_mode) and dir_stat.st_uid == os.getuid() and not dir_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def _make_private_dir(directory: Path) -> None:
+    """Create the socket directory with mode 0700, or check an existing one.
+
+    Raises:
+        PermissionError: If the directory is not owned by the user or others can write to it.
+
+    """
+    with contextlib.suppress(FileExistsError):
+        directory.mkdir(mode=0o700, parents=True)
+    if not _is_private_dir(directory.lstat()):
+        err_msg = f"The socket directory must be owned by the user and not writable by others: {directory}"
+        raise PermissionError(err_msg)
+
+
+def _mpexport_cmds(args: list[str]) -> list[str]:
+    return [str(MPEXPORT_BINPATH), *args] if os.name == "nt" else ["wine", str(MPEXPORT_BINPATH), *args]
+
+
+def _run_to_file(cmds: list[str], log: IO, timeout: float | None) -> int:
+    """Run a command, writing its output to a file as it is produced.
+
+    Args:
+        cmds (list[str]): Command.
+        log (IO): File for the standard output and error.
+        timeout (float | None): Seconds allowed. None for no limit.
+
+    Returns:
+        int: Return code.
+
+    Raises:
+        subprocess.TimeoutExpired: If the command does not finish within the timeout. It is killed.
+
+    """
+    # In its own session, so that the processes wine starts are killed with it.
+    with subprocess.Popen(cmds, stdout=log, stderr=subprocess.STDOUT, start_new_session=os.name != "nt") as proc:
+        try:
+            return proc.wait(timeout)
+        except subprocess.TimeoutExpired:
+            if os.name != "nt":
+                os.killpg(proc.pid, signal.SIGKILL)
+            else:
+                proc.kill()
+            proc.wait()
+            raise
+
+
+def _run(cmds: list[str], *, check: bool = True) -> subprocess.CompletedProcess[bytes]:
+    """Run a command, discarding its output.
+
+    The output is not captured: a wineserver started by the command inherits the pipes
+    and keeps them open until it exits, so reading them would never finish.
+    """
+    return subprocess.run(
+        cmds,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        check=check,
+    )
+
+
+class MPExportCache:
+    """Size-bounded cache of the text written by MPExport.exe.
+
+    Entries are keyed by the hashes of the raw file and MPExport.exe and by the export flags,
+    and are evicted least recently used first.
+
+    Attributes:
+        directory (Path): Cache directory.
+        max_bytes (int): Total size of the entries is kept within this.
+        compress (bool): Whether entries are gzip-compressed.
+
+    """
+
+    _binary_hash = ""
+
+    def __init__(self, directory: Path, max_bytes: int, compress: bool = True):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, config: dict) -> MPExportCache | None:
+        """Create the cache set in rdeconfig.yaml.
+
+        Args:
+            config (dict): config data.
+
+        Returns:
+            MPExportCache | None: The cache, or None if "mpexport_cache_dir" is not set.
+
+        """
+        directory = config["xps"].get("mpexport_cache_dir")
+        if not directory:
+            return None
+        size_mb = config["xps"].get("mpexport_cache_size", DEFAULT_CACHE_SIZE_MB)
+        return cls(Path(directory), int(size_mb * (1 << 20)), bool(config["xps"].get("mpexport_cache_compress", True)))
+
+    def key(self, rawfile: Path, flags: list[str]) -> str:
+        """Get the cache key of a conversion.
+
+        Args:
+            rawfile (Path): Raw file.
+            flags (list[str]): Export flags of MPExport.exe.
+
+        Returns:
+            str: Cache key.
+
+        """
+        if not MPExportCache._binary_hash:
+            MPExportCache._binary_hash = _file_hash(MPEXPORT_BINPATH)
+        return hashlib.blake2b(
+            "\n".join([_file_hash(rawfile), MPExportCache._binary_hash, *flags]).encode(), digest_size=20,
+        ).hexdigest()
+
+    def get(self, key: str, txt_file: Path) -> bool:
+        """Restore a cached text file.
+
+        Args:
+            key (str): Cache key.
+            txt_file (Path): Where the text file is restored.
+
+        Returns:
+            bool: Whether the entry was found.
+
+        """
+        entry = self._entry(key)
+        try:
+            with (gzip.open(entry) if self.compress else open(entry, "rb")) as src, open(txt_file, "wb") as dst:
+                shutil.copyfileobj(src, dst, HASH_CHUNK_SIZE)
+        except FileNotFoundError:
+            return False
+        except (OSError, EOFError):
+            # A broken entry: convert again.
+            entry.unlink(missing_ok=True)
+            txt_file.unlink(missing_ok=True)
+            return False
+        # Mark as recently used.
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(entry)
+        return True
+
+    def put(self, key: str, txt_file: Path) -> None:
+        """Store a text file and evict the least recently used entries beyond max_bytes.
+
+        Args:
+            key (str): Cache key.
+            txt_file (Path): Text file written by MPExport.exe.
+
+        """
+        entry = self._entry(key)
+        # Write to a temporary file first, so that concurrent readers never see a partial entry.
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, open(txt_file, "rb") as src, \
+                    (gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) if self.compress else raw) as dst:
+                shutil.copyfileobj(src, dst, HASH_CHUNK_SIZE)
+            os.replace(tmp, entry)
+        finally:
+            Path(tmp).unlink(missing_ok=True)
+        self._evict()
+
+    def _entry(self, key: str) -> Path:
+        return self.directory.joinpath(f"{key}.txt.gz" if self.compress else f"{key}.txt")
+
+    def _evict(self) -> None:
+        entries = []
+        for path in self.directory.glob("*.txt*"):
+            with contextlib.suppress(FileNotFoundError):
+                stat = path.stat()
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+def _file_hash(path: Path) -> str:
+    """Hash a file in chunks."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Run one conversion request. Only MPExport.exe can be run; the request holds its arguments."""
+
+    def handle(self) -> None:
+        request = json.loads(self.rfile.readline())
+        cmds = ["wine", str(MPEXPORT_BINPATH), *map(str, request["args"])]
+        timeout = request.get("timeout")
+        with tempfile.TemporaryFile("w+", encoding="utf_8") as log:
+            try:
+                returncode: int | None = _run_to_file(cmds, log, float(timeout) if timeout else None)
+            except subprocess.TimeoutExpired:
+                returncode = None
+            log.seek(0)
+            response = {"cmds": cmds, "returncode": returncode, "output": log.read()}
+        self.wfile.write((json.dumps(response) + "\n").encode("utf_8"))
+
+
+class MPExportServer(socketserver.ThreadingUnixStreamServer):
+    """Conversion server that keeps a persistent wineserver warm for MPExport.exe.
+
+    Requests are handled in parallel, one thread each.
+
+    Attributes:
+        socket_path (Path): Socket the server listens on.
+
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path | None = None):
+        self.socket_path = socket_path or default_socket_path()
+        _make_private_dir(self.socket_path.parent)
+        self.socket_path.unlink(missing_ok=True)
+        # Only the user running the server may send requests: the socket is created without group or other access.
+        umask = os.umask(0o077)
+        try:
+            super().__init__(str(self.socket_path), _RequestHandler)
+        finally:
+            os.umask(umask)
+
+    def serve_forever(self, poll_interval: float = 0.5) -> None:
+        """Start a persistent wineserver and handle requests until shutdown."""
+        _run(["wineserver", "--persistent"])
+        # The first wine run initialises the prefix.
+        _run(["wine", "cmd", "/c", "exit"], check=False)
+        try:
+            super().serve_forever(poll_interval)
+        finally:
+            _run(["wineserver", "--kill"], check=False)
+
+    def server_close(self) -> None:
+        """Close the server and remove its socket."""
+        super().server_close()
+        self.socket_path.unlink(missing_ok=True)
+
+
+def main() -> None:
+    """Run the conversion server."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", type=Path, help="socket to listen on (default: see default_socket_path())")
+    args = parser.parse_args()
+    with MPExportServer(args.socket) as server, contextlib.suppress(KeyboardInterrupt):
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import os.path
 import re
-from collections.abc import Iterable
+from collections.abc import Iterable, Sequence
 from pathlib import Path
 from typing import cast
 
@@ -16,6 +16,8 @@ from rdetoolkit.exceptions import StructuredError
 from rdetoolkit.models.rde2types import MetaType, RdeOutputResourcePath
 
 from modules_xps.graph_handler import GraphPlotter as XpsGraphPlotter
+from modules_xps.interfaces import ProfileCube, SpectrumSet
+from modules_xps.ulvac_phi.spectral_region import SpectralRegionTable
 
 
 class GraphPlotter(XpsGraphPlotter):
@@ -37,7 +39,7 @@ class GraphPlotter(XpsGraphPlotter):
         meta: MetaType,
         data: pd.DataFrame,
         _data_blocks: list[dict],
-        data_atoms: list[dict] | None,
+        data_atoms: Sequence[SpectrumSet] | None,
         config: dict,
     ) -> None:
         """Visualization from PRO or ANG files handled by ULVAC-PHI.
@@ -47,7 +49,7 @@ class GraphPlotter(XpsGraphPlotter):
             meta (dict[str, ExtendMetaType]): Meta data.
             data (pd.DataFrame): All measurement data.
             _data_blocks (list[dict]): unused.
-            data_atoms (list[dict]): Data by atomic.
+            data_atoms (Sequence[SpectrumSet] | None): Spectra by atomic (ProfileCube).
             config (dict): Configuration details.
 
         """
@@ -55,29 +57,28 @@ class GraphPlotter(XpsGraphPlotter):
         plot_options = self._read_plot_options(meta, resource_paths, "intensity")
         self._plot_profile_intensity(data, plot_options)
 
+        cubes = [cube for cube in data_atoms or [] if isinstance(cube, ProfileCube)]
+
         # Spectrum - By atomic
-        if data_atoms is not None:
-            for data_atomic_org in data_atoms:
-                df_cps_org = data_atomic_org.get('df_cps')
-                if df_cps_org is not None:
-                    data_atomic = df_cps_org.astype(float)
-                plot_options = self._read_plot_options(
-                    meta,
-                    resource_paths,
-                    "spectrum",
-                    file_cps=data_atomic_org.get('file_cps'),
-                    columns=data_atomic.columns[1:],
-                )
-                self._plot_profile_spectrum_2d(data_atomic, plot_options)
-                if not config["xps"]["no3dimage"]:
-                    self._plot_profile_spectrum_3d(data_atomic, plot_options)
+        for cube in cubes:
+            data_atomic = cube.cps_frame()
+            plot_options = self._read_plot_options(
+                meta,
+                resource_paths,
+                "spectrum",
+                file_cps=cube.file,
+                columns=data_atomic.columns[1:],
+            )
+            self._plot_profile_spectrum_2d(data_atomic, plot_options)
+            if not config["xps"]["no3dimage"]:
+                self._plot_profile_spectrum_3d(data_atomic, plot_options)
 
         # Spectrum - All
         plot_options = self._read_plot_options(meta, resource_paths, "spectrum_all")
         if data_atoms is not None:
-            self._plot_profile_spectrum_all_2d(data_atoms, plot_options)
+            self._plot_profile_spectrum_all_2d(cubes, plot_options)
             if not config["xps"]["no3dimage"]:
-                self._plot_profile_spectrum_all_3d(data_atoms, plot_options)
+                self._plot_profile_spectrum_all_3d(cubes, plot_options)
 
     def _read_plot_options(
             self,
@@ -122,8 +123,7 @@ class GraphPlotter(XpsGraphPlotter):
                     file_name_ext = Path(os.path.basename(file_cps)).stem.replace(resource_paths.rawfiles[0].stem + '_', '')
                 writefile_2d = os.path.join(resource_paths.other_image, f"{title}.png")
                 writefile_3d = os.path.join(resource_paths.other_image, f"{title}_3d.png")
-                if isinstance(meta["SpectralRegDef"], list):
-                    collection_time = [tokens[10] for tokens in meta["SpectralRegDef"] if tokens[2] == file_name_ext][0]
+                collection_time = SpectralRegionTable.from_meta(meta)[file_name_ext].collection_time
                 if isinstance(columns, Iterable):
                     for v in columns:
                         col_number = re.match(r"^([\d.]+)", v)
@@ -255,31 +255,23 @@ class GraphPlotter(XpsGraphPlotter):
         fig.savefig(plot_options["writefile_3d"])
         plt.close()
 
-    def _plot_profile_spectrum_all_2d(self, data_atoms: list[dict], plot_options: dict) -> None:
+    def _plot_profile_spectrum_all_2d(self, data_atoms: list[ProfileCube], plot_options: dict) -> None:
         """Plot profile spectra all at once, 2D-plot.
 
         Args:
-            data_atoms (list[dict]): All atoms data.
+            data_atoms (list[ProfileCube]): All atoms data.
             plot_options (dict): Plot options data.
 
         """
         fig, ax = plt.subplots()
         fig2, ax2 = plt.subplots()
 
-        for _, data_atomic in enumerate(data_atoms):
-            df_cps_org = data_atomic.get('df_cps')
-            if df_cps_org is not None:
-                df = df_cps_org.astype(float)
-            df_counts_org = data_atomic.get('df_counts')
-            if df_counts_org is not None:
-                df_counts = df_counts_org.astype(float)
-            x = df.iloc[:, 0].values
-            x_counts = df_counts.iloc[:, 0].values
-
-            for i, col_name in enumerate(df.columns[1:][::-1]):
-                ax.plot(x, df[col_name].values, color=f"C{i}")
-                col_name_counts = col_name.replace("cps", "counts")
-                ax2.plot(x_counts, df_counts[col_name_counts].values, color=f"C{i}")
+        for cube in data_atoms:
+            x = cube.energy
+            # The counts of a z value are in the same column as its cps.
+            for i, j in enumerate(range(cube.number_of_spectra - 1, -1, -1)):
+                ax.plot(x, cube.cps[:, j], color=f"C{i}")
+                ax2.plot(x, cube.counts[:, j], color=f"C{i}")
 
         if plot_options["axisInverse_x"]:
             ax.invert_xaxis()
@@ -303,11 +295,11 @@ class GraphPlotter(XpsGraphPlotter):
         writefile = plot_options["writefile_2d"].replace("speall.png", "speall_count.png")
         fig2.savefig(writefile)
 
-    def _plot_profile_spectrum_all_3d(self, data_atoms: list[dict], plot_options: dict) -> None:
+    def _plot_profile_spectrum_all_3d(self, data_atoms: list[ProfileCube], plot_options: dict) -> None:
         """Plot profile spectra all at once, 3D-plot.
 
         Args:
-            data_atoms (list[dict]): All atoms data.
+            data_atoms (list[ProfileCube]): All atoms data.
             plot_options (dict): Plot options data.
 
         """
@@ -317,15 +309,12 @@ class GraphPlotter(XpsGraphPlotter):
         y_list = []
         z_list = []
 
-        for _, data_atomic in enumerate(data_atoms):
-            df_cps_org = data_atomic.get('df_cps')
-            if df_cps_org is not None:
-                df = df_cps_org.astype(float)
-            x = df.iloc[:, 0].values
+        for cube in data_atoms:
+            x = cube.energy
             x_list += list(x)
 
-            for i, col_name in enumerate(df.columns[1:][::-1]):
-                y = df[col_name].values
+            for i, (j, col_name) in enumerate(list(enumerate(cube.columns[1:1 + cube.number_of_spectra]))[::-1]):
+                y = cube.cps[:, j]
                 y_list += list(y)
                 # Extract the leading numbers from col as z value
                 col_begin_float = re.match(r"^([\d.]+)", col_name)
@@ -1,17 +1,19 @@
 from __future__ import annotations
 
-import os
 import re
-import subprocess
-from pathlib import Path, PureWindowsPath
+from collections.abc import Iterator
+from pathlib import Path
 
 import numpy as np
 import pandas as pd
 from rdetoolkit.exceptions import StructuredError
 from rdetoolkit.models.rde2types import MetaType, RdeOutputResourcePath
-from rdetoolkit.rde2util import CharDecEncoding
 
 from modules_xps.inputfile_handler import FileReader as XpsFileReader
+from modules_xps.inputfile_handler import FrameBuilder, iter_text_blocks, parse_csv_lines
+from modules_xps.interfaces import ProfileCube
+from modules_xps.ulvac_phi.mpexport import convert_raw2txt
+from modules_xps.ulvac_phi.spectral_region import SpectralRegionTable
 
 
 class FileReader(XpsFileReader):
@@ -23,13 +25,12 @@ class FileReader(XpsFileReader):
     """
 
     COLUMNS_CPS_DATA = 2
-    MPEXPORT_BINPATH = Path(__file__).parent.parent.joinpath("MPExport.exe")
 
     def __init__(self, config: dict):
         super().__init__(config)
         self.meta: MetaType = {}
 
-    def read(self, resource_paths: RdeOutputResourcePath) -> tuple[MetaType, pd.DataFrame, list[dict], list[dict]]:
+    def read(self, resource_paths: RdeOutputResourcePath) -> tuple[MetaType, pd.DataFrame, list[dict], list[ProfileCube]]:
         """Read the structured file and returns separated data and metadata.
 
         Args:
@@ -39,59 +40,94 @@ class FileReader(XpsFileReader):
             MetaType: Meta data.
             pd.DataFrame: All measurement data.
             list[dict]: Block-by-Block additional data.
-            list[dict]: Data by atomic.
-                file_cps: Intensity(cps) file name.
-                df_cps: Intensity(cps) dataframe.
-                file_counts: Intensity(counts) file name.
-                df_counts: Intensity(counts) dataframe.
+            list[ProfileCube]: Spectra by atomic.
 
         Raises:
             StructuredError: If the file is formatted incorrectly.
 
         """
-        self.meta, data_org, data_blocks = self._read_tmp_txt(resource_paths.struct.joinpath(f"{resource_paths.rawfiles[0].stem}.txt"))
+        self.meta, data_org, data_blocks, data_text = self._read_tmp_txt(resource_paths.struct.joinpath(f"{resource_paths.rawfiles[0].stem}.txt"))
 
-        # Merge profile data for all energy levels
-        df_singles = []
-        for data_block, data_single in zip(data_blocks, data_org):
-            if data_block["is_profile"]:
-                file_name_ext = data_block["AtomicName"]
-
-                # convert numerical data from csv-text to data frame
-                zlabel = ""
-                if isinstance(self.meta["zlabelname"], str) and isinstance(self.meta["zlabelunit"], str):
-                    zlabel = self.meta["zlabelname"] + " (" + self.meta["zlabelunit"] + ")"
-                columns = [zlabel, file_name_ext + "_Intensity (arb.units)"]
-                df_single = pd.DataFrame(data_single, columns=columns)
-                df_singles.append(df_single)
-
-        if len(df_singles) == 0:
+        profiles = [
+            (data_block["AtomicName"], data_single, lines)
+            for data_block, data_single, lines in zip(data_blocks, data_org, data_text, strict=True)
+            if data_block["is_profile"]
+        ]
+        if len(profiles) == 0:
             err_msg = "Profile mode was selected, but not found profile data"
             raise StructuredError(err_msg)
 
-        # Merge all data frames using the first column of each data frame as a common index
-        data = pd.concat(
-            [df.set_index(df.columns[0]) for df in df_singles], axis=1,
-        )
-        # Insert index column into data
-        data.reset_index(inplace=True)
+        # Merge profile data for all energy levels
+        zlabel = ""
+        if isinstance(self.meta["zlabelname"], str) and isinstance(self.meta["zlabelunit"], str):
+            zlabel = self.meta["zlabelname"] + " (" + self.meta["zlabelunit"] + ")"
+        columns = [zlabel] + [file_name_ext + "_Intensity (arb.units)" for file_name_ext, _, _ in profiles]
+        # The profiles usually share the z values; only otherwise are they joined on them.
+        z_lists = [[line.split(",", 1)[0] for line in lines] for _, _, lines in profiles]
+        aligned = all(z_list == z_lists[0] for z_list in z_lists[1:])
+        data = self._stack_profiles(profiles, columns) if aligned else self._merge_profiles(profiles, columns)
 
         # save spectrum data for each energy level
-        z_list = data.iloc[:, 0].values
+        z_list = [line.split(",", 1)[0] for line in data.attrs["lines"]]
 
         data_atoms = []
-        for data_block, data_single in zip(data_blocks, data_org):
+        for data_block, data_single, lines in zip(data_blocks, data_org, data_text, strict=True):
             if not data_block["is_profile"]:
-                atomic_data = self._save_spectrum_data(
+                data_atoms.append(self._save_spectrum_data(
                     data_block,
                     data_single,
+                    lines,
                     resource_paths,
                     z_list,
-                )
-                data_atoms.append(atomic_data)
+                ))
 
         return self.meta, data, data_blocks, data_atoms
 
+    def _stack_profiles(self, profiles: list[tuple[str, np.ndarray, list[str]]], columns: list[str]) -> pd.DataFrame:
+        """Merge profiles that share the same z values, the usual case, by placing them side by side.
+
+        Args:
+            profiles (list[tuple[str, np.ndarray, list[str]]]): Name, values and text lines of each profile.
+            columns (list[str]): Column names.
+
+        Returns:
+            pd.DataFrame: Merged profile data. attrs["lines"] holds the rows as they are in the text.
+
+        """
+        _, first, first_lines = profiles[0]
+        builder = FrameBuilder(len(first), len(columns), columns=columns)
+        builder.put(first)
+        for i, (_, data_single, _) in enumerate(profiles[1:], start=2):
+            builder.put(data_single[:, 1:], column=i)
+        data = builder.to_frame()
+        data.attrs["lines"] = [
+            ",".join([line, *(lines[row].split(",", 1)[1] for _, _, lines in profiles[1:])])
+            for row, line in enumerate(first_lines)
+        ]
+        return data
+
+    def _merge_profiles(self, profiles: list[tuple[str, np.ndarray, list[str]]], columns: list[str]) -> pd.DataFrame:
+        """Merge profiles with different z values on the z values as they are in the text (outer join).
+
+        Args:
+            profiles (list[tuple[str, np.ndarray, list[str]]]): Name, values and text lines of each profile.
+            columns (list[str]): Column names.
+
+        Returns:
+            pd.DataFrame: Merged profile data. attrs["lines"] holds the rows as they are in the text.
+
+        """
+        df_singles = [pd.DataFrame([line.split(",") for line in lines], columns=[columns[0], column]) for (_, _, lines), column in zip(profiles, columns[1:], strict=True)]
+        # Merge all data frames using the first column of each data frame as a common index
+        merged = pd.concat(
+            [df.set_index(df.columns[0]) for df in df_singles], axis=1,
+        )
+        # Insert index column into data
+        merged.reset_index(inplace=True)
+        data = merged.astype(float)
+        data.attrs["lines"] = merged.to_csv(index=False, header=False, lineterminator="\n").splitlines()
+        return data
+
     def convert_raw2txt_with_wine(self, resource_paths: RdeOutputResourcePath) -> str:
         """Convert XPS raw data of PHI to txt.
 
@@ -102,37 +138,9 @@ class FileReader(XpsFileReader):
             bytes: Standard output of execution results.
 
         """
-        if os.name != "nt":
-            cmds = ["wine"]
-            # It seems that even via wine, the delimiter character must be a backslash for windows to be accepted.
-            file_path_input = PureWindowsPath(resource_paths.rawfiles[0])
-            log_dir = PureWindowsPath(resource_paths.logs)
-            out_dir = PureWindowsPath(resource_paths.struct)
-        else:
-            cmds = []
-            file_path_input = resource_paths.rawfiles[0]  # type: ignore
-            log_dir = resource_paths.logs  # type: ignore
-            out_dir = resource_paths.struct  # type: ignore
-
-        cmds += [
-            str(self.MPEXPORT_BINPATH),
-            f"-LogFolder:{log_dir}",
-            f"-Filename:{file_path_input}",
-            f"-OutputFolder:{out_dir}",
-        ]
-        # .ang and .pro needs "-ExportProfile"
-        if resource_paths.rawfiles[0].suffix.lower() in [".ang", ".pro"]:
-            cmds += ["-ExportProfile"]
-
-        res = subprocess.run(
-            cmds,
-            encoding="utf_8",
-            capture_output=True,
-            check=True,
-        )
-        return res.stdout
+        return convert_raw2txt(resource_paths, self.config)
 
-    def _read_tmp_txt(self, txt_file_path: Path) -> tuple[MetaType, pd.DataFrame, list[dict]]:
+    def _read_tmp_txt(self, txt_file_path: Path) -> tuple[MetaType, list, list[dict], list[list[str]]]:
         """Split a text file into multiple data blocks.
 
         The header information is then obtained from the first block,
@@ -143,19 +151,21 @@ class FileReader(XpsFileReader):
 
         Returns:
             dict[str, ExtendMetaType]: Meta data.
-            pd.DataFrame: All measurement data.
+            list: Values of each block.
             list[dict]: Block-by-Block additional data.
+            list[list[str]]: Text lines of the values of each block.
 
         """
         # Split a text file into multiple data blocks
         text_blocks = self._split_text_file(txt_file_path, "//Area Comment")
 
-        # Get meta information from text_block_list[0]
-        self.meta = self._text_block_to_meta(text_blocks[0])
+        # Get meta information from the first block
+        self.meta = self._text_block_to_meta(next(text_blocks, []))
 
         data = []
         data_blocks = []
-        for text_block in text_blocks[1:]:
+        data_text = []
+        for text_block in text_blocks:
             # Decompose into header and numeric data
             spectral_data_meta = self._data_block_to_meta(text_block)
             num_header = len(spectral_data_meta)
@@ -166,14 +176,13 @@ class FileReader(XpsFileReader):
                 if isinstance(spectral_data_meta["XLabel"], str) \
                 else False
 
-            # Convert numerical data from csv-text to data frame
-            numerical_data = [text.split(",") for text in text_block[num_header + 1:] if text != ""]
-
-            data_array = np.array(numerical_data)
+            # Parse the numerical data once; the text is kept for the CSV files.
+            lines = [text for text in text_block[num_header + 1:] if text != ""]
 
             # Store in data, data_blocks
-            data.append(data_array)
+            data.append(parse_csv_lines(lines))
             data_blocks.append(spectral_data_meta)
+            data_text.append(lines)
 
         for spectral_data_meta in data_blocks:
             # Obtain meta-information about the x-, y- and z-axes
@@ -209,34 +218,22 @@ class FileReader(XpsFileReader):
                 }
             self.meta.update(dict_axis)
 
-        return self.meta, data, data_blocks
+        return self.meta, data, data_blocks, data_text
 
-    def _split_text_file(self, filename: Path, separator: str) -> list[list[str]]:
+    def _split_text_file(self, filename: Path, separator: str) -> Iterator[list[str]]:
         """Split a text file into multiple data blocks using a specified separator.
 
+        The blocks are read one by one as they are iterated.
+
         Args:
             filename (Path): Txt data file path.
             separator (str): Separator.
 
         Returns:
-            list[list[str]]: Txt data block.
+            Iterator[list[str]]: Txt data block.
 
         """
-        text_blocks = []
-        enc = CharDecEncoding.detect_text_file_encoding(filename)
-        with open(filename, encoding=enc) as file:
-            lines = file.readlines()
-            sublist: list = []
-            for line in lines:
-                if line.startswith(separator):
-                    if sublist:
-                        text_blocks.append(sublist)
-                    sublist = [line.rstrip()]
-                else:
-                    sublist.append(line.rstrip())
-            if sublist:
-                text_blocks.append(sublist)
-        return text_blocks
+        return iter_text_blocks(filename, separator)
 
     def _text_block_to_meta(self, text_block: list[str]) -> dict:
         """Get meta information from a text data block.
@@ -276,6 +273,9 @@ class FileReader(XpsFileReader):
                     if v != "":
                         dct_hdr_one[k] = v
 
+        # Regions are looked up by name when reading, parsing the meta data and plotting.
+        dct_hdr_one["SpectralRegions"] = SpectralRegionTable.from_tokens(dct_hdr_one.get("SpectralRegDef", []), dct_hdr_one.get("SpectralRegDef2", []))
+
         return dct_hdr_one
 
     def _data_block_to_meta(self, text_block: list[str]) -> dict[str, str | bool]:
@@ -341,23 +341,25 @@ class FileReader(XpsFileReader):
     def _save_spectrum_data(
             self,
             data_block: dict,
-            data_single: pd.DataFrame,
+            data_single: np.ndarray,
+            lines: list[str],
             resource_paths: RdeOutputResourcePath,
             z_list: list[str],
-    ) -> dict[str, Path | pd.DataFrame]:
-        """Save spectrum data block in CSV format.
+    ) -> ProfileCube:
+        """Make the spectrum data of a region for the CSV files and graphs.
 
         Args:
             data_block (dict): Additional data per atomic.
-            data_single (pd.DataFrame): Dataframe per atomic.
+            data_single (np.ndarray): Values per atomic.
+            lines (list[str]): Text lines of the values per atomic.
             resource_paths (RdeOutputResourcePath): For path where structuredtext is saved.
             z_list (list(str)): Z values for multiple spectral data.
 
         Returns:
-            file_cps: Intensity(cps) file name.
-            df_cps: Intensity(cps) dataframe.
-            file_counts: Intensity(counts) file name.
-            df_counts: Intensity(counts) dataframe.
+            ProfileCube: Energy, cps and counts of each z value.
+
+        Raises:
+            StructuredError: If the number of spectra does not match the z values.
 
         """
         file_name_ext = data_block["AtomicName"]
@@ -368,23 +370,26 @@ class FileReader(XpsFileReader):
         zlabel_unit = str(self.meta["zlabelunit"])
 
         columns = [xlabel] + [f"{float(z):.6g}" + zlabel_unit + "_" + ylabel for z in z_list]
+        if data_single.shape[1] != len(columns):
+            err_msg = f"Number of spectra does not match the profile: {file_name_ext}"
+            raise StructuredError(err_msg)
 
-        df_cps = pd.DataFrame(data_single, columns=columns)
-
-        # Output string data while keeping the number of significant digits
+        # Output the values as they are in the text, keeping the number of significant digits
         file_cps = resource_paths.struct.joinpath(f"{resource_paths.rawfiles[0].stem}_{file_name_ext}.csv")
 
         if "(cps)" in ylabel:
             ylabel = ylabel.replace('(cps)', '(counts)')
-            columns = [xlabel] + [f"{float(z):.6g}" + zlabel_unit + "_" + ylabel for z in z_list]
-            df_counts_org = pd.DataFrame(data_single, columns=columns)
-            df_counts = df_counts_org.iloc[:, 0]  # df_counts_x
-            if isinstance(self.meta["SpectralRegDef"], list):
-                collection_time = [tokens[10] for tokens in self.meta["SpectralRegDef"] if tokens[2] == file_name_ext]
-            df_counts_y = df_counts_org.iloc[:, 1:].astype("float") * float(collection_time[0])
-            for col in df_counts_y.columns:
-                df_counts_y_float = df_counts_y[col].map(lambda x: f'{x:.4f}')
-                df_counts = pd.concat([df_counts, df_counts_y_float], axis=1)
+            columns += [f"{float(z):.6g}" + zlabel_unit + "_" + ylabel for z in z_list]
+            collection_time = SpectralRegionTable.from_meta(self.meta)[file_name_ext].collection_time
+            counts = data_single[:, 1:] * float(collection_time)
             file_counts = resource_paths.struct.joinpath(f"{resource_paths.rawfiles[0].stem}_{file_name_ext}_count.csv")
 
-        return {"file_cps": file_cps, "df_cps": df_cps, "file_counts": file_counts, "df_counts": df_counts}
+        return ProfileCube(
+            name=file_name_ext,
+            values=np.column_stack((data_single, counts)),
+            columns=columns,
+            file=file_cps,
+            lines=lines,
+            z=np.array(z_list, dtype=np.float64),
+            counts_file=file_counts,
+        )
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import os.path
+from collections.abc import Sequence
 from pathlib import Path
 from typing import cast
 
@@ -10,6 +11,7 @@ from rdetoolkit.exceptions import StructuredError
 from rdetoolkit.models.rde2types import MetaType, RdeOutputResourcePath
 
 from modules_xps.graph_handler import GraphPlotter as XpsGraphPlotter
+from modules_xps.interfaces import SpectrumSet
 
 
 class GraphPlotter(XpsGraphPlotter):
@@ -35,7 +37,7 @@ class GraphPlotter(XpsGraphPlotter):
         _meta: MetaType,
         data: pd.DataFrame,
         data_blocks: list[dict],
-        data_atoms: list[dict] | None,
+        data_atoms: Sequence[SpectrumSet] | None,
         _config: dict,
     ) -> None:
         """Visualization from SPE files handled by ULVAC-PHI.
@@ -45,11 +47,11 @@ class GraphPlotter(XpsGraphPlotter):
             _meta (MetaType): unused.
             data (pd.DataFrame): All measurement data.
             data_blocks (list[dict]): Block-by-Block additional data.
-            data_atoms (list[dict] | None): Data by atomic.
+            data_atoms (Sequence[SpectrumSet] | None): Spectrum by atomic.
             _config (dict): Configuration details.
 
         """
-        if not isinstance(data_atoms, list):
+        if data_atoms is None:
             err_msg = "ERROR in graph_handler: No data available."
             raise StructuredError(err_msg)
 
@@ -67,7 +69,7 @@ class GraphPlotter(XpsGraphPlotter):
         self,
         resource_paths: RdeOutputResourcePath,
         data_blocks: list[dict],
-        data_atoms: list[dict],
+        data_atoms: Sequence[SpectrumSet],
         columns: list | None = None,
     ) -> tuple[dict, bool]:
         """Set optional information necessary for plots.
@@ -75,7 +77,7 @@ class GraphPlotter(XpsGraphPlotter):
         Args:
             resource_paths (RdeOutputResourcePath): List of RDE output paths.
             data_blocks (list[dict]): Block-by-Block additional data.
-            data_atoms (list[dict]): Data by atomic.
+            data_atoms (Sequence[SpectrumSet]): Spectrum by atomic.
             columns: (list | None): Dataframe columns.
 
         Return:
@@ -83,12 +85,7 @@ class GraphPlotter(XpsGraphPlotter):
 
         """
         title = resource_paths.rawfiles[0].stem
-        legend_list = []
-        if data_atoms is not None:
-            legend_list = [
-                Path(os.path.basename(str(f.get('file')))).stem.replace(resource_paths.rawfiles[0].stem + '_', '')
-                for f in data_atoms
-            ]
+        legend_list = [spectrum.file.stem.replace(resource_paths.rawfiles[0].stem + '_', '') for spectrum in data_atoms]
         axis = columns[0].split("(") if columns is not None else ""
         axis_name_x = axis[0].strip()
         axis_unit_x = axis[1].strip().rstrip(")")
@@ -117,7 +114,7 @@ class GraphPlotter(XpsGraphPlotter):
 
     def _plot_main_image(
         self,
-        data_atoms: list[dict],
+        data_atoms: Sequence[SpectrumSet],
         resource_paths: RdeOutputResourcePath,
         file_base_name: str,
         plot_options: dict,
@@ -125,7 +122,7 @@ class GraphPlotter(XpsGraphPlotter):
         """Plot main image.
 
         Args:
-            data_atoms (list[dict]): Data by atomic.
+            data_atoms (Sequence[SpectrumSet]): Spectrum by atomic.
             resource_paths (RdeOutputResourcePath): List of RDE output paths.
             file_base_name (str): Output file name.
             plot_options (dict): Plot options data.
@@ -143,7 +140,7 @@ class GraphPlotter(XpsGraphPlotter):
 
     def _plot_other_image(
         self,
-        data_atoms_org: list[dict],
+        data_atoms_org: Sequence[SpectrumSet],
         resource_paths: RdeOutputResourcePath,
         file_base_name: str,
         plot_options: dict,
@@ -151,7 +148,7 @@ class GraphPlotter(XpsGraphPlotter):
         """Plot other image.
 
         Args:
-            data_atoms_org (list[dict]): Data by atomic.
+            data_atoms_org (Sequence[SpectrumSet]): Spectrum by atomic.
             resource_paths (RdeOutputResourcePath): List of RDE output paths.
             file_base_name (str): Output file name.
             plot_options (dict): Plot options data.
@@ -165,14 +162,14 @@ class GraphPlotter(XpsGraphPlotter):
             raise StructuredError(err_msg)
 
         for legend, data_atom_org in zip(plot_options["legend"], data_atoms_org):
-            df_atom = data_atom_org['df'].astype(float)
+            df_atom = data_atom_org.frame()
             graph_title_other_image = f"{file_base_name}_{legend}"
             file_path_other_image = os.path.join(resource_paths.other_image, f"{file_base_name}_{legend}.png")
             self._write_graph_other_image(df_atom, plot_options, graph_title_other_image, file_path_other_image)
 
     def _write_graph_main_image(
         self,
-        data_atoms: list[dict],
+        data_atoms: Sequence[SpectrumSet],
         plot_options: dict,
         graph_title_org: str,
         png_file_path: str,
@@ -180,7 +177,7 @@ class GraphPlotter(XpsGraphPlotter):
         """Write graph image from Intensity cps.
 
         Args:
-            data_atoms (list[dict]): Data by atomic.
+            data_atoms (Sequence[SpectrumSet]): Spectrum by atomic.
             plot_options (dict): Plot options data.
             graph_title_org (str): Graph title.
             png_file_path (Path): Output file path.
@@ -204,7 +201,7 @@ class GraphPlotter(XpsGraphPlotter):
         min_c = 0
         max_c = 0
         for i_legend, data_atom_org in enumerate(data_atoms):
-            df = data_atom_org['df'].astype(float)
+            df = data_atom_org.frame()
             ax.plot(
                 x_factor * df.iloc[:, 0],
                 y_factor * df.iloc[:, 1],
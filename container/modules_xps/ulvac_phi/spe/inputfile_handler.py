@@ -1,16 +1,18 @@
 from __future__ import annotations
 
-import os
 import re
-import subprocess
-from pathlib import Path, PureWindowsPath
+from collections.abc import Iterator
+from pathlib import Path
 
 import numpy as np
 import pandas as pd
 from rdetoolkit.models.rde2types import MetaType, RdeOutputResourcePath
-from rdetoolkit.rde2util import CharDecEncoding
 
 from modules_xps.inputfile_handler import FileReader as XpsFileReader
+from modules_xps.inputfile_handler import FrameBuilder, iter_text_blocks, parse_csv_lines
+from modules_xps.interfaces import SpectrumSet
+from modules_xps.ulvac_phi.mpexport import convert_raw2txt
+from modules_xps.ulvac_phi.spectral_region import SpectralRegionTable
 
 
 class FileReader(XpsFileReader):
@@ -21,14 +23,13 @@ class FileReader(XpsFileReader):
 
     """
 
-    MPEXPORT_BINPATH = Path(__file__).parent.parent.joinpath("MPExport.exe")
     TOKEN_KEY_VALUE = 2
 
     def __init__(self, config: dict):
         super().__init__(config)
         self.meta: MetaType = {}
 
-    def read(self, resource_paths: RdeOutputResourcePath) -> tuple[MetaType, pd.DataFrame, list[dict], list[dict]]:
+    def read(self, resource_paths: RdeOutputResourcePath) -> tuple[MetaType, pd.DataFrame, list[dict], list[SpectrumSet]]:
         """Read the structured file and returns separated data and metadata.
 
         Args:
@@ -38,34 +39,37 @@ class FileReader(XpsFileReader):
             MetaType: Meta data.
             pd.DataFrame: All measurement data.
             list[dict]: Block-by-Block additional data.
-            list[dict]: Data by atomic.
-                file_cps: Intensity(cps) file name.
-                df_cps: Intensity(cps) dataframe.
-                file_counts: Intensity(counts) file name.
-                df_counts: Intensity(counts) dataframe.
+            list[SpectrumSet]: Spectrum by atomic.
 
         Raises:
             StructuredError: If the file is formatted incorrectly.
 
         """
-        data = pd.DataFrame()
-        data_atoms = []
+        data_atoms: list[SpectrumSet] = []
 
-        self.meta, data_org, data_blocks = self._read_tmp_txt(resource_paths.struct.joinpath(f"{resource_paths.rawfiles[0].stem}.txt"))
+        self.meta, data_org, data_blocks, data_text = self._read_tmp_txt(resource_paths.struct.joinpath(f"{resource_paths.rawfiles[0].stem}.txt"))
 
         x_label = self.meta.get("xlabel", "x")
         y_label = self.meta.get("ylabel", "y")
-        for data_single, data_block in zip(data_org, data_blocks):
-            file_name_ext = data_block["AtomicName"]
-            if isinstance(self.meta["SpectralRegDef"], list):
-                collection_time = [tokens[10] for tokens in self.meta["SpectralRegDef"] if tokens[2] == file_name_ext]
-            df_single = pd.DataFrame(data_single, columns=[x_label, y_label])
-            df_single["Intensity (counts)"] = df_single["Intensity (cps)"].astype("float") * float(collection_time[0])
-            df_single['Intensity (counts)'] = df_single['Intensity (counts)'].map(lambda x: f'{x:.4f}')
-            df_atomic = pd.DataFrame(df_single, columns=[x_label, y_label, "Intensity (counts)"])
+        # The regions are stacked vertically; the buffer is sized by the total number of rows.
+        columns = [str(x_label), str(y_label), "Intensity (counts)"]
+        builder = FrameBuilder(sum(len(data_single) for data_single in data_org), 3, columns=columns)
+        regions = SpectralRegionTable.from_meta(self.meta)
+        row = 0
+        for data_single, data_block, lines in zip(data_org, data_blocks, data_text, strict=True):
+            collection_time = regions[data_block["AtomicName"]].collection_time
+            counts = data_single[:, 1] * float(collection_time)
+            builder.put(np.column_stack((data_single, counts)), row=row)
             writefile = resource_paths.struct.joinpath(f"{resource_paths.rawfiles[0].stem}_{data_block['AtomicName']}.csv")
-            data = pd.concat([data, df_atomic], ignore_index=True)
-            data_atoms.append({"kind": "cps", "file": writefile, "df": df_atomic})
+            data_atoms.append(SpectrumSet(
+                name=data_block["AtomicName"],
+                values=builder.buffer[row:row + len(data_single)],
+                columns=columns,
+                file=writefile,
+                lines=lines,
+            ))
+            row += len(data_single)
+        data = builder.to_frame()
 
         return self.meta, data, data_blocks, data_atoms
 
@@ -79,37 +83,9 @@ class FileReader(XpsFileReader):
             bytes: Standard output of execution results.
 
         """
-        if os.name != "nt":
-            cmds = ["wine"]
-            # It seems that even via wine, the delimiter character must be a backslash for windows to be accepted.
-            file_path_input = PureWindowsPath(resource_paths.rawfiles[0])
-            log_dir = PureWindowsPath(resource_paths.logs)
-            out_dir = PureWindowsPath(resource_paths.struct)
-        else:
-            cmds = []
-            file_path_input = resource_paths.rawfiles[0]  # type: ignore
-            log_dir = resource_paths.logs  # type: ignore
-            out_dir = resource_paths.struct  # type: ignore
-
-        cmds += [
-            str(self.MPEXPORT_BINPATH),
-            f"-LogFolder:{log_dir}",
-            f"-Filename:{file_path_input}",
-            f"-OutputFolder:{out_dir}",
-        ]
-        # .ang and .pro needs "-ExportProfile"
-        if resource_paths.rawfiles[0].suffix.lower() in [".ang", ".pro"]:
-            cmds += ["-ExportProfile"]
-
-        res = subprocess.run(
-            cmds,
-            encoding="utf_8",
-            capture_output=True,
-            check=True,
-        )
-        return res.stdout
-
-    def _read_tmp_txt(self, txt_file_path: Path) -> tuple[MetaType, pd.DataFrame, list[dict]]:
+        return convert_raw2txt(resource_paths, self.config)
+
+    def _read_tmp_txt(self, txt_file_path: Path) -> tuple[MetaType, list, list[dict], list[list[str]]]:
         """Split a text file into multiple data blocks.
 
         The header information is then obtained from the first block,
@@ -120,19 +96,21 @@ class FileReader(XpsFileReader):
 
         Returns:
             dict[str, ExtendMetaType]: Meta data.
-            pd.DataFrame: All measurement data.
+            list: Values of each block.
             list[dict]: Block-by-Block additional data.
+            list[list[str]]: Text lines of the values of each block.
 
         """
         # Split a text file into multiple data blocks
         text_block_list = self._split_text_file(txt_file_path, "//Area Comment")
 
-        # Get meta information from text_block_list[0]
-        dct_hdr = self._text_block_to_meta(text_block_list[0])
+        # Get meta information from the first block
+        dct_hdr = self._text_block_to_meta(next(text_block_list, []))
 
         data = []
         data_blocks = []
-        for text_block in text_block_list[1:]:
+        data_text = []
+        for text_block in text_block_list:
             # Decompose into header and numeric data
             spectral_data_meta = self._data_block_to_meta(text_block)
             num_header = len(spectral_data_meta)
@@ -143,14 +121,13 @@ class FileReader(XpsFileReader):
                 if isinstance(spectral_data_meta["XLabel"], str) \
                 else False
 
-            # convert numerical data from csv-text to data frame
-            numerical_data = [text.split(",") for text in text_block[num_header + 1:] if text != ""]
-
-            data_array = np.array(numerical_data)
+            # Parse the numerical data once; the text is kept for the CSV files.
+            lines = [text for text in text_block[num_header + 1:] if text != ""]
 
             # Store in dataBlocks as [header, numerical data]
-            data.append(data_array)
+            data.append(parse_csv_lines(lines))
             data_blocks.append(spectral_data_meta)
+            data_text.append(lines)
 
         for spectral_data_meta in data_blocks:
             # Obtain meta-information about the x-, y- and z-axes
@@ -188,34 +165,22 @@ class FileReader(XpsFileReader):
 
         # Header object list is converted to a single object.
         # Only the first object is to be retained. (From existing templates.)
-        return dct_hdr[0], data, data_blocks
+        return dct_hdr[0], data, data_blocks, data_text
 
-    def _split_text_file(self, filename: Path, separator: str) -> list[list[str]]:
+    def _split_text_file(self, filename: Path, separator: str) -> Iterator[list[str]]:
         """Split a text file into multiple data blocks using a specified separator.
 
+        The blocks are read one by one as they are iterated.
+
         Args:
             filename (Path): Txt data file path.
             separator (str): Separator.
 
         Returns:
-            list[list[str]]: Txt data block.
+            Iterator[list[str]]: Txt data block.
 
         """
-        text_blocks = []
-        enc = CharDecEncoding.detect_text_file_encoding(filename)
-        with open(filename, encoding=enc) as file:
-            lines = file.readlines()
-            sublist: list = []
-            for line in lines:
-                if line.startswith(separator):
-                    if sublist:
-                        text_blocks.append(sublist)
-                    sublist = [line.rstrip()]
-                else:
-                    sublist.append(line.rstrip())
-            if sublist:
-                text_blocks.append(sublist)
-        return text_blocks
+        return iter_text_blocks(filename, separator)
 
     def _text_block_to_meta(self, text_block: list[str]) -> list[dict]:
         """Get meta information from a text data block.
@@ -256,6 +221,9 @@ class FileReader(XpsFileReader):
                     if v != "":
                         dct_hdr_one[k] = v
 
+        # Regions are looked up by name when reading, parsing the meta data and plotting.
+        dct_hdr_one["SpectralRegions"] = SpectralRegionTable.from_tokens(dct_hdr_one.get("SpectralRegDef", []), dct_hdr_one.get("SpectralRegDef2", []))
+
         dct_hdr.append(dct_hdr_one)
         return dct_hdr
 
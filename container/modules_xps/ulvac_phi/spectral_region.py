@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+
+from rdetoolkit.exceptions import StructuredError
+from rdetoolkit.models.rde2types import MetaType
+
+
+@dataclass(frozen=True)
+class SpectralRegion:
+    """Acquisition region of a ULVAC-PHI measurement.
+
+    The values are kept as written in the header, since the metadata stores them as they are.
+
+    Attributes:
+        number (str): Region number.
+        name (str): Region name, e.g. "C1s" ("Survey" for "Su1s").
+        number_of_points (str): Number of energy points.
+        increment (str): Energy step.
+        start (str): Start energy.
+        end (str): End energy.
+        collection_time (str): Collection time per point (s).
+        pass_energy (str): Pass energy (eV).
+
+    """
+
+    number: str
+    name: str
+    number_of_points: str
+    increment: str
+    start: str
+    end: str
+    collection_time: str
+    pass_energy: str
+
+
+@dataclass
+class SpectralRegionTable:
+    """Regions of a ULVAC-PHI measurement in header order, indexed by name.
+
+    Built once by FileReader._text_block_to_meta from the "SpectralRegDef" and "SpectralRegDef2" lines
+    and stored in the meta data as "SpectralRegions", for the readers, the meta parser and the graph plotters.
+
+    Attributes:
+        regions (list[SpectralRegion]): Regions.
+        sweeps (list[str]): Number of sweeps of each "SpectralRegDef2" line, in header order.
+
+    """
+
+    # Positions in the tokens of "SpectralRegDef".
+    POS_NUMBER = 0
+    POS_NAME = 2
+    POS_NUMBER_OF_POINTS = 4
+    POS_INCREMENT = 5
+    POS_START = 6
+    POS_END = 7
+    POS_COLLECTION_TIME = 10
+    POS_PASS_ENERGY = 11
+    # Positions in the tokens of "SpectralRegDef2".
+    POS_SWEEPS = 2
+
+    regions: list[SpectralRegion]
+    sweeps: list[str] = field(default_factory=list)
+    _by_name: dict[str, SpectralRegion] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._by_name = {}
+        for region in self.regions:
+            # The first region of a name is used, as the lookups by name always did.
+            self._by_name.setdefault(region.name, region)
+
+    @classmethod
+    def from_tokens(cls, reg_def: list[list[str]], reg_def2: list[list[str]]) -> SpectralRegionTable:
+        """Build the table from the tokens of the header lines.
+
+        Lines with too few tokens are left out. The sweeps are kept in the order of the "SpectralRegDef2" lines,
+        not matched to the regions by number, as the meta data always listed them.
+
+        Args:
+            reg_def (list[list[str]]): Tokens of each "SpectralRegDef" line.
+            reg_def2 (list[list[str]]): Tokens of each "SpectralRegDef2" line.
+
+        Returns:
+            SpectralRegionTable: Regions.
+
+        """
+        regions = [
+            SpectralRegion(
+                number=tokens[cls.POS_NUMBER],
+                name=tokens[cls.POS_NAME],
+                number_of_points=tokens[cls.POS_NUMBER_OF_POINTS],
+                increment=tokens[cls.POS_INCREMENT],
+                start=tokens[cls.POS_START],
+                end=tokens[cls.POS_END],
+                collection_time=tokens[cls.POS_COLLECTION_TIME],
+                pass_energy=tokens[cls.POS_PASS_ENERGY],
+            )
+            for tokens in reg_def
+            if len(tokens) > cls.POS_PASS_ENERGY
+        ]
+        return cls(regions, [tokens[cls.POS_SWEEPS] for tokens in reg_def2 if len(tokens) > cls.POS_SWEEPS])
+
+    @staticmethod
+    def from_meta(meta: MetaType) -> SpectralRegionTable:
+        """Get the table stored in the meta data.
+
+        Args:
+            meta (MetaType): Meta data.
+
+        Returns:
+            SpectralRegionTable: Regions.
+
+        Raises:
+            StructuredError: If the meta data has no table.
+
+        """
+        regions = meta.get("SpectralRegions")
+        if not isinstance(regions, SpectralRegionTable):
+            err_msg = "SpectralRegDef not found"
+            raise StructuredError(err_msg)
+        return regions
+
+    def __iter__(self) -> Iterator[SpectralRegion]:
+        return iter(self.regions)
+
+    def __len__(self) -> int:
+        return len(self.regions)
+
+    def __getitem__(self, name: str) -> SpectralRegion:
+        """Look up a region by name.
+
+        Args:
+            name (str): Region name.
+
+        Returns:
+            SpectralRegion: Region.
+
+        Raises:
+            KeyError: If there is no region of the name.
+
+        """
+        return self._by_name[name]
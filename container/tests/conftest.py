@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from tests.pipeline import DATA_DIR
+
+# MPExport.exe under wine, replaced by a copy of the MPExport output "<stem>.txt" of the raw file from $MPEXPORT_OUTPUTS.
+# The conversion of the raw file named in $MPEXPORT_SLOW takes a second longer.
+FAKE_WINE = r"""#!/bin/sh
+for arg in "$@"; do
+    case $arg in
+        -Filename:*) raw=$(printf '%s' "${arg#-Filename:}" | tr '\\' /) ;;
+        -OutputFolder:*) out=$(printf '%s' "${arg#-OutputFolder:}" | tr '\\' /) ;;
+    esac
+done
+name=$(basename "$raw")
+[ "$name" = "${MPEXPORT_SLOW:-}" ] && sleep 1
+cp "$MPEXPORT_OUTPUTS/${name%.*}.txt" "$out/"
+"""
+
+
+@pytest.fixture
+def fake_mpexport(tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Convert the ULVAC-PHI samples of data/phi with a fake wine that copies their MPExport output."""
+    if os.name == "nt":
+        pytest.skip("MPExport.exe runs without wine on Windows")
+    bin_dir = tmp_path_factory.mktemp("bin")
+    wine = bin_dir.joinpath("wine")
+    wine.write_text(FAKE_WINE, encoding="utf_8")
+    wine.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("MPEXPORT_OUTPUTS", str(DATA_DIR.joinpath("phi")))
+    # No conversion server is used.
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(bin_dir))
@@ -0,0 +1 @@
+raw counts_profile
@@ -0,0 +1 @@
+raw profile
@@ -0,0 +1 @@
+raw ragged_profile
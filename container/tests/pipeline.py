@@ -0,0 +1,119 @@
+"""Helpers to run the structuring of the tests on sample files."""
+
+from __future__ import annotations
+
+import json
+import shutil
+from pathlib import Path
+
+import yaml
+from rdetoolkit.models.rde2types import RdeInputDirPaths, RdeOutputResourcePath
+
+from modules.datasets_process import dataset
+from modules_xps.structured_handler import StructuredDataProcessor
+
+DATA_DIR = Path(__file__).parent.joinpath("data")
+TEMPLATE_DIR = Path(__file__).parents[2].joinpath("template")
+INVOICE = {
+    "datasetId": "dataset",
+    "basic": {"dateSubmitted": "", "dataOwnerId": "0" * 56, "dataName": "data", "experimentId": None, "description": None},
+    "custom": {},
+    "sample": {"sampleId": "", "names": ["sample"]},
+}
+OUTPUT_DIRS = ("raw", "nonshared_raw", "structured", "main_image", "other_image", "meta", "thumbnail", "logs", "invoice", "temp")
+
+
+def output_paths(root: Path, rawfiles: tuple[Path, ...]) -> RdeOutputResourcePath:
+    """Create the output directories of a run under root.
+
+    Args:
+        root (Path): Directory of the run.
+        rawfiles (tuple[Path, ...]): Input files.
+
+    Returns:
+        RdeOutputResourcePath: Output paths of the run.
+
+    """
+    dirs = {name: root.joinpath(name) for name in OUTPUT_DIRS}
+    for path in dirs.values():
+        path.mkdir(parents=True, exist_ok=True)
+    return RdeOutputResourcePath(
+        raw=dirs["raw"],
+        nonshared_raw=dirs["nonshared_raw"],
+        rawfiles=rawfiles,
+        struct=dirs["structured"],
+        main_image=dirs["main_image"],
+        other_image=dirs["other_image"],
+        meta=dirs["meta"],
+        thumbnail=dirs["thumbnail"],
+        logs=dirs["logs"],
+        invoice=dirs["invoice"],
+        invoice_schema_json=root.joinpath("invoice.schema.json"),
+        invoice_org=root.joinpath("invoice.json"),
+        temp=dirs["temp"],
+    )
+
+
+def run_dataset(root: Path, rawfiles: list[Path], manufacturer: str, config: dict | None = None) -> RdeOutputResourcePath:
+    """Run the structuring of raw files as a data tile, with the template tasksupport files.
+
+    The raw files are copied to the raw directory. ULVAC-PHI files need the fake_mpexport fixture.
+
+    Args:
+        root (Path): Directory of the run.
+        rawfiles (list[Path]): Input files.
+        manufacturer (str): Template name.
+        config (dict | None): Settings of "xps" added to the template rdeconfig.yaml.
+
+    Returns:
+        RdeOutputResourcePath: Output paths of the run.
+
+    """
+    tasksupport = root.joinpath("tasksupport")
+    shutil.copytree(TEMPLATE_DIR.joinpath(manufacturer, "tasksupport"), tasksupport, dirs_exist_ok=True)
+    rdeconfig = yaml.safe_load(tasksupport.joinpath("rdeconfig.yaml").read_text(encoding="utf_8"))
+    rdeconfig["xps"].update(config or {})
+    tasksupport.joinpath("rdeconfig.yaml").write_text(yaml.safe_dump(rdeconfig), encoding="utf_8")
+
+    resource_paths = output_paths(root, tuple(root.joinpath("raw", rawfile.name) for rawfile in rawfiles))
+    for rawfile in rawfiles:
+        shutil.copy(rawfile, resource_paths.raw)
+    shutil.copy(tasksupport.joinpath("invoice.schema.json"), resource_paths.invoice_schema_json)
+    resource_paths.invoice_org.write_text(json.dumps(INVOICE), encoding="utf_8")
+
+    inputdata = root.joinpath("inputdata")
+    inputdata.mkdir(exist_ok=True)
+    dataset(RdeInputDirPaths(inputdata=inputdata, invoice=resource_paths.invoice_org.parent, tasksupport=tasksupport), resource_paths)
+    return resource_paths
+
+
+def assert_golden(resource_paths: RdeOutputResourcePath, name: str) -> None:
+    """Check that the CSV and TXT files and metadata.json are byte-identical to the outputs of the original code.
+
+    The golden outputs of a sample are in data/golden/<name>. MPExport output is not compared.
+
+    Args:
+        resource_paths (RdeOutputResourcePath): Output paths of the run.
+        name (str): Sample name.
+
+    """
+    golden = DATA_DIR.joinpath("golden", name)
+    expected = sorted(path.name for path in golden.joinpath("structured").iterdir())
+    mpexport_outputs = {rawfile.with_suffix(".txt").name for rawfile in resource_paths.rawfiles if rawfile.suffix != ".vms"}
+    actual = sorted(path.name for path in resource_paths.struct.iterdir() if path.suffix in (".csv", ".txt") and path.name not in mpexport_outputs)
+    assert actual == expected
+    for file_name in expected:
+        assert resource_paths.struct.joinpath(file_name).read_bytes() == golden.joinpath("structured", file_name).read_bytes(), file_name
+    assert resource_paths.meta.joinpath("metadata.json").read_bytes() == golden.joinpath("meta", "metadata.json").read_bytes()
+
+
+def read_outputs(root: Path) -> dict[str, bytes]:
+    """Read the files of the structured directory and metadata.json of a run."""
+    files = [*root.joinpath("structured").iterdir(), root.joinpath("meta", "metadata.json")]
+    return {path.name: path.read_bytes() for path in files}
+
+
+def read_csv_metrics(root: Path) -> list[dict]:
+    """Read the CSV metrics of a run without the seconds."""
+    lines = root.joinpath("logs", StructuredDataProcessor.CSV_METRICS_FILE_NAME).read_text(encoding="utf_8").splitlines()
+    return [{key: value for key, value in json.loads(line).items() if key != "seconds"} for line in lines]
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from modules_xps.inputfile_handler import abscissa_values, count_decimal_places
+
+INCREMENTS = [0.1, 0.05, 0.025, 0.125, 0.5, 1.0, 2.5, 0.01, 0.001, 0.3333, -0.1, 1e-05, 0.000123456789012, 1.2345678901234567]
+STARTS = [0.0, -0.0, 1200.0, -1200.05, 1486.6, 0.125, 2.675, -2.675, 1e15, -1e15, 2.0**52, 2.0**53, 9.5e15, 1e20]
+POINTS = 500
+
+
+def expected_values(start: float, increment: float, n_points: int) -> np.ndarray:
+    """Abscissa values as the original code calculated them, point by point."""
+    decimal_point = count_decimal_places(increment)
+    return np.array([round(float(start + n * increment), decimal_point) for n in range(n_points)], dtype=np.float64)
+
+
+def assert_bit_identical(start: float, increment: float, n_points: int = POINTS) -> None:
+    actual = abscissa_values(start, increment, np.arange(n_points))
+    # Compared as bits, so that -0.0 and 0.0 differ as they do in the CSV files.
+    np.testing.assert_array_equal(actual.view(np.uint64), expected_values(start, increment, n_points).view(np.uint64))
+
+
+@pytest.mark.parametrize("increment", INCREMENTS)
+@pytest.mark.parametrize("start", STARTS)
+def test_abscissa_values_match_per_point_rounding(start: float, increment: float) -> None:
+    assert_bit_identical(start, increment)
+
+
+@pytest.mark.parametrize("increment", [0.1, 0.01, 0.001, 0.05, 0.0025])
+def test_abscissa_values_near_half_way_points(increment: float) -> None:
+    # Starts a few ulps around decimal half-way points, where round() and rounding the scaled value can disagree.
+    rng = np.random.default_rng(0)
+    decimal_point = count_decimal_places(increment)
+    for _ in range(200):
+        half_way = (int(rng.integers(-10**6, 10**6)) + 0.5) / 10**decimal_point
+        for ulps in range(-4, 5):
+            start = half_way
+            for _ in range(abs(ulps)):
+                start = float(np.nextafter(start, np.sign(ulps) * np.inf))
+            assert_bit_identical(start, increment, 20)
+
+
+def test_abscissa_values_of_random_blocks() -> None:
+    rng = np.random.default_rng(1)
+    for _ in range(500):
+        decimal_point = int(rng.integers(0, 8))
+        increment = round(float(rng.uniform(-5, 5)), decimal_point) or 1.0
+        start = float(rng.uniform(-1e4, 1e4))
+        assert_bit_identical(start, increment, 50)
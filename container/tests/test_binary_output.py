@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from rdetoolkit.exceptions import StructuredError
+
+from modules_xps.structured_handler import BinaryCompanionWriter, StructuredDataProcessor
+from tests.pipeline import DATA_DIR, run_dataset
+
+SAMPLES = [("phi", "spectra.spe", "ulvac_phi"), ("phi", "profile.pro", "ulvac_phi"), ("vms", "norm.vms", "scienta_omicron")]
+
+
+def read_companion(path: Path) -> tuple[list[str], np.ndarray]:
+    """Read the column names and values of a binary companion."""
+    if path.suffix == ".npz":
+        with np.load(path) as npz:
+            return npz["columns"].tolist(), npz["values"]
+    df = pd.read_parquet(path) if path.suffix == ".parquet" else pd.read_feather(path)
+    return df.columns.tolist(), df.to_numpy()
+
+
+@pytest.mark.usefixtures("fake_mpexport")
+@pytest.mark.parametrize("fmt", BinaryCompanionWriter.FORMATS)
+@pytest.mark.parametrize(("kind", "name", "manufacturer"), SAMPLES)
+def test_companions_hold_the_csv_values(kind: str, name: str, manufacturer: str, fmt: str, tmp_path: Path) -> None:
+    resource_paths = run_dataset(tmp_path, [DATA_DIR.joinpath(kind, name)], manufacturer, {"binary_output": fmt})
+    suffix = BinaryCompanionWriter.FORMATS[BinaryCompanionWriter.format_from_config({"xps": {"binary_output": fmt}}) or fmt]
+
+    csv_files = sorted(resource_paths.struct.glob("*.csv"))
+    assert csv_files
+    for csv_file in csv_files:
+        columns, values = read_companion(csv_file.with_suffix(suffix))
+        df = pd.read_csv(csv_file)
+        assert columns == df.columns.tolist()
+        np.testing.assert_array_equal(values, df.to_numpy(dtype=np.float64))
+
+
+def test_unknown_formats_are_rejected() -> None:
+    assert BinaryCompanionWriter.format_from_config({"xps": {}}) is None
+    assert BinaryCompanionWriter.format_from_config({"xps": {"binary_output": "NPZ"}}) == "npz"
+    with pytest.raises(StructuredError, match="Unsupported binary_output: hdf5"):
+        StructuredDataProcessor({"xps": {"binary_output": "hdf5"}})
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from rdetoolkit.exceptions import StructuredError
+
+from modules_xps.interfaces import ProfileCube
+from modules_xps.ulvac_phi import cube_store
+from modules_xps.ulvac_phi.cube_store import CHUNK_SHAPE, CubeStore, format_from_config, write_cube_store
+from tests.pipeline import DATA_DIR, run_dataset
+
+FORMATS = [
+    "npy",
+    pytest.param("hdf5", marks=pytest.mark.skipif(not cube_store.HAS_H5PY, reason="h5py is not installed")),
+]
+# Sizes that leave partial chunks at the ends of both axes.
+CYCLES = 2 * CHUNK_SHAPE[0] + 5
+POINTS = 2 * CHUNK_SHAPE[1] + 40
+# Reads across the chunk borders of both axes: strided, reversed, and single cycles or points.
+READS: list[tuple[int | slice, int | slice]] = [
+    (slice(None), slice(None)),
+    (slice(1, None, 3), slice(CHUNK_SHAPE[1] - 6, 2 * CHUNK_SHAPE[1] + 18)),
+    (slice(None, None, -5), slice(CHUNK_SHAPE[1] + 7, None, 2)),
+    (CHUNK_SHAPE[0], slice(CHUNK_SHAPE[1] - 1, CHUNK_SHAPE[1] + 1)),
+    (slice(CHUNK_SHAPE[0] - 2, CHUNK_SHAPE[0] + 2), POINTS - 1),
+    (slice(3, 3), slice(None)),
+]
+
+
+def make_cube(name: str, seed: int) -> ProfileCube:
+    """Make the spectra of a region with random values, on a descending energy axis."""
+    rng = np.random.default_rng(seed)
+    energy = 295.0 - 0.1 * np.arange(POINTS)
+    values = np.column_stack((energy, rng.uniform(0, 1e5, (POINTS, 2 * CYCLES))))
+    columns = ["Binding Energy (eV)"] + [f"{quantity}{i}" for quantity in ("cps", "counts") for i in range(CYCLES)]
+    return ProfileCube(name=name, values=values, columns=columns, file=Path(f"{name}.csv"), z=0.5 * np.arange(CYCLES), counts_file=Path(f"{name}_count.csv"))
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_reads_match_the_spectra(fmt: str, tmp_path: Path) -> None:
+    cubes = [make_cube("C1s", 0), make_cube("O1s", 1)]
+    # A dotted raw file stem.
+    path = tmp_path.joinpath("2024.01.05_cube")
+    write_cube_store(path, cubes, "Sputter Time (min)", fmt)
+    store = CubeStore.open(path)
+
+    assert store.regions == ["C1s", "O1s"]
+    assert store.index["z_label"] == "Sputter Time (min)"
+    for cube in cubes:
+        np.testing.assert_array_equal(store.energy(cube.name), cube.energy)
+        np.testing.assert_array_equal(store.z(cube.name), cube.z)
+        for cycles, points in READS:
+            np.testing.assert_array_equal(store.read(cube.name, "cps", cycles, points), cube.cps.T[cycles, points])
+            np.testing.assert_array_equal(store.read(cube.name, "counts", cycles, points), cube.counts.T[cycles, points])
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_energy_windows_across_chunks(fmt: str, tmp_path: Path) -> None:
+    cube = make_cube("C1s", 2)
+    store = CubeStore.open(write_cube_store(tmp_path.joinpath("sample_cube"), [cube], "", fmt))
+    first, last = CHUNK_SHAPE[1] - 10, 2 * CHUNK_SHAPE[1] + 10
+
+    window = store.energy_window("C1s", cube.energy[last - 1], cube.energy[first])
+    assert window == slice(first, last)
+    np.testing.assert_array_equal(store.read("C1s", cycles=slice(None, None, 4), points=window), cube.cps.T[::4, first:last])
+    assert store.energy_window("C1s", 1000.0, 2000.0) == slice(0, 0)
+    assert store.read("C1s", points=slice(0, 0)).shape == (CYCLES, 0)
+
+
+def test_hdf5_falls_back_to_npy_without_h5py(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(cube_store, "HAS_H5PY", False)
+    assert format_from_config({"xps": {}}) is None
+    with pytest.raises(StructuredError, match="Unsupported cube_store: zarr"):
+        format_from_config({"xps": {"cube_store": "zarr"}})
+
+    fmt = format_from_config({"xps": {"cube_store": "HDF5"}})
+    assert fmt == "npy"
+    cube = make_cube("C1s", 4)
+    path = write_cube_store(tmp_path.joinpath("sample_cube"), [cube], "", fmt)
+    assert path.is_dir()
+    np.testing.assert_array_equal(CubeStore.open(path).read("C1s", "counts", cycles=1), cube.counts[:, 1])
+
+
+def test_missing_regions_and_stores_are_reported(tmp_path: Path) -> None:
+    store = CubeStore.open(write_cube_store(tmp_path.joinpath("sample_cube"), [make_cube("C1s", 3)], "", "npy"))
+    with pytest.raises(StructuredError, match="Region not found"):
+        store.read("N1s")
+    with pytest.raises(StructuredError, match="Quantity not found"):
+        store.read("C1s", "area")
+    with pytest.raises(StructuredError, match="Cube store not found"):
+        CubeStore.open(tmp_path.joinpath("missing_cube"))
+
+
+@pytest.mark.usefixtures("fake_mpexport")
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_profiles_are_stored_with_the_csv_values(fmt: str, tmp_path: Path) -> None:
+    resource_paths = run_dataset(tmp_path, [DATA_DIR.joinpath("phi", "profile.pro")], "ulvac_phi", {"cube_store": fmt})
+    store = CubeStore.open(resource_paths.struct.joinpath("profile_cube"))
+
+    assert store.regions == ["C1s", "O1s"]
+    for region in store.regions:
+        df = pd.read_csv(resource_paths.struct.joinpath(f"profile_{region}.csv"))
+        np.testing.assert_array_equal(store.energy(region), df.iloc[:, 0].to_numpy())
+        np.testing.assert_array_equal(store.read(region, "cps"), df.iloc[:, 1:].to_numpy().T)
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from modules_xps.inputfile_handler import ENCODING_SAMPLE_SIZE, LineReader, detect_text_file_encoding, iter_text_blocks, read_text_file
+
+JAPANESE = "試料名 測定"
+
+
+def write_late_non_ascii(path: Path, encoding: str) -> str:
+    """Write a file that is ASCII in the detection sample and has Japanese text after it."""
+    text = "".join(f"line {i}\n" for i in range(ENCODING_SAMPLE_SIZE // 8)) + f"{JAPANESE}\nlast\n"
+    path.write_bytes(text.encode(encoding))
+    return text
+
+
+@pytest.mark.parametrize("encoding", ["utf_8", "cp932"])
+def test_non_ascii_after_the_sample_is_decoded(encoding: str, tmp_path: Path) -> None:
+    path = tmp_path.joinpath("late.txt")
+    text = write_late_non_ascii(path, encoding)
+
+    assert read_text_file(path) == text
+    assert [line for block in iter_text_blocks(path, "line 0") for line in block] == text.splitlines()
+    with LineReader.open(path) as f:
+        assert [f.readline() for _ in text.splitlines()] == text.splitlines(keepends=True)
+
+
+def test_encoding_is_detected_again_when_the_file_changes(tmp_path: Path) -> None:
+    path = tmp_path.joinpath("changed.txt")
+    path.write_bytes(b"abc\n")
+    assert detect_text_file_encoding(path) == "ascii"
+
+    # Same size and modification time: the cached result is used.
+    stat = path.stat()
+    path.write_bytes(JAPANESE.encode("utf_8")[:4])
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert detect_text_file_encoding(path) == "ascii"
+
+    path.write_bytes(f"{JAPANESE}\n".encode())
+    assert detect_text_file_encoding(path) == "utf_8"
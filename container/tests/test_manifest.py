@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from tests import pipeline
+from tests.pipeline import DATA_DIR, run_dataset
+
+RAWFILE = DATA_DIR.joinpath("phi", "spectra.spe")
+
+
+def fingerprints(root: Path) -> dict[str, str]:
+    """Read the fingerprint of each stage of the raw file from the manifest."""
+    manifest = json.loads(root.joinpath("logs", "xps_manifest.json").read_text(encoding="utf_8"))
+    return {stage: entry["fingerprint"] for stage, entry in manifest["files"][RAWFILE.name].items()}
+
+
+@pytest.mark.usefixtures("fake_mpexport")
+def test_default_values_are_an_input_of_meta(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    template_dir = tmp_path.joinpath("template")
+    shutil.copytree(pipeline.TEMPLATE_DIR, template_dir)
+    monkeypatch.setattr(pipeline, "TEMPLATE_DIR", template_dir)
+    root = tmp_path.joinpath("run")
+    run_dataset(root, [RAWFILE], "ulvac_phi", {"incremental": True})
+    before = fingerprints(root)
+
+    default_value = template_dir.joinpath("ulvac_phi", "tasksupport", "default_value.csv")
+    default_value.write_text(default_value.read_text(encoding="utf_8").replace("measurement.analysis_field,", "measurement.analysis_field,surface"), encoding="utf_8")
+    run_dataset(root, [RAWFILE], "ulvac_phi", {"incremental": True})
+    after = fingerprints(root)
+
+    # Only the meta stage reads the default values.
+    assert {stage for stage in before if before[stage] != after[stage]} == {"meta"}
+
+
+@pytest.mark.usefixtures("fake_mpexport")
+def test_every_setting_is_an_input_of_every_stage(tmp_path: Path) -> None:
+    run_dataset(tmp_path, [RAWFILE], "ulvac_phi", {"incremental": True, "csv_workers": 1})
+    before = fingerprints(tmp_path)
+    run_dataset(tmp_path, [RAWFILE], "ulvac_phi", {"incremental": True, "csv_workers": 2})
+    after = fingerprints(tmp_path)
+
+    assert set(after) == set(before)
+    assert all(before[stage] != after[stage] for stage in before)
+
+
+@pytest.mark.usefixtures("fake_mpexport")
+def test_the_converted_text_is_an_input_of_every_stage(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    root = tmp_path.joinpath("run")
+    run_dataset(root, [RAWFILE], "ulvac_phi", {"incremental": True})
+    before = fingerprints(root)
+    metadata = root.joinpath("meta", "metadata.json").read_bytes()
+
+    # The text is converted again, with another result.
+    outputs = tmp_path.joinpath("outputs")
+    outputs.mkdir()
+    text = RAWFILE.with_suffix(".txt").read_bytes()
+    outputs.joinpath("spectra.txt").write_bytes(text.replace(b"SurvNumCycles: 2", b"SurvNumCycles: 3"))
+    monkeypatch.setenv("MPEXPORT_OUTPUTS", str(outputs))
+    root.joinpath("structured", "spectra.txt").unlink()
+    run_dataset(root, [RAWFILE], "ulvac_phi", {"incremental": True})
+    after = fingerprints(root)
+
+    assert {stage for stage in before if before[stage] != after[stage]} == {"parse", "meta", "csv", "plots", "invoice"}
+    assert root.joinpath("meta", "metadata.json").read_bytes() != metadata
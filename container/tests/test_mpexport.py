@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import json
+import os
+import socket
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from modules_xps.ulvac_phi import mpexport
+from modules_xps.ulvac_phi.mpexport import METRICS_FILE_NAME, MPExportRunner, MPExportServer
+from tests.pipeline import DATA_DIR, assert_golden, run_dataset
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="The conversion server runs under wine only")
+
+# wine prints its arguments; wineserver --persistent leaves a child holding its standard output, as the real one does.
+FAKE_COMMANDS = {
+    "wine": '#!/bin/sh\necho "converted $*"\n',
+    "wineserver": '#!/bin/sh\nif [ "$1" = --persistent ]; then sleep 30 & fi\n',
+}
+ARGS = ["-Filename:sample.spe"]
+# Well below the 30 seconds the fake wineserver keeps its output open.
+MAX_SECONDS = 10
+
+
+@pytest.fixture
+def fake_wine(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Put fake wine and wineserver commands first on PATH and return their directory."""
+    bin_dir = tmp_path.joinpath("bin")
+    bin_dir.mkdir()
+    for name, script in FAKE_COMMANDS.items():
+        bin_dir.joinpath(name).write_text(script, encoding="utf_8")
+        bin_dir.joinpath(name).chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return bin_dir
+
+
+def read_metrics(log_dir: Path) -> list[dict]:
+    """Read the conversion metrics of a log directory."""
+    return [json.loads(line) for line in log_dir.joinpath(METRICS_FILE_NAME).read_text(encoding="utf_8").splitlines()]
+
+
+@pytest.mark.usefixtures("fake_wine")
+def test_server_starts_and_converts(tmp_path: Path) -> None:
+    socket_path = tmp_path.joinpath("server", "mpexport.sock")
+    with MPExportServer(socket_path) as server:
+        thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05})
+        thread.start()
+        start = time.monotonic()
+        try:
+            output = MPExportRunner(tmp_path, socket_path, timeout=5, retries=0).run(ARGS, "sample.spe")
+        finally:
+            server.shutdown()
+            thread.join(10)
+    assert not thread.is_alive()
+    # The server does not wait for the output of the persistent wineserver.
+    assert time.monotonic() - start < MAX_SECONDS
+    assert output == f"converted {mpexport.MPEXPORT_BINPATH} {ARGS[0]}\n"
+
+
+@pytest.mark.usefixtures("fake_wine")
+def test_runner_runs_wine_when_the_server_does_not_answer(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(mpexport, "SERVER_RESPONSE_GRACE", 0.2)
+    socket_path = tmp_path.joinpath("server", "mpexport.sock")
+    socket_path.parent.mkdir(mode=0o700)
+    # A server that accepts the connection but never answers.
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.bind(str(socket_path))
+        sock.listen()
+        output = MPExportRunner(tmp_path, socket_path, timeout=0.3, retries=1, backoff=0).run(ARGS, "sample.spe")
+    # The first attempt times out waiting for the server; the retry runs wine here.
+    assert output == f"converted {mpexport.MPEXPORT_BINPATH} {ARGS[0]}\n"
+    assert [metrics["attempts"] for metrics in read_metrics(tmp_path)] == [2]
+
+
+@pytest.mark.parametrize(
+    ("script", "result", "attempts"),
+    [
+        # MPExport.exe fails the same way on every attempt.
+        ("exit 1", "failed", 1),
+        ("kill -9 $$", "failed", 3),
+        ("exec sleep 30", "timeout", 3),
+    ],
+)
+def test_only_timeouts_and_signals_are_retried(script: str, result: str, attempts: int, fake_wine: Path, tmp_path: Path) -> None:
+    fake_wine.joinpath("wine").write_text(f"#!/bin/sh\n{script}\n", encoding="utf_8")
+    runner = MPExportRunner(tmp_path, tmp_path.joinpath("no_server.sock"), timeout=0.5, retries=2, backoff=0)
+    with pytest.raises(subprocess.SubprocessError):
+        runner.run(ARGS, "sample.spe")
+    metrics = read_metrics(tmp_path)[-1]
+    assert (metrics["result"], metrics["attempts"]) == (result, attempts)
+
+
+@pytest.mark.usefixtures("fake_mpexport")
+def test_cached_conversion_gives_the_same_outputs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    rawfile = DATA_DIR.joinpath("phi", "spectra.spe")
+    config = {"mpexport_cache_dir": str(tmp_path.joinpath("cache"))}
+    run_dataset(tmp_path.joinpath("first"), [rawfile], "ulvac_phi", config)
+
+    # MPExport has no output to give now: the second run must restore the text from the cache.
+    monkeypatch.setenv("MPEXPORT_OUTPUTS", str(tmp_path.joinpath("missing")))
+    resource_paths = run_dataset(tmp_path.joinpath("second"), [rawfile], "ulvac_phi", config)
+    assert_golden(resource_paths, "spectra")
+    assert read_metrics(resource_paths.logs) == [{"file": "spectra.spe", "result": "cached"}]
+    assert resource_paths.struct.joinpath("spectra.txt").read_bytes() == rawfile.with_suffix(".txt").read_bytes()
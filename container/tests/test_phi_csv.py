@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from rdetoolkit.exceptions import StructuredError
+
+from tests.pipeline import DATA_DIR, assert_golden, read_csv_metrics, run_dataset
+
+# Files of profile.pro in the order they are passed to the writer pool.
+PROFILE_FILES = ["profile_C1s.csv", "profile_C1s_count.csv", "profile_O1s.csv", "profile_O1s_count.csv", "profile.csv"]
+
+
+@pytest.mark.usefixtures("fake_mpexport")
+@pytest.mark.parametrize("workers", [1, 2, len(PROFILE_FILES)])
+def test_csv_workers_give_the_same_outputs(workers: int, tmp_path: Path) -> None:
+    resource_paths = run_dataset(tmp_path, [DATA_DIR.joinpath("phi", "profile.pro")], "ulvac_phi", {"csv_workers": workers})
+
+    assert_golden(resource_paths, "profile")
+    assert [metrics["file"] for metrics in read_csv_metrics(tmp_path)] == PROFILE_FILES
+
+
+@pytest.mark.usefixtures("fake_mpexport")
+def test_a_failed_write_is_reported(tmp_path: Path) -> None:
+    # A directory in the place of a CSV file cannot be written.
+    tmp_path.joinpath("structured", PROFILE_FILES[2]).mkdir(parents=True)
+
+    with pytest.raises(StructuredError, match=f"Failed to write {PROFILE_FILES[2]}"):
+        run_dataset(tmp_path, [DATA_DIR.joinpath("phi", "profile.pro")], "ulvac_phi", {"csv_workers": 1})
+    metrics = read_csv_metrics(tmp_path)
+    assert metrics[-1]["file"] == PROFILE_FILES[2]
+    assert "error" in metrics[-1]
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from modules_xps.structured_handler import StructuredDataProcessor
+from tests.pipeline import DATA_DIR, read_outputs, run_dataset
+
+SAMPLES = ["spectra.spe", "profile.pro"]
+
+
+@pytest.mark.usefixtures("fake_mpexport")
+def test_files_are_processed_in_raw_file_order(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    # The conversion of the first file finishes last when the conversions run concurrently.
+    monkeypatch.setenv("MPEXPORT_SLOW", SAMPLES[0])
+    rawfiles = [DATA_DIR.joinpath("phi", name) for name in SAMPLES]
+
+    outputs = {}
+    for workers in (1, len(SAMPLES)):
+        root = tmp_path.joinpath(str(workers))
+        run_dataset(root, rawfiles, "ulvac_phi", {"mpexport_workers": workers})
+        outputs[workers] = read_outputs(root)
+        metrics = root.joinpath("logs", StructuredDataProcessor.CSV_METRICS_FILE_NAME).read_text(encoding="utf_8").splitlines()
+        stems = [Path(json.loads(line)["file"]).stem.split("_")[0] for line in metrics]
+        assert list(dict.fromkeys(stems)) == [Path(name).stem for name in SAMPLES]
+
+    assert outputs[1] == outputs[len(SAMPLES)]
+    # metadata.json is that of the first file.
+    assert outputs[1]["metadata.json"] == DATA_DIR.joinpath("golden", "spectra", "meta", "metadata.json").read_bytes()
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from tests.pipeline import DATA_DIR, assert_golden, run_dataset
+
+# ragged_profile.pro has profiles on different z values, which are joined; the other profiles share them.
+SAMPLES = ["spectra.spe", "profile.pro", "formats.spe", "splitter.spe", "regions.spe", "counts.spe", "counts_profile.pro", "ragged_profile.pro", "angle.ang"]
+
+
+@pytest.mark.usefixtures("fake_mpexport")
+@pytest.mark.parametrize("name", SAMPLES)
+def test_outputs_match_golden(name: str, tmp_path: Path) -> None:
+    resource_paths = run_dataset(tmp_path, [DATA_DIR.joinpath("phi", name)], "ulvac_phi")
+    assert_golden(resource_paths, Path(name).stem)
+
+
+# The graphs the original code drew besides <stem>.png, by the part of the name after the stem.
+GRAPHS = {
+    "spectra.spe": ["C1s", "C1s_count", "N1s", "N1s_count", "O1s", "O1s_count", "Survey", "Survey_count"],
+    "angle.ang": ["C1s", "C1s_3d", "O1s", "O1s_3d", "speall", "speall_3d", "speall_count"],
+}
+
+
+@pytest.mark.usefixtures("fake_mpexport")
+@pytest.mark.parametrize("name", GRAPHS)
+def test_graphs_are_drawn(name: str, tmp_path: Path) -> None:
+    resource_paths = run_dataset(tmp_path, [DATA_DIR.joinpath("phi", name)], "ulvac_phi")
+    stem = Path(name).stem
+    assert [path.name for path in resource_paths.main_image.iterdir()] == [f"{stem}.png"]
+    assert sorted(path.name for path in resource_paths.other_image.iterdir()) == [f"{stem}_{graph}.png" for graph in GRAPHS[name]]
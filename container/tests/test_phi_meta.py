@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from modules_xps.ulvac_phi.meta_handler import MetaParser
+from modules_xps.ulvac_phi.spectral_region import SpectralRegionTable
+
+
+def tokens(*lines: str) -> list[list[str]]:
+    """Split header lines into tokens, as the readers do."""
+    return [line.split() for line in lines]
+
+
+def parse(meta: dict) -> dict:
+    """Parse the meta data of a header and return the repeated items."""
+    meta["SpectralRegions"] = SpectralRegionTable.from_tokens(meta.get("SpectralRegDef", []), meta.get("SpectralRegDef2", []))
+    _, repeated = MetaParser(config={}, default_value={}).parse(meta, [])
+    return dict(repeated)
+
+
+def test_sweeps_follow_the_spectral_reg_def2_lines() -> None:
+    reg_def = tokens(
+        "1 1 Survey 6 201 -0.1000 295.00 275.00 295.00 275.00 0.2774 23.500 FAT",
+        "2 2 C1s 6 201 -0.1000 295.00 275.00 295.00 275.00 1.6964 23.500 FAT",
+    )
+    # Numbered in another order than the regions, and one number twice.
+    reg_def2 = tokens("2 1 4 0", "1 1 2 0", "1 1 7 0")
+    repeated = parse({"SurvNumCycles": "2", "SpectralRegDef": reg_def, "SpectralRegDef2": reg_def2})
+
+    assert repeated["peak_name"] == ["Survey", "C"]
+    assert repeated["peak_sweep_number"] == ["4", "2", "7"]
+    assert repeated["total_acquisition_number"] == [8, 4, 14]
+
+
+def test_sweeps_are_set_without_spectral_reg_def() -> None:
+    repeated = parse({"SpectralRegDef2": tokens("1 1 3 0", "2 1 5 0")})
+
+    assert "peak_name" not in repeated
+    assert repeated["peak_sweep_number"] == ["3", "5"]
+    assert repeated["total_acquisition_number"] == [3, 5]
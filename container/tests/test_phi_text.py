@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+from rdetoolkit.rde2util import CharDecEncoding
+
+from modules_xps.inputfile_handler import iter_text_blocks, parse_csv_lines
+from tests.pipeline import DATA_DIR
+
+SEPARATOR = "//Area Comment"
+
+
+def value_lines(name: str) -> list[str]:
+    """Read the value lines of the MPExport output of a sample: the lines of two comma-separated numbers."""
+    lines = DATA_DIR.joinpath("phi", name).read_text(encoding="utf_8").splitlines()
+    return [line for line in lines if line.count(",") == 1 and line[:1].isdigit()]
+
+
+def test_values_are_parsed_as_float_does() -> None:
+    lines = value_lines("formats.txt")
+    expected = np.array([[float(value) for value in line.split(",")] for line in lines])
+    np.testing.assert_array_equal(parse_csv_lines(lines), expected)
+
+
+def split_lines(path: Path, separator: str) -> list[list[str]]:
+    """Split a text file into blocks the way the original reader did, from all of its lines."""
+    with open(path, encoding=CharDecEncoding.detect_text_file_encoding(path)) as f:
+        lines = f.readlines()
+    blocks: list[list[str]] = []
+    for line in lines:
+        if line.startswith(separator) and blocks:
+            blocks.append([])
+        if not blocks:
+            blocks.append([])
+        blocks[-1].append(line.rstrip())
+    return blocks
+
+
+@pytest.mark.parametrize("path", sorted(DATA_DIR.joinpath("phi").glob("*.txt")), ids=lambda path: path.name)
+def test_blocks_match_a_split_of_the_lines(path: Path) -> None:
+    assert list(iter_text_blocks(path, SEPARATOR)) == split_lines(path, SEPARATOR)
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from modules_xps.scienta_omicron.vms.inputfile_handler import FileReader
+from tests.pipeline import DATA_DIR, assert_golden, output_paths, run_dataset
+
+# The golden outputs were written by the original code, value by value.
+SAMPLES = ["norm", "crlf", "jp932", "jputf8", "outlier", "mapdp", "aes_diff", "sdp_sims"]
+
+
+@pytest.mark.parametrize("name", SAMPLES)
+def test_outputs_match_golden(name: str, tmp_path: Path) -> None:
+    resource_paths = run_dataset(tmp_path, [DATA_DIR.joinpath("vms", f"{name}.vms")], "scienta_omicron")
+    assert_golden(resource_paths, name)
+
+
+def test_outliers_are_blank(tmp_path: Path) -> None:
+    rawfile = DATA_DIR.joinpath("vms", "outlier.vms")
+    _, _, data_blocks, _ = FileReader({"xps": {"manufacturer": "scienta_omicron"}}).read(output_paths(tmp_path, (rawfile,)))
+    outliers = 0
+    for data_block in data_blocks:
+        for values, text in zip(data_block["ordinate_values"], data_block["ordinate_text"], strict=True):
+            # 1e37 is read as NaN and written as a blank line to the TXT file.
+            blank = np.array([line == "" for line in text.split("\n")[:-1]])
+            np.testing.assert_array_equal(np.isnan(values), blank)
+            outliers += int(blank.sum())
+    assert outliers > 0
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import re
+
+import pytest
+
+from modules_xps.scienta_omicron.vms.inputfile_handler import FileReader, block_header_fields, format_block_header
+from tests.pipeline import DATA_DIR
+
+CONFIG = {"xps": {"manufacturer": "scienta_omicron"}}
+SAMPLES = ["norm.vms", "crlf.vms", "jp932.vms", "jputf8.vms", "outlier.vms", "ragged.vms", "mapdp.vms", "aes_diff.vms", "sdp_sims.vms"]
+ENCODINGS = {"jp932.vms": "cp932"}
+OUTLIER_PATTERN = re.compile(r"1[eE][\+]*0*37")
+
+
+def normalize(line: str) -> str:
+    """Normalize a header line as the reader does: trailing whitespace and NUL characters removed, outliers blank."""
+    line = line.rstrip().replace("\x00", "")
+    return "" if OUTLIER_PATTERN.fullmatch(line) else line
+
+
+@pytest.mark.parametrize("name", SAMPLES)
+def test_format_block_header_gives_the_header_lines(name: str) -> None:
+    rawfile = DATA_DIR.joinpath("vms", name)
+    data = rawfile.read_bytes()
+
+    with FileReader(CONFIG).index(rawfile) as vamas:
+        for entry in vamas.block_index:
+            text = data[entry.offset:entry.ordinate_offset].decode(ENCODINGS.get(name, "utf_8"))
+            expected = [normalize(line) for line in text.splitlines()]
+            assert format_block_header(vamas.meta, entry.header) == expected
+
+
+def test_block_header_fields_follow_the_conditions() -> None:
+    names = {
+        (mode, technique): {name for field in block_header_fields({"experiment_mode": mode, "scan_mode": "REGULAR"}, technique) for name in field.names}
+        for mode in ("NORM", "MAPDP")
+        for technique in ("XPS", "AES diff", "SIMS")
+    }
+    assert "x_coordinate" not in names["NORM", "XPS"]
+    assert "x_coordinate" in names["MAPDP", "XPS"]
+    assert "differential_width" in names["NORM", "AES diff"]
+    assert "differential_width" not in names["NORM", "XPS"]
+    # Sputtering ion items are present with MAPDP or a SIMS-like technique; sputtering source items with both.
+    assert "sputtering_ion_or_atomic_number" in names["NORM", "SIMS"]
+    assert "sputtering_ion_or_atomic_number" not in names["NORM", "XPS"]
+    assert "sputtering_source_energy" in names["MAPDP", "XPS"]
+    assert "sputtering_source_energy" not in names["MAPDP", "SIMS"]
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from modules_xps.scienta_omicron.vms.inputfile_handler import FileReader
+from tests.pipeline import DATA_DIR, output_paths
+
+CONFIG = {"xps": {"manufacturer": "scienta_omicron"}}
+
+
+@pytest.mark.parametrize("name", ["norm.vms", "crlf.vms", "jp932.vms", "jputf8.vms"])
+def test_index_reads_the_same_blocks(name: str, tmp_path: Path) -> None:
+    rawfile = DATA_DIR.joinpath("vms", name)
+    _, _, expected, _ = FileReader(CONFIG).read(output_paths(tmp_path, (rawfile,)))
+
+    with FileReader(CONFIG).index(rawfile) as vamas:
+        assert len(vamas) == len(expected)
+        # Blocks can be decoded in any order.
+        for i in reversed(range(len(vamas))):
+            block = vamas.read_block(i)
+            assert block["ordinate_text"] == expected[i]["ordinate_text"]
+            for actual_values, expected_values in zip(block["ordinate_values"], expected[i]["ordinate_values"], strict=True):
+                np.testing.assert_array_equal(actual_values, expected_values)
+
+
+@pytest.mark.parametrize(("name", "encoding"), [("crlf.vms", "ascii"), ("jp932.vms", "cp932"), ("jputf8.vms", "utf_8")])
+def test_index_offsets_are_byte_offsets(name: str, encoding: str) -> None:
+    rawfile = DATA_DIR.joinpath("vms", name)
+    data = rawfile.read_bytes()
+
+    with FileReader(CONFIG).index(rawfile) as vamas:
+        for i, entry in enumerate(vamas.block_index):
+            first_line = data[entry.offset:].splitlines()[0].decode(encoding)
+            assert first_line == entry.header["block_identifier"]
+            first_value = data[entry.ordinate_offset:].splitlines()[0].decode(encoding).strip()
+            assert float(first_value) == vamas.read_block(i)["ordinate_values"][0][0]
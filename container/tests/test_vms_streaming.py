@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from modules_xps.scienta_omicron.vms.inputfile_handler import FileReader
+from modules_xps.structured_handler import VmsStreamWriter
+from tests.pipeline import DATA_DIR, assert_golden, read_csv_metrics, read_outputs, run_dataset
+
+SAMPLES = ["norm", "jp932", "outlier", "ragged"]
+
+
+@pytest.mark.parametrize("name", SAMPLES)
+def test_streaming_matches_in_memory(name: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    # Small chunks, so that the CSV file is assembled across chunk borders and blocks of different lengths.
+    monkeypatch.setattr(VmsStreamWriter, "CSV_CHUNK_ROWS", 7)
+    rawfile = DATA_DIR.joinpath("vms", f"{name}.vms")
+    run_dataset(tmp_path.joinpath("memory"), [rawfile], "scienta_omicron", {"streaming": False})
+    run_dataset(tmp_path.joinpath("streaming"), [rawfile], "scienta_omicron", {"streaming": True})
+
+    assert read_outputs(tmp_path.joinpath("streaming")) == read_outputs(tmp_path.joinpath("memory"))
+    assert read_csv_metrics(tmp_path.joinpath("streaming")) == read_csv_metrics(tmp_path.joinpath("memory"))
+
+
+def test_ragged_blocks_match_golden(tmp_path: Path) -> None:
+    resource_paths = run_dataset(tmp_path, [DATA_DIR.joinpath("vms", "ragged.vms")], "scienta_omicron", {"streaming": True})
+    assert_golden(resource_paths, "ragged")
+
+
+def test_streaming_skips_unchanged_stages(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    rawfile = DATA_DIR.joinpath("vms", "norm.vms")
+    config = {"streaming": True, "incremental": True}
+    run_dataset(tmp_path, [rawfile], "scienta_omicron", config)
+    outputs = read_outputs(tmp_path)
+    manifest = json.loads(tmp_path.joinpath("logs", "xps_manifest.json").read_text(encoding="utf_8"))
+    assert set(manifest["files"]["norm.vms"]) == {"parse", "meta", "csv", "plots"}
+    assert {Path(name).name for name in manifest["files"]["norm.vms"]["csv"]["outputs"]} == {"norm.txt", "norm.csv"}
+
+    # Nothing changed: the raw file is not read again.
+    def fail(*_: object) -> None:
+        raise AssertionError
+
+    with monkeypatch.context() as m:
+        m.setattr(FileReader, "index", fail)
+        run_dataset(tmp_path, [rawfile], "scienta_omicron", config)
+
+    # A removed output is written again, the same as before.
+    tmp_path.joinpath("structured", "norm.csv").unlink()
+    run_dataset(tmp_path, [rawfile], "scienta_omicron", config)
+    assert read_outputs(tmp_path) == outputs
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import io
+import re
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from modules_xps.scienta_omicron.vms.inputfile_handler import FileReader
+from modules_xps.structured_handler import StructuredDataProcessor
+from tests.pipeline import DATA_DIR, output_paths
+
+CONFIG = {"xps": {"manufacturer": "scienta_omicron"}}
+SAMPLES = ["norm", "outlier", "mapdp", "aes_diff", "sdp_sims"]
+# Outliers in several notations, values that only look like them, and values with line breaks.
+ITEMS = {
+    "comment": "line1\r\nline2\r\n",
+    "number_of_lines_in_comment": 2,
+    "outlier": "1e37",
+    "outlier_sign": "1E+037",
+    "outlier_float": 1e37,
+    "outlier_newline": "1e+37\r\n",
+    "not_outlier": "1e-37",
+    "ends_with_37": "137",
+    "values": [1, "1e37", 2.5, "x\n"],
+    "newlines": "a\r\nb\n\r\n",
+    "empty": "",
+    "file": "left out",
+}
+# Items the original writer left out; the blocks now also keep the text of the values.
+EXCLUSIONS = ("blocks", "experiment_terminator", "file", "ordinate_values", "ordinate_text")
+BLOCK_ITEMS = {
+    **ITEMS,
+    "block_comment": "block\r\ncomment\r\n",
+    "number_of_lines_in_block_comment": 2,
+    "ordinate_values": [[1.0, 2.0]],
+    "ordinate_text": ["1.0\n", "2.0\n"],
+}
+
+
+def check_outlier(value: str) -> str:
+    """Blank an outlier as the original writer did."""
+    return "" if re.fullmatch(r"1[eE][\+]*0*37", value) is not None else value
+
+
+def item_value(value: object, *, strip_newlines: bool) -> str:
+    """Format an item value as the original writer did, one print call per item."""
+    value_str = ",".join([str(v) for v in value]) if type(value) is list else str(value)
+    if strip_newlines:
+        value_str = re.sub("[\r\n]+$", "", value_str)
+    return check_outlier(value_str)
+
+
+def original_header(meta: dict) -> str:
+    """Write the header part of the TXT file as the original writer did."""
+    f = io.StringIO()
+    print("//HEADER INFORMATION", file=f)
+    for key, value in meta.items():
+        if key not in EXCLUSIONS:
+            print(key, "=", item_value(value, strip_newlines=False), sep="", file=f)
+    return f.getvalue()
+
+
+def original_block(i: int, block: dict) -> str:
+    """Write one block of the TXT file as the original writer did; the values are the text of the measurement file."""
+    f = io.StringIO()
+    print("//Numeric Data Info", i, file=f)
+    for key, value in block.items():
+        if key not in EXCLUSIONS:
+            print(key, "=", item_value(value, strip_newlines=True), sep="", file=f)
+    print("//Numeric Data", i, file=f)
+    return f.getvalue() + "".join(block["ordinate_text"])
+
+
+def written(write: Callable[..., None], *args: object) -> str:
+    """Call a TXT writer method on a string buffer and return what it wrote."""
+    f = io.StringIO()
+    write(f, *args)
+    return f.getvalue()
+
+
+def test_items_are_written_as_before() -> None:
+    processor = StructuredDataProcessor(CONFIG)
+    assert written(processor.write_txt_header, ITEMS) == original_header(ITEMS)
+    assert written(processor.write_txt_block, 3, BLOCK_ITEMS) == original_block(3, BLOCK_ITEMS)
+
+
+@pytest.mark.parametrize("name", SAMPLES)
+def test_samples_are_written_as_before(name: str, tmp_path: Path) -> None:
+    processor = StructuredDataProcessor(CONFIG)
+    rawfile = DATA_DIR.joinpath("vms", f"{name}.vms")
+    meta, _, data_blocks, _ = FileReader(CONFIG).read(output_paths(tmp_path, (rawfile,)))
+
+    assert written(processor.write_txt_header, meta) == original_header(meta)
+    for i, data_block in enumerate(data_blocks, start=1):
+        assert written(processor.write_txt_block, i, data_block) == original_block(i, data_block)